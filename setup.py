@@ -12,7 +12,7 @@ setup(
         author='Thorsten Butschke',
         author_email='thorsten.butschke@googlemail.com',
         url='https://thornpw@bitbucket.org/thornpw/steuer',
-        packages=['steuer'],
+        packages=['steuer', 'steuer.benchmarks'],
         package_dir={'steuer': 'src/steuer'},
         package_data={
             'steuer': [
@@ -1,8 +1,20 @@
 import json  # used for import and export the controller library
-import pygame  # the controller framework
+from array import array  # used for the contiguous controller state store
 import os  # used to read and write files
+import sys  # used to key the mapping cache by the python version
+import marshal  # used for the binary mapping cache
+import mmap  # used to index the mapping database without reading it
+import re  # used to index the mapping database
+import time  # used to timestamp and budget deferred callbacks
+import threading  # used to run callbacks off-thread
+import atexit  # used to shut down the callback threads
+import bisect  # used to sort callback latencies into the histogram buckets
+from collections import deque, namedtuple, OrderedDict  # used for the per controller callback queues, the action records and the mapping LRU
+try:
+    from collections.abc import MutableMapping  # base of the lazily decoded mappings
+except ImportError:
+    from collections import MutableMapping
 import logging  # used for logging
-import logging.config  # the logging configuration
 
 __author__ = 'ThorN / .tSCc. ^ Pionierwerk <kradd@tscc.de>'
 
@@ -25,18 +37,63 @@ mapping_databases = {}
 # pygame detected controllers
 controllers = []
 
+# registry of the connected controllers. The dispatch functions look the controller of an event up by
+# the instance id of the event (pygame 2) or by its joy (pygame 1, synthetic events).
+# SDL instance id -> the connected controller
+controllers_by_instance_id = {}
+
+# joy of the pygame events without instance id -> the connected controller. SDL moves the device indexes down when a
+# controller is removed, so after hotplugging two connected controllers can have the same number. The first one keeps
+# the joy, the events of the other one are found by their instance id
+controllers_by_joy = {}
+
+# player slot -> the connected controller or None if the slot is free. A controller that is plugged in again
+# gets the free slot of the last controller with the same GUID (or name), so players keep their slot across reconnects
+player_slots = []
+
+# player slot -> identity (GUID, name) of the controller that had the slot last
+_player_slot_identities = []
+
+# optional store that holds the bits of all controllers in one contiguous array
+state_store = None
+
+# queue of the deferred callbacks. Only used in deferred callback mode
+callback_queue = None
+
+# runs callbacks on a thread pool. Only used by actions and directions with the DISPATCH_THREAD policy
+thread_dispatcher = None
+
+# counters and latency histograms of the dispatch functions and the callbacks. Only used if the statistics are enabled
+instrumentation = None
+
+# the input backend that enumerates, opens and closes the controllers and delivers their events.
+# None uses a steuer.PygameBackend (see get_backend)
+backend = None
+
+# the pygame module. Imported by init and the PygameBackend (see _import_pygame), so importing steuer doesn't import pygame
+pygame = None
+
 # Initialize logging
 # **************************************************************************
-# load logger config
-logging.config.fileConfig('logging.conf')
-# create logger
+# create logger. Steuer is a library, so it stays silent until the application configures logging (see configure_logging)
 logger = logging.getLogger('Steuer')
+logger.addHandler(logging.NullHandler())
 
 # Event callback
 # **************************************************************************
 # module initialized
 on_initialized = None
 
+# a controller was plugged in. Called with the new steuer.Controller
+on_controller_added = None
+
+# a controller was removed. Called with the removed steuer.Controller
+on_controller_removed = None
+
+# an action that was pressed (pressed=True) or released (pressed=False) on the controller of a player slot.
+# Created by get_action_records for the action streams and the sampler
+ActionRecord = namedtuple("ActionRecord", ["player", "action", "pressed", "timestamp"])
+
 # constants that symbolize the meaning of the controller bits
 # @formatter:off
 DPAD_TOP = 0b1                              # bit 0:    DPAD TOP
@@ -66,14 +123,35 @@ BUTTON_SELECT = 0b100000000000000000000000  # bit 23:   Button Select
 BUTTON_HOME = 0b1000000000000000000000000   # bit 24:   Button Home - Todo: For future releases
 # @formatter:on
 
+# default axis thresholds. An axis action is pressed when the axis reaches the press threshold and released when the
+# axis falls below the release threshold. A mapping entry can override them with "Press" and "Release" next to "Function"
+axis_press_threshold = 1.0
+axis_release_threshold = 1.0
+
+# dispatch policies of the callback functions of actions and directions
+DISPATCH_INLINE = 0                         # the callback function is called by the dispatch function
+DISPATCH_DEFERRED = 1                       # the callback function is recorded and called by run_callbacks
+DISPATCH_THREAD = 2                         # the callback function is called on the thread pool of steuer
+
 dpad_bit_mask = 0b1111  # bits 0-3
 left_stick_bit_mask = 0b11110000  # bits 4-7  - Todo: For future releases
 rstick_bit_mask = 0b111100000000  # bits 8-11 - Todo: For future releases
+direction_bit_mask = dpad_bit_mask | left_stick_bit_mask | rstick_bit_mask  # bits 0-11
+
+# the pygame event types of the controllers. The values of pygame 2 until _import_pygame binds the values of the
+# installed pygame. The device events are None with pygame 1
+_joy_axis_motion = 1536
+_joy_hat_motion = 1538
+_joy_button_down = 1539
+_joy_button_up = 1540
+_device_added = 1541
+_device_removed = 1542
+_device_events = (_device_added, _device_removed)
 
 
 # functions
 # ==========================================================================
-def init(database_name="default", filename="steuer.json", mappingdb_path="", is_in_working_dir=True, use_events=True):
+def init(database_name="default", filename="steuer.json", mappingdb_path="", is_in_working_dir=True, use_events=True, use_state_store=False, use_journal=False, use_cache=False, use_lazy_loading=False, gamecontrollerdb=None, input_backend=None):
     """
     initialize the module.
     Triggers the "on_initialized" event
@@ -88,28 +166,104 @@ def init(database_name="default", filename="steuer.json", mappingdb_path="", is_
     :type is_in_working_dir:            bool
     :param use_events:                  Defines if the event triggering functionality is used
     :type use_events:                   bool
+    :param use_state_store:             Defines if the bits of all controllers are kept in one steuer.StateStore
+    :type use_state_store:              bool
+    :param use_journal:                 Defines if new mappings are appended to a journal instead of rewriting the mapping database (see MappingDB)
+    :type use_journal:                  bool
+    :param use_cache:                   Defines if the parsed mapping database is kept in a binary cache file (see MappingDB)
+    :type use_cache:                    bool
+    :param use_lazy_loading:            Defines if the mappings are decoded on demand instead of at load (see MappingDB)
+    :type use_lazy_loading:             bool
+    :param gamecontrollerdb:            Path of a SDL gamecontrollerdb.txt file. Controllers that are not in the mapping database
+                                        are looked up in it by GUID and name (see MappingDB.import_gamecontrollerdb)
+    :type gamecontrollerdb:             string
+    :param input_backend:               The input backend of the controllers. None keeps the current backend (see get_backend)
+    :type input_backend:                steuer.InputBackend
     """
+    global state_store, backend
+
+    _import_pygame()
+
+    if input_backend is not None:
+        backend = input_backend
+
     _flags['use_events'] = use_events
 
     logger.debug("Steuer initializing")
 
     # try to load the mapping database
     # if not found the mapping database is an empty array
-    mapping_databases[database_name] = MappingDB(database_name, filename, mappingdb_path, is_in_working_dir)
+    mapping_databases[database_name] = MappingDB(database_name, filename, mappingdb_path, is_in_working_dir, use_journal, use_cache, use_lazy_loading)
+    if gamecontrollerdb is not None:
+        mapping_databases[database_name].import_gamecontrollerdb(gamecontrollerdb)
     # get the number of controllers
-    _number_of_connected_controllers = pygame.joystick.get_count()
-    logger.debug("%s controllers found", str(_number_of_connected_controllers))
+    _number_of_connected_controllers = get_backend().get_count()
+    logger.debug("%s controllers found", _number_of_connected_controllers)
+
+    # keep the bits of all controllers in one array
+    if use_state_store:
+        state_store = StateStore(_number_of_connected_controllers)
 
     # create a Controller entity for every connected controller
     for controller_number in range(0, _number_of_connected_controllers):
-        _controller = Controller(controller_number)
-        controllers.append(_controller)
+        _add_controller(Controller(controller_number))
 
     # trigger the "on_initialized" event
     if on_initialized is not None and _flags['use_events']:
         on_initialized()
 
 
+def _import_pygame():
+    """
+    Import pygame and bind the pygame event types of the installed pygame. Does nothing if pygame is already imported.
+    pygame prints a banner when it is imported, which is hidden unless PYGAME_HIDE_SUPPORT_PROMPT is set by the application
+    """
+    global pygame, _joy_axis_motion, _joy_hat_motion, _joy_button_down, _joy_button_up, _device_added, _device_removed, _device_events
+
+    if pygame is not None:
+        return
+
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import pygame
+
+    _joy_axis_motion = pygame.JOYAXISMOTION
+    _joy_hat_motion = pygame.JOYHATMOTION
+    _joy_button_down = pygame.JOYBUTTONDOWN
+    _joy_button_up = pygame.JOYBUTTONUP
+    _device_added = getattr(pygame, "JOYDEVICEADDED", None)
+    _device_removed = getattr(pygame, "JOYDEVICEREMOVED", None)
+    _device_events = tuple(_event_type for _event_type in (_device_added, _device_removed) if _event_type is not None)
+
+
+def configure_logging(config_file=None, level=logging.INFO, handler=None):
+    """
+    Configure the logging of steuer. Importing steuer doesn't configure logging, the Steuer logger only has a NullHandler.
+    Either a logging config file is loaded (like the logging.conf files of the examples) or a handler is attached
+    to the Steuer logger
+
+    :param config_file:                 Path of a logging config file (logging.config.fileConfig format). None attaches a handler instead
+    :type config_file:                  string
+    :param level:                       The level of the Steuer logger if no config file is given
+    :type level:                        int
+    :param handler:                     The handler to attach if no config file is given. None attaches a StreamHandler
+    :type handler:                      logging.Handler
+    :return:                            The Steuer logger
+    :rtype:                             logging.Logger
+    """
+    if config_file is not None:
+        import logging.config
+        logging.config.fileConfig(config_file, disable_existing_loggers=False)
+    else:
+        if handler is None:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+        logger.addHandler(handler)
+        logger.setLevel(level)
+
+    return logger
+
+
 def detect_connected_controllers(database_name="default"):
     """
     Wrapper of MappingDB.detect_connected_controllers
@@ -140,133 +294,549 @@ def call_event_and_direction(event):
     Set the controller bits.
     Returns the action that was mapped to the event.
 
+    :param event:                       The pygame event
+    :type event                         pygame.Event
+    :return                             the action that happened
+    :rtype                              string
+    """
+    _event_dict = event.dict
+
+    if "joy" in _event_dict:
+        if "instance_id" in _event_dict:
+            _controller = controllers_by_instance_id.get(_event_dict["instance_id"])
+        else:
+            _controller = controllers_by_joy.get(_event_dict["joy"])
+
+        if _controller is not None:
+            return _call_event_and_direction(_controller, event)
+
+    return None
+
+
+def call_event(event):
+    """
+    Calls the action mapped to an pygame event if one is defined.
+    Set the controller bits.
+    Returns the action that was mapped to the event.
+
+    :param event:                       The pygame event
+    :type event                         pygame.Event
+    :return                             the action that happened
+    :rtype                              string
+    """
+    _event_dict = event.dict
+
+    if "joy" in _event_dict:
+        if "instance_id" in _event_dict:
+            _controller = controllers_by_instance_id.get(_event_dict["instance_id"])
+        else:
+            _controller = controllers_by_joy.get(_event_dict["joy"])
+
+        if _controller is not None:
+            return _call_event(_controller, event)
+
+    return None
+
+
+def get_action(event):
+    """
+    Set the controller bits.
+    Returns the action that was mapped to the event.
+
+    :param event:                       The pygame event
+    :type event                         pygame.Event
+    :return                             the action that happened
+    :rtype                              string
+    """
+    _event_dict = event.dict
+
+    if "joy" in _event_dict:
+        if "instance_id" in _event_dict:
+            _controller = controllers_by_instance_id.get(_event_dict["instance_id"])
+        else:
+            _controller = controllers_by_joy.get(_event_dict["joy"])
+
+        if _controller is not None:
+            return _get_action(_controller, event)
+
+    return None
+
+
+def get_backend():
+    """
+    Get the input backend. A steuer.PygameBackend is created if no backend is set
+
+    :return:                            The input backend
+    :rtype:                             steuer.InputBackend
+    """
+    global backend
+
+    if backend is None:
+        backend = PygameBackend()
+
+    return backend
+
+
+def get_events(event_types=None):
+    """
+    Wrapper of InputBackend.get_events. Use it instead of pygame.event.get() to get the controller events of any backend
+
+    :param event_types:                 The event types to get. None gets all events
+    :type event_types:                  list
+    :return:                            The events
+    :rtype:                             list
+    """
+    return get_backend().get_events(event_types)
+
+
+def get_controller(event):
+    """
+    Get the connected controller that sent a pygame event.
+    The controller is looked up by the instance id of the event (pygame 2) or by its joy
+
+    :param event:                       The pygame event
+    :type event:                        pygame.Event
+    :return:                            The controller or None if the event doesn't belong to a connected controller
+    :rtype:                             steuer.Controller
+    """
+    _event_dict = event.dict
+
+    if "joy" in _event_dict:
+        if "instance_id" in _event_dict:
+            return controllers_by_instance_id.get(_event_dict["instance_id"])
+
+        return controllers_by_joy.get(_event_dict["joy"])
+
+    return None
+
+
+def get_player(slot):
+    """
+    Get the controller of a player slot
+
+    :param slot:                        The player slot
+    :type slot:                         int
+    :return:                            The controller or None if no controller has the slot
+    :rtype:                             steuer.Controller
+    """
+    if 0 <= slot < len(player_slots):
+        return player_slots[slot]
+
+    return None
+
+
+def get_action_records(events, use_callbacks=False, timestamp=None):
+    """
+    Run events through the mapping and get the actions they pressed and released as action records.
+    Per event the released actions come first, so an axis that flips sides shows the release before the press.
+    Events that don't belong to a connected controller are ignored
+
+    :param events:                      The pygame events
+    :type events:                       list
+    :param use_callbacks:               Defines if the callback functions of the actions are called as well (call_event semantics)
+    :type use_callbacks:                bool
+    :param timestamp:                   The timestamp of the records, or a list with the timestamp of every event. None uses time.perf_counter()
+    :type timestamp:                    float or list
+    :return:                            The action records
+    :rtype:                             list
+    """
+    _dispatch_function = _call_event if use_callbacks else _get_action
+    _records = []
+    _timestamps = timestamp if isinstance(timestamp, list) else None
+
+    if timestamp is None:
+        timestamp = time.perf_counter()
+
+    for _index, event in enumerate(events):
+        _controller = get_controller(event)
+        if _controller is None:
+            continue
+
+        if _timestamps is not None:
+            timestamp = _timestamps[_index]
+
+        _old_bits = int(_controller._bits_store[_controller._bits_index])
+        _dispatch_function(_controller, event)
+        _new_bits = int(_controller._bits_store[_controller._bits_index])
+
+        if _new_bits != _old_bits:
+            for _action in Action.get_actions_by_bits(_old_bits & ~_new_bits):
+                _records.append(ActionRecord(_controller.player, _action.action, False, timestamp))
+            for _action in Action.get_actions_by_bits(_new_bits & ~_old_bits):
+                _records.append(ActionRecord(_controller.player, _action.action, True, timestamp))
+
+    return _records
+
+
+def coalesce_events(events):
+    """
+    Keep only the latest JOYAXISMOTION event per controller and axis and the latest JOYHATMOTION event per controller and hat.
+    The kept events stay at the position of their latest occurrence, all other events are kept in order.
+
+    :param events:                      The pygame events of a frame
+    :type events:                       list
+    :return:                            The kept events and the number of dropped events
+    :rtype:                             tuple
+    """
+    _seen = set()
+    _kept = []
+
+    # walk backwards, so the first event seen for an axis or hat is the latest one
+    for event in reversed(events):
+        _event_type = event.type
+
+        if _event_type == _joy_axis_motion:
+            _key = (event.dict.get("instance_id"), event.dict["joy"], False, event.dict["axis"])
+        elif _event_type == _joy_hat_motion:
+            _key = (event.dict.get("instance_id"), event.dict["joy"], True, event.dict["hat"])
+        else:
+            _kept.append(event)
+            continue
+
+        if _key not in _seen:
+            _seen.add(_key)
+            _kept.append(event)
+
+    _kept.reverse()
+
+    return _kept, len(events) - len(_kept)
+
+
+def process_events(events, use_callbacks=True, use_directions=False, coalesce=False):
+    """
+    Process all events of a frame at once. Example: steuer.process_events(steuer.get_events())
+    The events are applied in order with the same bit semantics as
+    get_action (use_callbacks=False), call_event (use_callbacks=True) or call_event_and_direction (use_directions=True).
+    Device added and removed events are passed to handle_device_event. Other events that don't belong to a controller are ignored.
+    Returns the actions whose bits changed between the start and the end of the frame. An action that is pressed and
+    released within the same frame cancels out, its callbacks are called anyway.
+
+    :param events:                      The pygame events of the frame
+    :type events:                       list
+    :param use_callbacks:               Defines if the on_pressed and on_released callback functions are called
+    :type use_callbacks:                bool
+    :param use_directions:              Defines if the on_heading and on_unheading callback functions are called as well
+    :type use_directions:               bool
+    :param coalesce:                    Defines if the axis and hat events are coalesced first (see coalesce_events)
+    :type coalesce:                     bool
+    :return:                            player slot -> (bits of the pressed actions, bits of the released actions)
+    :rtype:                             steuer.FrameResult
+    """
+    _result = FrameResult()
+
+    if coalesce:
+        events, _result.dropped_events = coalesce_events(events)
+
+    if use_directions:
+        _dispatch_function = _call_event_and_direction
+    elif use_callbacks:
+        _dispatch_function = _call_event
+    else:
+        _dispatch_function = _get_action
+
+    # dispatch the events in one pass and keep the bits of every controller at its first event. Device events are
+    # handled in order, so the events of a controller that was removed during the frame are ignored
+    _old_bits_by_controller = {}
+    _get_by_instance_id = controllers_by_instance_id.get
+    _get_by_joy = controllers_by_joy.get
+    for event in events:
+        _event_dict = event.dict
+        if "joy" in _event_dict:
+            if "instance_id" in _event_dict:
+                _controller = _get_by_instance_id(_event_dict["instance_id"])
+            else:
+                _controller = _get_by_joy(_event_dict["joy"])
+
+            if _controller is not None:
+                if _controller not in _old_bits_by_controller:
+                    _old_bits_by_controller[_controller] = int(_controller._bits_store[_controller._bits_index])
+                _dispatch_function(_controller, event)
+        elif event.type in _device_events:
+            _removed_controller = handle_device_event(event)
+            if _removed_controller is not None and event.type == _device_removed:
+                _old_bits_by_controller.pop(_removed_controller, None)
+
+    # diff the bits of every controller once
+    for _controller, _old_bits in _old_bits_by_controller.items():
+        _new_bits = int(_controller._bits_store[_controller._bits_index])
+        _result[_controller.player] = (_new_bits & ~_old_bits, _old_bits & ~_new_bits)
+
+    return _result
+
+
+def handle_device_event(event, database_name="default"):
+    """
+    Handle a JOYDEVICEADDED or JOYDEVICEREMOVED event of pygame 2. Only the affected controller is created or dropped,
+    the other controllers keep their state. Example:
+        for event in steuer.get_events():
+            if event.type in (pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED):
+                steuer.handle_device_event(event)
+
+    :param event:                       The pygame event
+    :type event:                        pygame.Event
+    :param database_name:               The mapping database the mapping of a new controller is looked up in
+    :type database_name:                string
+    :return:                            The added or removed controller. None for other events and for the JOYDEVICEADDED events
+                                        of controllers that are already connected
+    :rtype:                             steuer.Controller
+    """
+    if event.type == _device_added:
+        return add_controller(event.dict["device_index"], database_name)
+    elif event.type == _device_removed:
+        _controller = controllers_by_instance_id.get(event.dict["instance_id"])
+        if _controller is not None:
+            remove_controller(_controller)
+            return _controller
+
+    return None
+
+
+def add_controller(device_index, database_name="default"):
+    """
+    Add a plugged in controller and map it with the mapping from the mapping database. The controller is opened when it is mapped.
+    If no mapping is found, the controller is marked as undetected (see Configuration.mark_as_undetected).
+    SDL also sends JOYDEVICEADDED for the controllers that are connected at startup. Controllers whose instance id is
+    already connected are ignored, so they don't get a second Controller and player slot.
+    Triggers the "on_controller_added" event
+
+    :param device_index:                The pygame device index of the controller
+    :type device_index:                 int
+    :param database_name:               The mapping database the mapping is looked up in
+    :type database_name:                string
+    :return:                            The new controller. None if the controller is already connected
+    :rtype:                             steuer.Controller
+    """
+    _backend = get_backend()
+    _instance_id = _backend.describe(_backend.get_device(device_index))[2]
+
+    if _instance_id is not None and _instance_id in controllers_by_instance_id:
+        logger.debug("Controller with instance id %s is already connected", _instance_id)
+        return None
+
+    _controller = Controller(device_index)
+
+    _add_controller(_controller)
+    logger.debug("Controller %s:%s added as player %s", _controller.number, _controller.name, _controller.player)
+
+    _database = mapping_databases.get(database_name)
+    _mapping = None if _database is None else _database.get_mapping_by_controller(_controller)
+
+    if _mapping is None:
+        Configuration.mark_as_undetected(_controller)
+    else:
+        _controller.set_mapping(_mapping, _database.get_compiled_mapping(_controller.name))
+
+    # trigger the "on_controller_added" event
+    if on_controller_added is not None and _flags.get('use_events'):
+        on_controller_added(_controller)
+
+    return _controller
+
+
+def remove_controller(controller):
+    """
+    Drop a controller and close its pygame joystick. Deferred callbacks of the controller that are still queued are run anyway.
+    Triggers the "on_controller_removed" event
+
+    :param controller:                  The controller to remove
+    :type controller:                   steuer.Controller
+    """
+    _remove_controller(controller)
+
+    if controller in Configuration.undetected_controllers:
+        Configuration.undetected_controllers.remove(controller)
+    controller.close()
+
+    logger.debug("Controller %s:%s removed", controller.number, controller.name)
+
+    # trigger the "on_controller_removed" event
+    if on_controller_removed is not None and _flags.get('use_events'):
+        on_controller_removed(controller)
+
+
+def _add_controller(controller):
+    """
+    Add a controller to the connected controllers and the registry and assign its player slot.
+    The controller gets the free slot of the last controller with the same identity, otherwise the lowest free slot
+
+    :param controller:                  The controller
+    :type controller:                   steuer.Controller
+    """
+    controllers.append(controller)
+    if controllers_by_joy.setdefault(controller.number, controller) is not controller:
+        logger.debug("Controller %s:%s shares its number, its events are looked up by instance id", controller.number, controller.name)
+    if controller.instance_id is not None:
+        controllers_by_instance_id[controller.instance_id] = controller
+
+    _identity = (controller.guid, controller.name) if controller.guid else (None, controller.name)
+    _slot = None
+
+    for _free_slot, _slot_controller in enumerate(player_slots):
+        if _slot_controller is None:
+            if _player_slot_identities[_free_slot] == _identity:
+                _slot = _free_slot
+                break
+            if _slot is None:
+                _slot = _free_slot
+
+    if _slot is None:
+        _slot = len(player_slots)
+        player_slots.append(None)
+        _player_slot_identities.append(None)
+
+    player_slots[_slot] = controller
+    _player_slot_identities[_slot] = _identity
+    controller.player = _slot
+
+    # a mapped controller that is assigned to a player is needed
+    if controller.is_mapped:
+        controller.open()
+
+    if state_store is not None:
+        state_store.attach(controller)
+
+
+def _remove_controller(controller):
+    """
+    Remove a controller from the connected controllers and the registry. Its player slot stays reserved for its identity
+    until another controller needs a slot
+
+    :param controller:                  The controller
+    :type controller:                   steuer.Controller
+    """
+    if controller in controllers:
+        controllers.remove(controller)
+    if controllers_by_joy.get(controller.number) is controller:
+        del controllers_by_joy[controller.number]
+
+        # hand the joy over to a connected controller with the same number
+        for _controller in controllers:
+            if _controller.number == controller.number:
+                controllers_by_joy[controller.number] = _controller
+                break
+    if controller.instance_id is not None and controllers_by_instance_id.get(controller.instance_id) is controller:
+        del controllers_by_instance_id[controller.instance_id]
+    if controller.player is not None and player_slots[controller.player] is controller:
+        player_slots[controller.player] = None
+    if state_store is not None and controller in state_store.controllers:
+        state_store.detach(controller)
+
+
+def _dispatch(controller, owner, callback):
+    """
+    Run a callback function of an action or a direction. The callback is called inline if the owner has no dispatcher,
+    otherwise it is submitted to the dispatcher of the owner (deferred queue, thread pool or instrumented dispatcher).
+    Does nothing if the callback function is None
+
+    :param controller:                  The controller the callback is called with
+    :type controller:                   steuer.Controller
+    :param owner:                       The action or direction of the callback
+    :type owner:                        steuer.Action or steuer.Direction
+    :param callback:                    The callback function
+    :type callback:                     function
+    """
+    if callback is None:
+        return
+
+    if owner.dispatcher is None:
+        callback(controller)
+    else:
+        owner.dispatcher.submit(callback, controller, owner)
+
+
+def _call_event_and_direction(_controller, event):
+    """
+    call_event_and_direction for an event of a known controller
+
+    :param _controller:                 The controller that sent the event
+    :type _controller:                  steuer.Controller
     :param event:                       The pygame event
     :type event                         pygame.Event
     :return                             the action that happened
     :rtype                              string
     """
     _action_happened = None
+    _event_type = event.type
 
-    if event.type == pygame.JOYBUTTONDOWN:
-        _controller_number = event.dict["joy"]
-        _button = str(event.dict["button"])
+    if _event_type == _joy_button_down or _event_type == _joy_button_up:
+        _is_pressed = _event_type == _joy_button_down
 
-        # use event data to find the mapping
-        if _button in controllers[_controller_number].mapping["button"].keys():
-            # get action
-            _action_happened = controllers[_controller_number].mapping["button"][_button]["Function"]
+        # use the compiled button table to find the action
+        _action = _controller._button_actions.get(event.dict["button"])
 
-            # set controller bits
-            # get old and new direction
-            _old_direction = controllers[_controller_number].bits & dpad_bit_mask
-            _new_direction = controllers[_controller_number].change_bits(Action.actions[_action_happened].value, True) & dpad_bit_mask
+        if _action is not None:
+            _action_happened = _action.action
+
+            # set or clear controller bits
+            # get old and new bits
+            _old_bits = _controller.bits
+            _new_bits = _controller.change_bits(_action.value, _is_pressed)
 
             # if the action has an callback function, call this callback function
-            if Action.actions[_action_happened].on_pressed is not None:
-                Action.actions[_action_happened].on_pressed(controllers[_controller_number])
+            _dispatch(_controller, _action, _action.on_pressed if _is_pressed else _action.on_released)
+
+            # call direction on_heading & on_unheading, if the action is part of a direction
+            if _action.value & direction_bit_mask:
+                _call_directions(_controller, _old_bits, _new_bits)
 
-            # call direction on_heading & on_unheading
-            if not _old_direction == 0 and Action.directions[str(_old_direction)].on_unheading is not None:
-                Action.directions[str(_old_direction)].on_unheading(controllers[_controller_number])
-            if not _new_direction == 0 and Action.directions[str(_new_direction)].on_heading is not None:
-                Action.directions[str(_new_direction)].on_heading(controllers[_controller_number])
+    elif _event_type == _joy_axis_motion:
+        _value = event.dict["value"]
+        _axis = event.dict["axis"]
+        _last_entry = _controller._last_axis_action.get(_axis)
 
-    elif event.type == pygame.JOYBUTTONUP:
-        _controller_number = event.dict["joy"]
-        _button = str(event.dict["button"])
+        if _last_entry is not None:
+            # the axis keeps its action until it falls below the release threshold on the side of the action.
+            # Events inside the hysteresis band are redundant (see Controller.compile_mapping)
+            if (_value if _last_entry[3] else -_value) >= _last_entry[2]:
+                return None
 
-        # use event data to find the mapping
-        if _button in controllers[_controller_number].mapping["button"].keys():
-            # get action
-            _action_happened = controllers[_controller_number].mapping["button"][_button]["Function"]
+            # release the last axis action
+            _action = _last_entry[0]
+            _action_happened = _action.action
 
             # clear controller bits
-            # get old and new direction
-            _old_direction = controllers[_controller_number].bits & dpad_bit_mask
-            _new_direction = controllers[_controller_number].change_bits(Action.actions[_action_happened].value, False) & dpad_bit_mask
+            # get old and new bits
+            _old_bits = _controller.bits
+            _new_bits = _controller.change_bits(_action.value, False)
+
+            # if last axis action has an callback function, call this callback function
+            _dispatch(_controller, _action, _action.on_released)
+
+            # call direction on_heading & on_unheading, if the action is part of a direction
+            if _action.value & direction_bit_mask:
+                _call_directions(_controller, _old_bits, _new_bits)
+
+            # save action as last axis action
+            _controller._last_axis_action[_axis] = None
+
+        # use the compiled axis table to find the action of the side the axis is moved to (see _axis_code)
+        _entry = _controller._axis_actions.get(_axis * 2 + (_value > 0))
+
+        if _entry is not None and (_value if _value > 0 else -_value) >= _entry[1]:
+            _action = _entry[0]
+            _action_happened = _action.action
+
+            # set controller bits
+            # get old and new bits
+            _old_bits = _controller.bits
+            _new_bits = _controller.change_bits(_action.value, True)
 
             # if action has an callback function, call this callback function
-            if not Action.actions[_action_happened].on_released is None:
-                Action.actions[_action_happened].on_released(controllers[_controller_number])
+            _dispatch(_controller, _action, _action.on_pressed)
 
-            # call direction on_heading & on_unheading
-            if not _old_direction == 0 and not Action.directions[str(_old_direction)].on_unheading is None:
-                Action.directions[str(_old_direction)].on_unheading(controllers[_controller_number])
-            if not _new_direction == 0 and not Action.directions[str(_new_direction)].on_heading is None:
-                Action.directions[str(_new_direction)].on_heading(controllers[_controller_number])
+            # call direction on_heading & on_unheading, if the action is part of a direction
+            if _action.value & direction_bit_mask:
+                _call_directions(_controller, _old_bits, _new_bits)
 
-    if event.type == pygame.JOYAXISMOTION:
-        _controller_number = event.dict["joy"]
-        _value = event.dict["value"]
-        _axis = str(event.dict["axis"])
-        _key_part = str(_axis) + ":"
-        _key = _key_part
+            # save action as last axis action
+            _controller._last_axis_action[_axis] = _entry
 
-        if _value <= -1 or _value >= 1:
-            if _value > 0:
-                _key += ">"
-            else:
-                _key += "<"
-
-            # use event to find the mapping
-            if _key in controllers[_controller_number].mapping["axis"].keys():
-                # get action
-                _action_happened = controllers[_controller_number].mapping["axis"][_key]["Function"]
-
-                # set controller bits
-                # get old and new direction
-                _old_direction = controllers[_controller_number].bits & dpad_bit_mask
-                _new_direction = controllers[_controller_number].change_bits(Action.actions[_action_happened].value, True) & dpad_bit_mask
-
-                # if action has an callback function, call this callback function
-                if not Action.actions[_action_happened].on_pressed is None:
-                    Action.actions[_action_happened].on_pressed(controllers[_controller_number])
-
-                # call direction on_heading & on_unheading
-                if not _old_direction == 0 and not Action.directions[str(_old_direction)].on_unheading is None:
-                    Action.directions[str(_old_direction)].on_unheading(controllers[_controller_number])
-                if not _new_direction == 0 and not Action.directions[str(_new_direction)].on_heading is None:
-                    Action.directions[str(_new_direction)].on_heading(controllers[_controller_number])
-
-                # save action as last axis action
-                controllers[_controller_number].set_last_axis_action(_axis, _action_happened)
-        else:
-            if not controllers[_controller_number].get_last_axis_action(_axis) is None:
-                # react on the center the axis event
-                # get last axis action
-                _action_happened = controllers[_controller_number].get_last_axis_action(_axis)
-
-                # clear controller bits
-                # get old and new direction
-                _old_direction = controllers[_controller_number].bits & dpad_bit_mask
-                _new_direction = controllers[_controller_number].change_bits(Action.actions[_action_happened].value, False) & dpad_bit_mask
-
-                # if last axis action has an callback function, call this callback function
-                if not Action.actions[_action_happened].on_released is None:
-                    Action.actions[_action_happened].on_released(controllers[_controller_number])
-
-                # call direction on_heading & on_unheading
-                if not _old_direction == 0 and not Action.directions[str(_old_direction)].on_unheading is None:
-                    Action.directions[str(_old_direction)].on_unheading(controllers[_controller_number])
-                if not _new_direction == 0 and not Action.directions[str(_new_direction)].on_heading is None:
-                    Action.directions[str(_new_direction)].on_heading(controllers[_controller_number])
-
-                # save action as last axis action
-                controllers[_controller_number].set_last_axis_action(_axis)
-
-    if event.type == pygame.JOYHATMOTION:
-        _controller_number = event.dict["joy"]
-        _value_x = event.dict["value"][0]
-        _value_y = event.dict["value"][1]
+    elif _event_type == _joy_hat_motion:
+        _value_x, _value_y = event.dict["value"]
         _hat = event.dict["hat"]
-        _key_vertical = str(_hat) + ":" + str(_value_x) + ":0"
-        _key_horizontal = str(_hat) + ":0:" + str(_value_y)
-        _action_vertical_happened = None
-        _action_horizontal_happened = None
 
-        # get old direction
-        _old_direction = controllers[_controller_number].bits & dpad_bit_mask
-        _new_direction = _old_direction
+        # get old bits
+        _old_bits = _controller.bits
 
         # 8 way movement
         # detection of 8 directions and 8 actions (top,
@@ -279,370 +849,622 @@ def call_event_and_direction(event):
         # directions (top-left,top-right,down-left,down-right) are calculated
         # ******************************************************************************************************
         # get last actions
-        _last_hat_vertical_action = controllers[_controller_number].get_last_hat_action(_hat, 'vertical')
-        _last_hat_horizontal_action = controllers[_controller_number].get_last_hat_action(_hat, 'horizontal')
+        _last_actions = _controller._last_hat_action
+        _last_hat_vertical_action = _last_actions.get(_hat * 2)
+        _last_hat_horizontal_action = _last_actions.get(_hat * 2 + 1)
 
-        # use event to find the mapping
-        # get action
-        if _key_vertical in controllers[_controller_number].mapping["hat"].keys():
-            _action_vertical_happened = controllers[_controller_number].mapping["hat"][_key_vertical]["Function"]
-            _action_happened = _action_horizontal_happened
+        # use the compiled hat table to find the actions (see _hat_code)
+        _action_vertical_happened = _controller._hat_actions.get(_hat * 9 + _value_x * 3 + 4)
+        _action_horizontal_happened = _controller._hat_actions.get(_hat * 9 + _value_y + 4)
 
-        if _key_horizontal in controllers[_controller_number].mapping["hat"].keys():
-            _action_horizontal_happened = controllers[_controller_number].mapping["hat"][_key_horizontal]["Function"]
-            _action_happened = _action_horizontal_happened
+        if _action_horizontal_happened is not None:
+            _action_happened = _action_horizontal_happened.action
 
         # trigger on_release events and clear direction bits
-        if _last_hat_vertical_action is not None and not _action_vertical_happened == _last_hat_vertical_action:
-            # get new direction and clear controller bits
-            _new_direction = controllers[_controller_number].change_bits(Action.actions[_last_hat_vertical_action].value, False)
+        if _last_hat_vertical_action is not None and _action_vertical_happened is not _last_hat_vertical_action:
+            # clear controller bits
+            _controller.change_bits(_last_hat_vertical_action.value, False)
 
             # call callback function
-            if Action.actions[_last_hat_vertical_action].on_released is not None:
-                Action.actions[_last_hat_vertical_action].on_released(controllers[_controller_number])
+            _dispatch(_controller, _last_hat_vertical_action, _last_hat_vertical_action.on_released)
 
             # set last hat action
-            controllers[_controller_number].set_last_hat_action(_hat, 'vertical')
+            _last_actions[_hat * 2] = None
 
-        if _last_hat_horizontal_action is not None and not _action_horizontal_happened == _last_hat_horizontal_action:
-            # get new direction and clear controller bits
-            _new_direction = controllers[_controller_number].change_bits(Action.actions[_last_hat_horizontal_action].value, False)
+        if _last_hat_horizontal_action is not None and _action_horizontal_happened is not _last_hat_horizontal_action:
+            # clear controller bits
+            _controller.change_bits(_last_hat_horizontal_action.value, False)
 
             # call callback function
-            if Action.actions[_last_hat_horizontal_action].on_released is not None:
-                Action.actions[_last_hat_horizontal_action].on_released(controllers[_controller_number])
+            _dispatch(_controller, _last_hat_horizontal_action, _last_hat_horizontal_action.on_released)
 
             # set last hat action
-            controllers[_controller_number].set_last_hat_action(_hat, 'horizontal')
+            _last_actions[_hat * 2 + 1] = None
 
         # trigger new action and set new direction
-        if _action_vertical_happened is not None and not _action_vertical_happened == _last_hat_vertical_action:
-            # get new direction and set controller bits
-            _new_direction = controllers[_controller_number].change_bits(Action.actions[_action_vertical_happened].value, True)
+        if _action_vertical_happened is not None and _action_vertical_happened is not _last_hat_vertical_action:
+            # set controller bits
+            _controller.change_bits(_action_vertical_happened.value, True)
 
             # call callback function
-            if Action.actions[_action_vertical_happened].on_pressed is not None:
-                Action.actions[_action_vertical_happened].on_pressed(controllers[_controller_number])
+            _dispatch(_controller, _action_vertical_happened, _action_vertical_happened.on_pressed)
 
             # set last hat action
-            controllers[_controller_number].set_last_hat_action(_hat, 'vertical', _action_vertical_happened)
+            _last_actions[_hat * 2] = _action_vertical_happened
 
-        if _action_horizontal_happened is not None and not _action_horizontal_happened == _last_hat_horizontal_action:
-            # get new direction and set controller bits
-            _new_direction = controllers[_controller_number].change_bits(Action.actions[_action_horizontal_happened].value, True)
+        if _action_horizontal_happened is not None and _action_horizontal_happened is not _last_hat_horizontal_action:
+            # set controller bits
+            _controller.change_bits(_action_horizontal_happened.value, True)
 
             # call callback function
-            if Action.actions[_action_horizontal_happened].on_pressed is not None:
-                Action.actions[_action_horizontal_happened].on_pressed(controllers[_controller_number])
+            _dispatch(_controller, _action_horizontal_happened, _action_horizontal_happened.on_pressed)
 
             # set last hat action
-            controllers[_controller_number].set_last_hat_action(_hat, 'horizontal', _action_horizontal_happened)
+            _last_actions[_hat * 2 + 1] = _action_horizontal_happened
 
         # call direction on_heading and on_unheading
-        if _old_direction != _new_direction:
-            if not _old_direction == 0 and not Action.directions[str(_old_direction)].on_unheading is None:
-                Action.directions[str(_old_direction)].on_unheading(controllers[_controller_number])
-            if not _new_direction == 0 and not Action.directions[str(_new_direction)].on_heading is None:
-                Action.directions[str(_new_direction)].on_heading(controllers[_controller_number])
+        _new_bits = _controller.bits
+        if (_old_bits ^ _new_bits) & direction_bit_mask:
+            _call_directions(_controller, _old_bits, _new_bits)
 
     return _action_happened
 
 
-def call_event(event):
+def _call_event(_controller, event):
     """
-    Calls the action mapped to an pygame event if one is defined.
-    Set the controller bits.
-    Returns the action that was mapped to the event.
+    call_event for an event of a known controller
 
+    :param _controller:                 The controller that sent the event
+    :type _controller:                  steuer.Controller
     :param event:                       The pygame event
     :type event                         pygame.Event
     :return                             the action that happened
     :rtype                              string
     """
     _action_happened = None
+    _event_type = event.type
 
-    if "joy" in event.dict:
-        _controller_number = event.dict["joy"]
+    if _event_type == _joy_button_down:
+        # use the compiled button table to find the action
+        _action = _controller._button_actions.get(event.dict["button"])
 
-        if controllers[_controller_number].mapping is not None:
-            if event.type == pygame.JOYBUTTONDOWN:
-                _button = str(event.dict["button"])
+        if _action is not None:
+            _action_happened = _action.action
 
-                # use event data to find the mapping
-                if _button in controllers[_controller_number].mapping["button"].keys():
-                    # get action
-                    _action_happened = controllers[_controller_number].mapping["button"][_button]["Function"]
+            # set controller bits
+            _controller.change_bits(_action.value, True)
 
-                    # set controller bits
-                    controllers[_controller_number].change_bits(Action.actions[_action_happened].value, True) & dpad_bit_mask
+            # if the action has an callback function, call this callback function
+            _dispatch(_controller, _action, _action.on_pressed)
 
-                    # if the action has an callback function, call this callback function
-                    if Action.actions[_action_happened].on_pressed is not None:
-                        Action.actions[_action_happened].on_pressed(controllers[_controller_number])
+    elif _event_type == _joy_button_up:
+        # use the compiled button table to find the action
+        _action = _controller._button_actions.get(event.dict["button"])
 
-            elif event.type == pygame.JOYBUTTONUP:
-                _button = str(event.dict["button"])
+        if _action is not None:
+            _action_happened = _action.action
 
-                # use event data to find the mapping
-                if _button in controllers[_controller_number].mapping["button"].keys():
-                    # get action
-                    _action_happened = controllers[_controller_number].mapping["button"][_button]["Function"]
+            # clear controller bits
+            _controller.change_bits(_action.value, False)
 
-                    # clear controller bits
-                    controllers[_controller_number].change_bits(Action.actions[_action_happened].value, False) & dpad_bit_mask
+            # if action has an callback function, call this callback function
+            _dispatch(_controller, _action, _action.on_released)
 
-                    # if action has an callback function, call this callback function
-                    if not Action.actions[_action_happened].on_released is None:
-                        Action.actions[_action_happened].on_released(controllers[_controller_number])
+    elif _event_type == _joy_axis_motion:
+        _value = event.dict["value"]
+        _axis = event.dict["axis"]
+        _last_entry = _controller._last_axis_action.get(_axis)
 
-            elif event.type == pygame.JOYAXISMOTION:
-                _value = event.dict["value"]
-                _axis = str(event.dict["axis"])
-                _key_part = str(_axis) + ":"
-                _key = _key_part
+        if _last_entry is not None:
+            # the axis keeps its action until it falls below the release threshold on the side of the action.
+            # Events inside the hysteresis band are redundant (see Controller.compile_mapping)
+            if (_value if _last_entry[3] else -_value) >= _last_entry[2]:
+                return None
 
-                if _value <= -1 or _value >= 1:
-                    if _value > 0:
-                        _key += ">"
-                    else:
-                        _key += "<"
+            # release the last axis action
+            _action = _last_entry[0]
+            _action_happened = _action.action
 
-                    # use event to find the mapping
-                    if _key in controllers[_controller_number].mapping["axis"].keys():
-                        # get action
-                        _action_happened = controllers[_controller_number].mapping["axis"][_key]["Function"]
+            # clear controller bits
+            _controller.change_bits(_action.value, False)
 
-                        # set controller bits
-                        controllers[_controller_number].change_bits(Action.actions[_action_happened].value, True) & dpad_bit_mask
+            # if last axis action has an callback function, call this callback function
+            _dispatch(_controller, _action, _action.on_released)
 
-                        # if action has an callback function, call this callback function
-                        if not Action.actions[_action_happened].on_pressed is None:
-                            Action.actions[_action_happened].on_pressed(controllers[_controller_number])
+            # save action as last axis action
+            _controller._last_axis_action[_axis] = None
 
-                        # save action as last axis action
-                        controllers[_controller_number].set_last_axis_action(_axis, _action_happened)
-                else:
-                    if not controllers[_controller_number].get_last_axis_action(_axis) is None:
-                        # react on the center the axis event
-
-                        # get last axis action
-                        _action_happened = controllers[_controller_number].get_last_axis_action(_axis)
-
-                        # clear controller bits
-                        controllers[_controller_number].change_bits(Action.actions[_action_happened].value, False) & dpad_bit_mask
-
-                        # if last axis action has an callback function, call this callback function
-                        if not Action.actions[_action_happened].on_released is None:
-                            Action.actions[_action_happened].on_released(controllers[_controller_number])
-
-                        # save action as last axis action
-                        controllers[_controller_number].set_last_axis_action(_axis)
-
-            elif event.type == pygame.JOYHATMOTION:
-                _value_x = event.dict["value"][0]
-                _value_y = event.dict["value"][1]
-                _hat = event.dict["hat"]
-                _key_vertical = str(_hat) + ":" + str(_value_x) + ":0"
-                _key_horizontal = str(_hat) + ":0:" + str(_value_y)
-
-                _action_vertical_happened = None
-                _action_horizontal_happened = None
-
-                # 8 way movement
-                # detection of 8 directions and 8 actions (top,
-                # ******************************************************************************************************
-                # Todo: to detect real hat movement test if action is configured for 8 way movement.
-
-                # 4 way movement
-                # detection of 8 directions and 4 actions (left,right,top,down only)
-                # a action for the each direction (top-down, left-right) is calculated. Based on these two events,
-                # directions (top-left,top-right,down-left,down-right) are calculated
-                # ******************************************************************************************************
-                # get last actions
-                _last_hat_vertical_action = controllers[_controller_number].get_last_hat_action(_hat, 'vertical')
-                _last_hat_horizontal_action = controllers[_controller_number].get_last_hat_action(_hat, 'horizontal')
-
-                # use event to find the mapping
-                # get action
-                if _key_vertical in controllers[_controller_number].mapping["hat"].keys():
-                    _action_vertical_happened = controllers[_controller_number].mapping["hat"][_key_vertical]["Function"]
-                    _action_happened = _action_horizontal_happened
-
-                if _key_horizontal in controllers[_controller_number].mapping["hat"].keys():
-                    _action_horizontal_happened = controllers[_controller_number].mapping["hat"][_key_horizontal]["Function"]
-                    _action_happened = _action_horizontal_happened
-
-                # trigger on_release events and clear direction bits
-                if _last_hat_vertical_action is not None and not _action_vertical_happened == _last_hat_vertical_action:
-                    # clear controller bits
-                    controllers[_controller_number].change_bits(Action.actions[_last_hat_vertical_action].value, False)
-
-                    # call on_released action
-                    Action.actions[_last_hat_vertical_action].on_released(controllers[_controller_number])
-                    controllers[_controller_number].set_last_hat_action(_hat, 'vertical')
-                if _last_hat_horizontal_action is not None and not _action_horizontal_happened == _last_hat_horizontal_action:
-                    # clear controller bits
-                    controllers[_controller_number].change_bits(Action.actions[_last_hat_horizontal_action].value, False)
-
-                    # call on_released action
-                    Action.actions[_last_hat_horizontal_action].on_released(controllers[_controller_number])
-                    controllers[_controller_number].set_last_hat_action(_hat, 'horizontal')
-
-                # trigger new action and set new direction
-                if _action_vertical_happened is not None and not _action_vertical_happened == _last_hat_vertical_action:
-                    # set controller bits
-                    controllers[_controller_number].change_bits(Action.actions[_action_vertical_happened].value, True)
-
-                    # call on_pressed action
-                    if Action.actions[_action_vertical_happened].on_pressed is not None:
-                        Action.actions[_action_vertical_happened].on_pressed(controllers[_controller_number])
-
-                    # set last hat action
-                    controllers[_controller_number].set_last_hat_action(_hat, 'vertical', _action_vertical_happened)
-                if _action_horizontal_happened is not None and not _action_horizontal_happened == _last_hat_horizontal_action:
-                    # set controller bits
-                    controllers[_controller_number].change_bits(Action.actions[_action_horizontal_happened].value, True)
-
-                    # call on_pressed action
-                    if Action.actions[_action_horizontal_happened].on_pressed is not None:
-                        Action.actions[_action_horizontal_happened].on_pressed(controllers[_controller_number])
-
-                    # set last hat action
-                    controllers[_controller_number].set_last_hat_action(_hat, 'horizontal', _action_horizontal_happened)
+        # use the compiled axis table to find the action of the side the axis is moved to (see _axis_code)
+        _entry = _controller._axis_actions.get(_axis * 2 + (_value > 0))
 
-    return _action_happened
+        if _entry is not None and (_value if _value > 0 else -_value) >= _entry[1]:
+            _action = _entry[0]
+            _action_happened = _action.action
 
+            # set controller bits
+            _controller.change_bits(_action.value, True)
 
-def get_action(event):
-    """
-    Set the controller bits.
-    Returns the action that was mapped to the event.
+            # if action has an callback function, call this callback function
+            _dispatch(_controller, _action, _action.on_pressed)
 
-    :param event:                       The pygame event
-    :type event                         pygame.Event
-    :return                             the action that happened
-    :rtype                              string
-    """
-    _action_happened = None
+            # save action as last axis action
+            _controller._last_axis_action[_axis] = _entry
 
-    if "joy" in event.dict:
-        _controller_number = event.dict["joy"]
+    elif _event_type == _joy_hat_motion:
+        _value_x, _value_y = event.dict["value"]
+        _hat = event.dict["hat"]
 
-        if controllers[_controller_number].mapping is not None:
-            if event.type == pygame.JOYBUTTONDOWN:
-                _button = str(event.dict["button"])
+        # 8 way movement
+        # detection of 8 directions and 8 actions (top,
+        # ******************************************************************************************************
+        # Todo: to detect real hat movement test if action is configured for 8 way movement.
 
-                # use event data to find the mapping
-                if _button in controllers[_controller_number].mapping["button"].keys():
-                    # get action
-                    _action_happened = controllers[_controller_number].mapping["button"][_button]["Function"]
+        # 4 way movement
+        # detection of 8 directions and 4 actions (left,right,top,down only)
+        # a action for the each direction (top-down, left-right) is calculated. Based on these two events,
+        # directions (top-left,top-right,down-left,down-right) are calculated
+        # ******************************************************************************************************
+        # get last actions
+        _last_actions = _controller._last_hat_action
+        _last_hat_vertical_action = _last_actions.get(_hat * 2)
+        _last_hat_horizontal_action = _last_actions.get(_hat * 2 + 1)
 
-                    # set controller bits
-                    controllers[_controller_number].change_bits(Action.actions[_action_happened].value, True)
+        # use the compiled hat table to find the actions (see _hat_code)
+        _action_vertical_happened = _controller._hat_actions.get(_hat * 9 + _value_x * 3 + 4)
+        _action_horizontal_happened = _controller._hat_actions.get(_hat * 9 + _value_y + 4)
 
-            elif event.type == pygame.JOYBUTTONUP:
-                _controller_number = event.dict["joy"]
-                _button = str(event.dict["button"])
+        if _action_horizontal_happened is not None:
+            _action_happened = _action_horizontal_happened.action
 
-                # use event data to find the mapping
-                if _button in controllers[_controller_number].mapping["button"].keys():
-                    # get action
-                    _action_happened = controllers[_controller_number].mapping["button"][_button]["Function"]
+        # trigger on_release events and clear direction bits
+        if _last_hat_vertical_action is not None and _action_vertical_happened is not _last_hat_vertical_action:
+            # clear controller bits
+            _controller.change_bits(_last_hat_vertical_action.value, False)
 
-                    # clear controller bits
-                    controllers[_controller_number].change_bits(Action.actions[_action_happened].value, False)
+            # call on_released action
+            _dispatch(_controller, _last_hat_vertical_action, _last_hat_vertical_action.on_released)
+            _last_actions[_hat * 2] = None
+        if _last_hat_horizontal_action is not None and _action_horizontal_happened is not _last_hat_horizontal_action:
+            # clear controller bits
+            _controller.change_bits(_last_hat_horizontal_action.value, False)
 
-                    _action_happened = None
+            # call on_released action
+            _dispatch(_controller, _last_hat_horizontal_action, _last_hat_horizontal_action.on_released)
+            _last_actions[_hat * 2 + 1] = None
 
-            elif event.type == pygame.JOYAXISMOTION:
-                _value = event.dict["value"]
-                _axis = str(event.dict["axis"])
-                _key_part = str(_axis) + ":"
-                _key = _key_part
+        # trigger new action and set new direction
+        if _action_vertical_happened is not None and _action_vertical_happened is not _last_hat_vertical_action:
+            # set controller bits
+            _controller.change_bits(_action_vertical_happened.value, True)
 
-                if _value <= -1 or _value >= 1:
-                    if _value > 0:
-                        _key += ">"
-                    else:
-                        _key += "<"
+            # call on_pressed action
+            _dispatch(_controller, _action_vertical_happened, _action_vertical_happened.on_pressed)
 
-                    # use event to find the mapping
-                    if _key in controllers[_controller_number].mapping["axis"].keys():
-                        # get action
-                        _action_happened = controllers[_controller_number].mapping["axis"][_key]["Function"]
+            # set last hat action
+            _last_actions[_hat * 2] = _action_vertical_happened
+        if _action_horizontal_happened is not None and _action_horizontal_happened is not _last_hat_horizontal_action:
+            # set controller bits
+            _controller.change_bits(_action_horizontal_happened.value, True)
 
-                        # set controller bits
-                        controllers[_controller_number].change_bits(Action.actions[_action_happened].value, True)
+            # call on_pressed action
+            _dispatch(_controller, _action_horizontal_happened, _action_horizontal_happened.on_pressed)
 
-                        # save action as last axis action
-                        controllers[_controller_number].set_last_axis_action(_axis, _action_happened)
-                else:
-                    if not controllers[_controller_number].get_last_axis_action(_axis) is None:
-                        # react on the center the axis event
-                        # get last axis action
-                        _action_happened = controllers[_controller_number].get_last_axis_action(_axis)
-
-                        # clear controller bits
-                        controllers[_controller_number].change_bits(Action.actions[_action_happened].value, False)
-
-                        # save action as last axis action
-                        controllers[_controller_number].set_last_axis_action(_axis)
-
-            elif event.type == pygame.JOYHATMOTION:
-                _value_x = event.dict["value"][0]
-                _value_y = event.dict["value"][1]
-                _hat = event.dict["hat"]
-                _key_vertical = str(_hat) + ":" + str(_value_x) + ":0"
-                _key_horizontal = str(_hat) + ":0:" + str(_value_y)
-                _action_vertical_happened = None
-                _action_horizontal_happened = None
-
-                # get last actions
-                _last_hat_vertical_action = controllers[_controller_number].get_last_hat_action(_hat, 'vertical')
-                _last_hat_horizontal_action = controllers[_controller_number].get_last_hat_action(_hat, 'horizontal')
-
-                # use event to find the mapping
-                # get action
-                if _key_vertical in controllers[_controller_number].mapping["hat"].keys():
-                    _action_vertical_happened = controllers[_controller_number].mapping["hat"][_key_vertical]["Function"]
-                    _action_happened = _action_vertical_happened
-
-                if _key_horizontal in controllers[_controller_number].mapping["hat"].keys():
-                    _action_horizontal_happened = controllers[_controller_number].mapping["hat"][_key_horizontal]["Function"]
-                    _action_happened = _action_horizontal_happened
-
-                # clear controller bits
-                if _last_hat_vertical_action is not None and not _action_vertical_happened == _last_hat_vertical_action:
-                    controllers[_controller_number].change_bits(Action.actions[_last_hat_vertical_action].value, False)
-                    controllers[_controller_number].set_last_hat_action(_hat, 'vertical')
-                if _last_hat_horizontal_action is not None and not _action_horizontal_happened == _last_hat_horizontal_action:
-                    controllers[_controller_number].change_bits(Action.actions[_last_hat_horizontal_action].value, False)
-                    controllers[_controller_number].set_last_hat_action(_hat, 'horizontal')
-
-                # set controller bits
-                if _action_vertical_happened is not None and not _action_vertical_happened == _last_hat_vertical_action:
-                    controllers[_controller_number].change_bits(Action.actions[_action_vertical_happened].value, True)
-                    controllers[_controller_number].set_last_hat_action(_hat, 'vertical', _action_vertical_happened)
-                if _action_horizontal_happened is not None and not _action_horizontal_happened == _last_hat_horizontal_action:
-                    controllers[_controller_number].change_bits(Action.actions[_action_horizontal_happened].value, True)
-                    controllers[_controller_number].set_last_hat_action(_hat, 'horizontal', _action_horizontal_happened)
+            # set last hat action
+            _last_actions[_hat * 2 + 1] = _action_horizontal_happened
 
     return _action_happened
 
 
-# wrapper routine for pygame.joystick.get_count()
-def get_count():
-    return controllers.__len__()
+def _get_action(_controller, event):
+    """
+    get_action for an event of a known controller
+
+    :param _controller:                 The controller that sent the event
+    :type _controller:                  steuer.Controller
+    :param event:                       The pygame event
+    :type event                         pygame.Event
+    :return                             the action that happened
+    :rtype                              string
+    """
+    _action_happened = None
+    _event_type = event.type
+
+    if _event_type == _joy_button_down:
+        # use the compiled button table to find the action
+        _action = _controller._button_actions.get(event.dict["button"])
+
+        if _action is not None:
+            _action_happened = _action.action
+
+            # set controller bits
+            _controller.change_bits(_action.value, True)
+
+    elif _event_type == _joy_button_up:
+        # use the compiled button table to find the action
+        _action = _controller._button_actions.get(event.dict["button"])
+
+        if _action is not None:
+            # clear controller bits
+            _controller.change_bits(_action.value, False)
+
+    elif _event_type == _joy_axis_motion:
+        _value = event.dict["value"]
+        _axis = event.dict["axis"]
+        _last_entry = _controller._last_axis_action.get(_axis)
+
+        if _last_entry is not None:
+            # the axis keeps its action until it falls below the release threshold on the side of the action.
+            # Events inside the hysteresis band are redundant (see Controller.compile_mapping)
+            if (_value if _last_entry[3] else -_value) >= _last_entry[2]:
+                return None
+
+            # release the last axis action
+            _action = _last_entry[0]
+            _action_happened = _action.action
+
+            # clear controller bits
+            _controller.change_bits(_action.value, False)
+
+            # save action as last axis action
+            _controller._last_axis_action[_axis] = None
+
+        # use the compiled axis table to find the action of the side the axis is moved to (see _axis_code)
+        _entry = _controller._axis_actions.get(_axis * 2 + (_value > 0))
+
+        if _entry is not None and (_value if _value > 0 else -_value) >= _entry[1]:
+            _action = _entry[0]
+            _action_happened = _action.action
+
+            # set controller bits
+            _controller.change_bits(_action.value, True)
+
+            # save action as last axis action
+            _controller._last_axis_action[_axis] = _entry
+
+    elif _event_type == _joy_hat_motion:
+        _value_x, _value_y = event.dict["value"]
+        _hat = event.dict["hat"]
+
+        # get last actions
+        _last_actions = _controller._last_hat_action
+        _last_hat_vertical_action = _last_actions.get(_hat * 2)
+        _last_hat_horizontal_action = _last_actions.get(_hat * 2 + 1)
+
+        # use the compiled hat table to find the actions (see _hat_code)
+        _action_vertical_happened = _controller._hat_actions.get(_hat * 9 + _value_x * 3 + 4)
+        _action_horizontal_happened = _controller._hat_actions.get(_hat * 9 + _value_y + 4)
+
+        if _action_horizontal_happened is not None:
+            _action_happened = _action_horizontal_happened.action
+        elif _action_vertical_happened is not None:
+            _action_happened = _action_vertical_happened.action
+
+        # clear controller bits
+        if _last_hat_vertical_action is not None and _action_vertical_happened is not _last_hat_vertical_action:
+            _controller.change_bits(_last_hat_vertical_action.value, False)
+            _last_actions[_hat * 2] = None
+        if _last_hat_horizontal_action is not None and _action_horizontal_happened is not _last_hat_horizontal_action:
+            _controller.change_bits(_last_hat_horizontal_action.value, False)
+            _last_actions[_hat * 2 + 1] = None
+
+        # set controller bits
+        if _action_vertical_happened is not None and _action_vertical_happened is not _last_hat_vertical_action:
+            _controller.change_bits(_action_vertical_happened.value, True)
+            _last_actions[_hat * 2] = _action_vertical_happened
+        if _action_horizontal_happened is not None and _action_horizontal_happened is not _last_hat_horizontal_action:
+            _controller.change_bits(_action_horizontal_happened.value, True)
+            _last_actions[_hat * 2 + 1] = _action_horizontal_happened
+
+    return _action_happened
+
+
+def compile_mapping_entries(mapping):
+    """
+    Compile a mapping of the mapping database into integer keyed entries, independent of the registered actions.
+    Buttons are keyed by the button number, axes by _axis_code and hats by _hat_code.
+    Axis entries carry the press and release thresholds of the mapping entry. The release threshold is
+    never above the press threshold, the difference is the hysteresis band of the axis.
+    Controller.compile_mapping binds the entries to the actions
+
+    :param mapping:                     The mapping
+    :type mapping:                      dict
+    :return:                            (button -> function, axis code -> (function, press, release, positive), hat code -> function)
+    :rtype:                             tuple
+    """
+    _buttons = {}
+    _axes = {}
+    _hats = {}
+
+    for _key, _entry in mapping["button"].items():
+        _buttons[int(_key)] = _entry["Function"]
+
+    for _key, _entry in mapping["axis"].items():
+        _axis, _direction = _key.split(":")
+        _press = float(_entry.get("Press", axis_press_threshold))
+        _release = float(_entry.get("Release", axis_release_threshold))
+
+        if _release > _press:
+            logger.warning("release threshold of axis %s is above the press threshold", _key)
+            _release = _press
+
+        _axes[_axis_code(int(_axis), _direction == ">")] = (_entry["Function"], _press, _release, _direction == ">")
+
+    for _key, _entry in mapping["hat"].items():
+        _hat, _value_x, _value_y = _key.split(":")
+        _hats[_hat_code(int(_hat), int(_value_x), int(_value_y))] = _entry["Function"]
+
+    return _buttons, _axes, _hats
+
+
+def _axis_code(axis, positive):
+    """
+    Calculate the key of an axis direction in the compiled axis table (Controller._axis_actions).
+    The dispatch functions inline this calculation as axis * 2 + (value > 0)
+
+    :param axis:                        The axis number
+    :type axis:                         int
+    :param positive:                    True for the ">" direction, False for the "<" direction
+    :type positive:                     bool
+    :return:                            The key of the axis direction
+    :rtype:                             int
+    """
+    return axis * 2 + (1 if positive else 0)
+
+
+def _hat_code(hat, value_x, value_y):
+    """
+    Calculate the key of a hat position in the compiled hat table (Controller._hat_actions).
+    The dispatch functions inline this calculation for the vertical (x, 0) and horizontal (0, y) positions
+
+    :param hat:                         The hat number
+    :type hat:                          int
+    :param value_x:                     The x value of the hat position (-1, 0 or 1)
+    :type value_x:                      int
+    :param value_y:                     The y value of the hat position (-1, 0 or 1)
+    :type value_y:                      int
+    :return:                            The key of the hat position
+    :rtype:                             int
+    """
+    return hat * 9 + (value_x + 1) * 3 + value_y + 1
+
+
+def _call_directions(controller, old_bits, new_bits):
+    """
+    Call the on_unheading and on_heading callback functions of the directions that changed between the old and the new bits.
+    The directions are looked up in the transition tables of the registered directions (see Action.build_direction_transitions)
+
+    :param controller:                  The controller the bits belong to
+    :type controller:                   steuer.Controller
+    :param old_bits:                    The bits before the event
+    :type old_bits:                     int
+    :param new_bits:                    The bits after the event
+    :type new_bits:                     int
+    """
+    for _shift, _transitions in Action.direction_transitions:
+        _transition = _transitions[((old_bits >> _shift) & 0b1111) << 4 | ((new_bits >> _shift) & 0b1111)]
+
+        if _transition is not None:
+            _unheading, _heading = _transition
+
+            if _unheading is not None:
+                _dispatch(controller, _unheading, _unheading.on_unheading)
+            if _heading is not None:
+                _dispatch(controller, _heading, _heading.on_heading)
+
+
+def begin_frame():
+    """
+    Mark a frame boundary. Snapshots the bits of all controllers, so Controller.pressed_mask, Controller.released_mask
+    and Controller.held_mask show the edges between this call and the moment they are read.
+    Call it once per frame before the events of the frame are processed.
+    An action that is pressed and released within one frame doesn't show up in the masks
+    """
+    for controller in controllers:
+        controller.begin_frame()
+
+
+def defer_callbacks(enabled=True, capacity=256):
+    """
+    Switch the deferred callback mode on or off.
+    In deferred mode the dispatch functions only record the on_pressed, on_released, on_heading and on_unheading
+    callbacks in steuer.callback_queue. The application runs them with run_callbacks.
+    Actions and directions with an own dispatcher are not affected
+
+    :param enabled:                     Switch the deferred mode on (True) or off (False)
+    :type enabled:                      bool
+    :param capacity:                    The number of callbacks per priority the queue has room for before it grows
+    :type capacity:                     int
+    """
+    global callback_queue
+
+    if enabled:
+        if callback_queue is None:
+            callback_queue = CallbackQueue(capacity)
+
+        Action.set_default_dispatcher(_instrument_dispatcher(callback_queue))
+        Direction.set_default_dispatcher(_instrument_dispatcher(callback_queue))
+    else:
+        # callbacks that are still queued can be run with run_callbacks
+        Action.set_default_dispatcher(_instrument_dispatcher(None))
+        Direction.set_default_dispatcher(_instrument_dispatcher(None))
+
+
+def run_callbacks(budget_ms=None):
+    """
+    Run the deferred callbacks. Callbacks of actions and directions with a higher priority run first,
+    callbacks with the same priority run in the order they were recorded.
+    If the time budget is used up, the remaining callbacks are left in the queue for the next call
+
+    :param budget_ms:                   The time budget in milliseconds. None runs all queued callbacks
+    :type budget_ms:                    float
+    :return:                            The number of callbacks left in the queue
+    :rtype:                             int
+    """
+    if callback_queue is None:
+        return 0
+
+    return callback_queue.run(budget_ms)
+
+
+def get_dispatcher(dispatch_policy, max_workers=4):
+    """
+    Get the dispatcher of a dispatch policy. Creates the callback queue or the thread dispatcher if needed
+
+    :param dispatch_policy:             DISPATCH_INLINE, DISPATCH_DEFERRED or DISPATCH_THREAD
+    :type dispatch_policy:              int
+    :param max_workers:                 The number of threads of the thread dispatcher, if it is created
+    :type max_workers:                  int
+    :return:                            The dispatcher. None for DISPATCH_INLINE
+    :rtype:                             steuer.CallbackQueue or steuer.ThreadDispatcher
+    """
+    global callback_queue, thread_dispatcher
+
+    if dispatch_policy == DISPATCH_DEFERRED:
+        if callback_queue is None:
+            callback_queue = CallbackQueue()
+        return callback_queue
+    elif dispatch_policy == DISPATCH_THREAD:
+        if thread_dispatcher is None:
+            thread_dispatcher = ThreadDispatcher(max_workers)
+            atexit.register(shutdown_callback_threads)
+        return thread_dispatcher
+    else:
+        return None
+
+
+def shutdown_callback_threads(wait=True):
+    """
+    Shut down the thread pool of the thread dispatcher. The pool is started again by the next off-thread callback
+
+    :param wait:                        Wait until the pending callbacks have run (True) or not (False)
+    :type wait:                         bool
+    """
+    if thread_dispatcher is not None:
+        thread_dispatcher.shutdown(wait)
+
+
+def enable_stats(enabled=True):
+    """
+    Switch the statistics on or off.
+    While the statistics are enabled, the dispatch functions count the events per controller and type, the unmapped
+    events and the presses and releases per action, and the run time of every dispatch and every callback is sorted
+    into a latency histogram. The dispatch functions and the dispatchers are replaced by instrumented versions while
+    the statistics are enabled, so the disabled statistics cost nothing.
+    The counters are kept when the statistics are switched off. Use reset_stats to clear them.
+    Samplers and action streams count as well, they look the dispatch functions up for every batch of events
+
+    :param enabled:                     Switch the statistics on (True) or off (False)
+    :type enabled:                      bool
+    """
+    global instrumentation, _get_action, _call_event, _call_event_and_direction
+
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+
+    if enabled == instrumentation.enabled:
+        return
+
+    if enabled:
+        instrumentation.enabled = True
+        instrumentation.originals = (_get_action, _call_event, _call_event_and_direction)
+
+        _get_action = instrumentation.instrument(_get_action, "get_action")
+        _call_event = instrumentation.instrument(_call_event, "call_event")
+        _call_event_and_direction = instrumentation.instrument(_call_event_and_direction, "call_event_and_direction")
+    else:
+        instrumentation.enabled = False
+        _get_action, _call_event, _call_event_and_direction = instrumentation.originals
+        instrumentation.originals = None
+
+    # wrap or unwrap the dispatchers of all actions and directions
+    for _owner_class in (Action, Direction):
+        _dispatcher = _owner_class.default_dispatcher
+        if isinstance(_dispatcher, InstrumentedDispatcher):
+            _dispatcher = _dispatcher.dispatcher
+        _owner_class.set_default_dispatcher(_instrument_dispatcher(_dispatcher))
+
+    for _owner in list(Action.actions.values()) + list(Action.directions.values()):
+        if _owner.dispatch_policy is not None:
+            _owner.set_dispatch_policy(_owner.dispatch_policy)
+
+
+def stats():
+    """
+    Get a snapshot of the statistics. See enable_stats
+
+    :return:                            enabled, since (time of the last reset), controllers (player slot -> event counts
+                                        and unmapped events), actions (action name -> pressed and released counts),
+                                        dispatch and callbacks (name -> latency histogram)
+    :rtype:                             dict
+    """
+    if instrumentation is None:
+        return Instrumentation().snapshot()
+
+    return instrumentation.snapshot()
+
+
+def reset_stats():
+    """
+    Clear the counters and latency histograms of the statistics
+    """
+    if instrumentation is not None:
+        instrumentation.reset()
+
+
+def _instrument_dispatcher(dispatcher):
+    """
+    Wrap a dispatcher into an InstrumentedDispatcher if the statistics are enabled
+
+    :param dispatcher:                  The dispatcher. None calls the callbacks inline
+    :type dispatcher:                   steuer.CallbackQueue or steuer.ThreadDispatcher
+    :return:                            The instrumented dispatcher or the dispatcher itself if the statistics are disabled
+    :rtype:                             steuer.InstrumentedDispatcher or steuer.CallbackQueue or steuer.ThreadDispatcher
+    """
+    if instrumentation is not None and instrumentation.enabled:
+        return InstrumentedDispatcher(dispatcher, instrumentation)
+
+    return dispatcher
+
+
+# wrapper routine for pygame.joystick.get_count()
+def get_count():
+    return controllers.__len__()
+
+
+# the result of process_events. Maps the player slot to the bits of the pressed and released actions
+# =====================================================================
+class FrameResult(dict):
+    def __init__(self):
+        """
+        Constructor.
+        """
+        dict.__init__(self)
+
+        self.dropped_events = 0     # the number of events dropped by coalescing
 
 
 # class that represent the MappingDB. The MappingDB is a collection
 # of mapped controller types. Mapping and controller type is a synonym
 # =====================================================================
 class MappingDB(object):
-    def __init__(self, database_name, filename, mappingdb_path, is_in_working_dir):
+    # class variables
+    # *****************************************************************
+    cache_schema = 1    # version of the layout of the cache file. Caches of other versions are rebuilt
+
+    def __init__(self, database_name, filename, mappingdb_path, is_in_working_dir, use_journal=False, use_cache=False, use_lazy_loading=False,
+                 compaction_threshold=1000, lru_size=16):
         """
         Construct.
-        Set the path to the mapping database. And load the mapping database
+        Set the path to the mapping database. And load the mapping database.
+        In journal mode new mappings are appended as single records to a journal file next to the database file
+        (<filename>.journal) instead of rewriting the whole database. When the journal has more records than the
+        compaction threshold, the database file is rewritten on a background thread and the journal starts over.
+        In cache mode the parsed and compiled mappings are kept in a binary cache file (<filename>.cache). The cache is
+        used as long as the path, modification time and size of the database and journal files and the cache schema match,
+        otherwise the database is parsed again and the cache is rewritten.
+        In lazy mode only an index of the controller names and the positions of their mappings in the database file
+        is built at load. A mapping is decoded when it is asked for and kept in a small LRU (see LazyMappings).
+        The cache is not used in lazy mode
 
         :param database_name:           The alias of the mapping database. 'default' is the default mapping database
         :type database_name:            string
@@ -652,6 +1474,16 @@ class MappingDB(object):
         :type filename:                 string
         :param is_in_working_dir:       Flag if the mapping path starts in the working dir (True) or not (False)
         :type is_in_working_dir:        bool
+        :param use_journal:             Flag if new mappings are appended to the journal (True) or the database is rewritten (False)
+        :type use_journal:              bool
+        :param use_cache:               Flag if the binary cache file is used (True) or not (False)
+        :type use_cache:                bool
+        :param use_lazy_loading:        Flag if the mappings are decoded on demand (True) or at load (False)
+        :type use_lazy_loading:         bool
+        :param compaction_threshold:    The number of journal records that triggers a compaction
+        :type compaction_threshold:     int
+        :param lru_size:                The number of decoded mappings that are kept in lazy mode
+        :type lru_size:                 int
         """
         # @formatter:off
         self.database_name = database_name                  # alias of the database.
@@ -659,11 +1491,52 @@ class MappingDB(object):
         self.mappings = {}                                  # the mappings in the database
         self.filename = filename                            # the name of the database file
         self.found_database = False                         # flag that show if the database was found (True) in the filesystem or not (False)
+        self.use_journal = use_journal                      # flag that shows if new mappings are appended to the journal
+        self.use_cache = use_cache and not use_lazy_loading # flag that shows if the binary cache file is used
+        self.use_lazy_loading = use_lazy_loading            # flag that shows if the mappings are decoded on demand
+        self.lru_size = lru_size                            # the number of decoded mappings that are kept in lazy mode
+        self.compiled = {}                                  # controller name -> mapping compiled by compile_mapping_entries
+        self.gamecontrollerdb = None                        # the imported SDL GameControllerDB. Used for controllers that are not in the database
+        self.listeners = []                                 # functions that are called with the database and the controller name after a
+                                                            # mapping changed. The name is None if all mappings changed. Used by LayeredMappingDB
+        self.compaction_threshold = compaction_threshold    # the number of journal records that triggers a compaction
+        self.journal_records = 0                            # the number of records in the journal
+        self._journal = None                                # the journal file. Opened by the first record
+        self._lock = threading.Lock()                       # guards the journal file and the compaction
+        self._write_lock = threading.Lock()                 # guards the writing of the database file. Taken before _lock
+        self._compaction = None                             # the thread of a running compaction
         self.set_path(mappingdb_path, is_in_working_dir)
         # @formatter:on
 
         self.load()
 
+    @property
+    def journal_path(self):
+        """
+        The path of the journal file
+
+        :rtype:                         string
+        """
+        return self.path + ".journal"
+
+    @property
+    def cache_path(self):
+        """
+        The path of the binary cache file
+
+        :rtype:                         string
+        """
+        return self.path + ".cache"
+
+    @property
+    def _compacting_path(self):
+        """
+        The path of the journal while it is compacted into the database file
+
+        :rtype:                         string
+        """
+        return self.path + ".journal.compacting"
+
     def set_path(self, mappingdb_path, is_in_working_dir):
         """
         set the path to the mapping database
@@ -682,26 +1555,237 @@ class MappingDB(object):
 
     def load(self):
         """
-        loads the mapping database. If no mapping database is found, the mappings are an empty dict
+        loads the mapping database. If no mapping database is found, the mappings are an empty dict.
+        The records of the journal are replayed over the loaded mappings, also when the database isn't in journal mode
+        """
+        self._load_mappings()
+        self._notify_listeners(None)
+
+    def _notify_listeners(self, name):
+        """
+        Call the listeners of the database after a mapping changed
+
+        :param name:                    The name of the controller type whose mapping changed. None if all mappings changed
+        :type name:                     string
+        """
+        for _listener in self.listeners:
+            _listener(self, name)
+
+    def _load_mappings(self):
+        """
+        Load the mappings from the cache or the database and journal files
         """
+        self.compiled = {}
+
+        if self.use_cache:
+            _cache_key = self._get_cache_key()
+            if self._load_cache(_cache_key):
+                return
+
         if os.path.isfile(self.path):
-            self.mappings = json.load(open(self.path))
+            if self.use_lazy_loading:
+                self.mappings = LazyMappings(self.path, self.lru_size)
+            else:
+                with open(self.path) as _file:
+                    self.mappings = json.load(_file)
             logger.info("Steuer mapping database found and loaded")
             self.found_database = True
         else:
             self.mappings = {}
+
+        # a journal that was left over by an interrupted compaction is older than the journal
+        self.journal_records = 0
+        for _path in (self._compacting_path, self.journal_path):
+            _records = self._replay_journal(_path)
+            if _path == self.journal_path:
+                self.journal_records = _records
+
+        if not self.found_database:
             logger.warning("No mapping database found")
 
+        if self.use_cache:
+            self._save_cache(_cache_key)
+
+    def _get_cache_key(self):
+        """
+        Get the key that validates the cache file: the cache schema, the marshal and python version, the path
+        of the database file and the modification time and size of the database and journal files
+
+        :return:                        The key
+        :rtype:                         tuple
+        """
+        _key = [self.cache_schema, marshal.version, tuple(sys.version_info[:2]), os.path.abspath(self.path)]
+
+        for _path in (self.path, self._compacting_path, self.journal_path):
+            try:
+                _stat = os.stat(_path)
+                _key.append((_stat.st_mtime_ns, _stat.st_size))
+            except OSError:
+                _key.append(None)
+
+        return tuple(_key)
+
+    def _load_cache(self, key):
+        """
+        Load the mappings from the cache file if it matches the key
+
+        :param key:                     The key of the current database and journal files
+        :type key:                      tuple
+        :return:                        True if the cache was loaded
+        :rtype:                         bool
+        """
+        if not os.path.isfile(self.cache_path):
+            return False
+
+        try:
+            with open(self.cache_path, 'rb') as _file:
+                _cache = marshal.load(_file)
+        except (EOFError, ValueError, TypeError, OSError):
+            logger.warning("mapping cache %s is unreadable", self.cache_path)
+            return False
+
+        if not isinstance(_cache, dict) or _cache.get("key") != key:
+            logger.debug("mapping cache %s is stale", self.cache_path)
+            return False
+
+        self.mappings = _cache["mappings"]
+        self.compiled = _cache["compiled"]
+        self.journal_records = _cache["journal_records"]
+        self.found_database = _cache["found_database"]
+        logger.info("Steuer mapping database loaded from cache")
+
+        return True
+
+    def _save_cache(self, key):
+        """
+        Write the mappings and the compiled mappings to the cache file
+
+        :param key:                     The key of the database and journal files the mappings were loaded from
+        :type key:                      tuple
+        """
+        try:
+            for _name, _mapping in self.mappings.items():
+                if _name not in self.compiled:
+                    self.compiled[_name] = compile_mapping_entries(_mapping)
+
+            _cache = {
+                "key": key,
+                "mappings": self.mappings,
+                "compiled": self.compiled,
+                "journal_records": self.journal_records,
+                "found_database": self.found_database
+            }
+
+            _temporary_path = self.cache_path + ".tmp"
+            with open(_temporary_path, 'wb') as _file:
+                marshal.dump(_cache, _file)
+            os.replace(_temporary_path, self.cache_path)
+        except (KeyError, ValueError, OSError):
+            logger.warning("mapping cache %s not written", self.cache_path, exc_info=True)
+
+    def get_compiled_mapping(self, name):
+        """
+        Get the mapping of a controller type compiled by compile_mapping_entries
+
+        :param name:                    The name of the controller type
+        :type name:                     string
+        :return:                        The compiled mapping or None if the controller type has no mapping
+        :rtype:                         tuple
+        """
+        _compiled = self.compiled.get(name)
+
+        if _compiled is None and name in self.mappings:
+            _compiled = self.compiled[name] = compile_mapping_entries(self.mappings[name])
+
+        return _compiled
+
+    def _replay_journal(self, path):
+        """
+        Apply the records of a journal file to the mappings
+
+        :param path:                    The path of the journal file
+        :type path:                     string
+        :return:                        The number of records
+        :rtype:                         int
+        """
+        if not os.path.isfile(path):
+            return 0
+
+        _records = 0
+
+        with open(path) as _file:
+            for _line in _file:
+                try:
+                    _record = json.loads(_line)
+                except ValueError:
+                    # the last record of a journal can be cut off by a crash. It was never acknowledged
+                    logger.warning("incomplete record in mapping journal %s skipped", path)
+                    continue
+
+                self.mappings[_record["name"]] = _record["mapping"]
+                _records += 1
+
+        if _records:
+            self.found_database = True
+
+        return _records
+
     def save(self):
         """
-        write the complete mapping library to a json file
+        write the complete mapping library to a json file.
+        The file is replaced atomically. The written file contains the records of the journals, so the journals are removed,
+        also when the database isn't in journal mode
         """
-        with open(self.path, 'w') as outfile:
-            json.dump(self.mappings, outfile)
-        outfile.close()
+        # a running compaction writes an older state of the mappings
+        self._wait_for_compaction()
+
+        with self._write_lock, self._lock:
+            self._write_database(self.mappings)
+
+            self._close_journal()
+            for _path in (self._compacting_path, self.journal_path):
+                if os.path.isfile(_path):
+                    os.remove(_path)
+            self.journal_records = 0
 
         logger.info("mapping file written to: %s", self.path)
 
+    def _wait_for_compaction(self):
+        """
+        Wait until no compaction is running
+        """
+        while True:
+            with self._lock:
+                _compaction = self._compaction
+
+            if _compaction is None:
+                return
+
+            _compaction.join()
+
+    def _write_database(self, mappings):
+        """
+        Write mappings to a temporary file and replace the database file with it. The caller holds _write_lock
+
+        :param mappings:                The mappings
+        :type mappings:                 dict
+        """
+        _temporary_path = self.path + ".tmp"
+
+        with open(_temporary_path, 'w') as outfile:
+            if isinstance(mappings, LazyMappings):
+                mappings.dump(outfile)
+            else:
+                json.dump(mappings, outfile)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+
+        if isinstance(self.mappings, LazyMappings):
+            # the positions of the index change with the file
+            self.mappings.replace_source(_temporary_path, mappings is self.mappings)
+        else:
+            os.replace(_temporary_path, self.path)
+
     def add_mapping(self, controller):
         """
         save the mapping of the controller to the database
@@ -714,77 +1798,614 @@ class MappingDB(object):
         logger.debug("new mapping configured for controller type:%s", controller.name)
 
         self.mappings.update(_new_mapping)
-        self.save()
+        self.compiled.pop(controller.name, None)
 
-    def get_mapping_by_controller(self, controller):
-        """
-        Find a mapping by the name of the controller in the mapping database.
-        If no mapping was found, the return is None
+        if self.use_journal:
+            self.append(controller.name, controller.mapping)
+        else:
+            self.save()
 
-        :param controller:              The controller to find
-        :type controller:               steuer.Controller
-        :return:                        Mapping from the mapping database which key match the name of the controller.
-        :rtype:                         dict
+        self._notify_listeners(controller.name)
 
+    def append(self, name, mapping):
         """
-        if controller.name in mapping_databases[self.database_name].mappings.keys():
-            logger.info("controller %s:%s was found in mapping db and was configured", str(controller.number), controller.name)
-            return mapping_databases[self.database_name].mappings[controller.name]
-        else:
-            logger.info("controller %s was not found in mapping db", controller.name)
-            return None
+        Append a mapping record to the journal and flush it to the disk.
+        Starts a compaction if the journal has more records than the compaction threshold
 
+        :param name:                    The name of the controller type
+        :type name:                     string
+        :param mapping:                 The mapping
+        :type mapping:                  dict
+        """
+        _record = json.dumps({"name": name, "mapping": mapping}) + "\n"
 
-# class that handle the configuration of an undetected controller
-class Configuration(object):
-    # Class attributes
-    # *****************************************************************
-    # controllers that could not be detected and later have to be configured
-    undetected_controllers = []
+        with self._lock:
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a')
 
-    # Stages events
-    # --------------------------------------------------------------------------
-    # detection of controllers finished. All controllers where a mapping exists are mapped.
-    on_detection_finished = None
+            self._journal.write(_record)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self.journal_records += 1
 
-    # Mapping events
-    # -----------------------------------------------------------------
-    # controller was not found in the mapping database
-    on_mapping_not_found = None
+            _compact = self.journal_records > self.compaction_threshold and self._compaction is None
 
-    # Configuration mapping events
-    # -----------------------------------------------------------------
-    # Event that is triggered when a controller is selected to be configured
-    on_mapping_configuration_init = None
+        logger.debug("mapping of controller type %s appended to %s", name, self.journal_path)
 
-    #  Event that is triggered when all actions are configured for a mapping
-    on_mapping_configuration_finished = None
+        if _compact:
+            self.compact(wait=False)
 
-    # Configuration events
-    # -----------------------------------------------------------------
-    #  Event that is triggered when a new controller is selected to be configured
-    on_start_configuration = None
+    def compact(self, wait=True):
+        """
+        Rewrite the database file with all mappings and start a new journal.
+        The journal is moved aside first, so new records go to a new journal while the database file is written.
+        A compaction that is interrupted is completed by the next load.
+        If a compaction is already running, a waiting call waits for it and compacts the records that were appended
+        since it started, a background call leaves them to the next compaction
+
+        :param wait:                    Wait for the compaction (True) or run it on a background thread (False)
+        :type wait:                     bool
+        """
+        while True:
+            with self._lock:
+                if self._compaction is None:
+                    self._close_journal()
+
+                    if os.path.isfile(self.journal_path):
+                        if os.path.isfile(self._compacting_path):
+                            # a failed compaction left its journal behind. Its records stay in front of the new ones
+                            self._append_file(self.journal_path, self._compacting_path)
+                            os.remove(self.journal_path)
+                        else:
+                            os.replace(self.journal_path, self._compacting_path)
+                    self.journal_records = 0
 
-    # Event that is triggered when all controllers that have to be configured are configured
-    on_configuration_finished = None
+                    _compaction = self._compaction = threading.Thread(target=self._compact, args=(self._copy_mappings(),),
+                                                                      name="steuer-compaction")
+                    _compaction.start()
+                    break
 
-    # Class functions
-    # *****************************************************************
-    @classmethod
-    def detect_connected_controllers(cls, database):
+                _compaction = self._compaction
+
+            if not wait:
+                return
+
+            # wait for the running compaction, then compact the records that were appended since it started
+            _compaction.join()
+
+        if wait:
+            _compaction.join()
+
+    def _compact(self, mappings):
         """
-        Scan all connected controllers and try to get the mapping of the controller from the mapping database.
-        If a mapping was found, the mapping of the controller is filled,
-        If no mapping was found, the mapping of the controller is empty and the controller is saved in the unmapped controllers list
-        Triggers the "on_detection_finished" event
+        Compaction thread. Writes the database file and removes the journal that was moved aside
 
-        :param database:                the database to search in for the controllers
-        :type database:                 steuer.MappingDB
+        :param mappings:                The mappings at the start of the compaction
+        :type mappings:                 dict
         """
-        for controller in controllers:
-            # Try to find the controller by its name in the library
-            # --------------------------------------------------------------
-            _mapping = database.get_mapping_by_controller(controller)
+        try:
+            with self._write_lock:
+                self._write_database(mappings)
+
+                if os.path.isfile(self._compacting_path):
+                    os.remove(self._compacting_path)
+
+            logger.info("mapping journal compacted into: %s", self.path)
+        except (IOError, OSError):
+            logger.exception("compaction of mapping database %s failed", self.path)
+        finally:
+            with self._lock:
+                self._compaction = None
+
+    def _copy_mappings(self):
+        """
+        Copy the mappings for a compaction. Lazy mappings are copied without decoding them
+
+        :return:                        The copy
+        :rtype:                         dict or steuer.LazyMappings
+        """
+        if isinstance(self.mappings, LazyMappings):
+            return self.mappings.snapshot()
+
+        return dict(self.mappings)
+
+    @staticmethod
+    def _append_file(source_path, target_path):
+        """
+        Append the records of a journal file to another journal file
+
+        :param source_path:             The path of the journal file to append
+        :type source_path:              string
+        :param target_path:             The path of the journal file that is appended to
+        :type target_path:              string
+        """
+        with open(target_path, 'rb+') as _target, open(source_path, 'rb') as _source:
+            _target.seek(0, os.SEEK_END)
+
+            # complete a record that was cut off, so it can't swallow the first appended record
+            if _target.tell() > 0:
+                _target.seek(_target.tell() - 1)
+                if _target.read(1) != b"\n":
+                    _target.write(b"\n")
+
+            _target.write(_source.read())
+            _target.flush()
+            os.fsync(_target.fileno())
+
+    def _close_journal(self):
+        """
+        Close the journal file. The next record opens it again
+        """
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def import_gamecontrollerdb(self, path, platform=None):
+        """
+        Import the mappings of a SDL gamecontrollerdb.txt file. The imported mappings are indexed by GUID and normalized name
+        and used for the controllers that are not in the mapping database. They are not written to the mapping database
+
+        :param path:                    The path of the gamecontrollerdb.txt file
+        :type path:                     string
+        :param platform:                The platform whose mappings are imported. None imports the mappings of the current platform
+        :type platform:                 string
+        :return:                        The number of imported mappings
+        :rtype:                         int
+        """
+        from . import gamecontrollerdb
+
+        if self.gamecontrollerdb is None:
+            self.gamecontrollerdb = gamecontrollerdb.GameControllerDB(platform=platform)
+
+        _imported = self.gamecontrollerdb.load(path)
+        logger.info("%s mappings imported from %s", _imported, path)
+
+        return _imported
+
+    def get_mapping_by_controller(self, controller):
+        """
+        Find a mapping by the name of the controller in the mapping database.
+        Controllers that are not in the mapping database are looked up by GUID and name in the imported SDL GameControllerDB.
+        If no mapping was found, the return is None
+
+        :param controller:              The controller to find
+        :type controller:               steuer.Controller
+        :return:                        Mapping from the mapping database which key match the name of the controller.
+        :rtype:                         dict
+
+        """
+        if controller.name in self.mappings:
+            logger.info("controller %s:%s was found in mapping db and was configured", controller.number, controller.name)
+            return self.mappings[controller.name]
+
+        if self.gamecontrollerdb is not None:
+            _entry = self.gamecontrollerdb.find(controller.guid, controller.name)
+            if _entry is not None:
+                logger.info("controller %s:%s was found in the SDL GameControllerDB as %s", controller.number, controller.name, _entry[0])
+                return _entry[1]
+
+        logger.info("controller %s was not found in mapping db", controller.name)
+        return None
+
+
+# class of the mappings of a mapping database in lazy mode. Only an index of the controller names and the
+# byte spans of their mappings in the database file is kept. Mappings are decoded on demand and kept in a LRU.
+# Added or changed mappings are kept in memory until they are written to the database file
+# =====================================================================
+class LazyMappings(MutableMapping):
+    # @formatter:off
+    _string = re.compile(br'"(?:[^"\\]|\\.)*"')             # a json string
+    _token = re.compile(br'"(?:[^"\\]|\\.)*"|[{}\[\]]')     # a json string or bracket
+    _whitespace = re.compile(br'\s*')                          # json whitespace
+    # @formatter:on
+
+    def __init__(self, path, lru_size=16, lock=None):
+        """
+        Constructor. Builds the index of the database file
+
+        :param path:                    The path of the database file
+        :type path:                     string
+        :param lru_size:                The number of decoded mappings that are kept
+        :type lru_size:                 int
+        :param lock:                    The lock that guards the database file. Shared by snapshots
+        :type lock:                     threading.Lock
+        """
+        # @formatter:off
+        self.path = path                                    # the path of the database file
+        self.lru_size = lru_size                            # the number of decoded mappings that are kept
+        self.index = {}                                     # controller name -> (offset, length) of the mapping in the database file
+        self.changed = {}                                   # controller name -> mapping that was added or changed since the index was built
+        self._decoded = OrderedDict()                       # LRU of the decoded mappings: controller name -> mapping
+        self._lock = lock if lock is not None else threading.RLock()  # guards the database file and the index
+        # @formatter:on
+
+        if lock is None:
+            self.index = self._build_index(path)
+
+    @classmethod
+    def _build_index(cls, path):
+        """
+        Scan the top level object of a database file for the controller names and the byte spans of their mappings.
+        Only the names are decoded
+
+        :param path:                    The path of the database file
+        :type path:                     string
+        :return:                        controller name -> (offset, length)
+        :rtype:                         dict
+        """
+        _index = {}
+
+        with open(path, 'rb') as _file:
+            if os.fstat(_file.fileno()).st_size == 0:
+                raise ValueError("mapping database {0} is empty".format(path))
+
+            _map = mmap.mmap(_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            _position = cls._skip(_map, 0, b"{")
+
+            while True:
+                _position = cls._whitespace.match(_map, _position).end()
+                if _map[_position:_position + 1] == b"}":
+                    break
+
+                _name_match = cls._string.match(_map, _position)
+                if _name_match is None:
+                    raise ValueError("controller name expected at byte {0} of {1}".format(_position, path))
+                _name = json.loads(_name_match.group().decode("utf-8"))
+
+                _start = cls._skip(_map, _name_match.end(), b":")
+                _start = cls._whitespace.match(_map, _start).end()
+                if _map[_start:_start + 1] != b"{":
+                    raise ValueError("mapping expected at byte {0} of {1}".format(_start, path))
+
+                # find the bracket that closes the mapping. Brackets inside of strings are skipped
+                _depth = 0
+                for _token_match in cls._token.finditer(_map, _start):
+                    _token = _token_match.group()
+                    if _token == b"{" or _token == b"[":
+                        _depth += 1
+                    elif _token == b"}" or _token == b"]":
+                        _depth -= 1
+                        if _depth == 0:
+                            break
+                else:
+                    raise ValueError("mapping of {0} is not closed in {1}".format(_name, path))
+
+                _index[_name] = (_start, _token_match.end() - _start)
+
+                _position = cls._whitespace.match(_map, _token_match.end()).end()
+                if _map[_position:_position + 1] == b",":
+                    _position += 1
+        finally:
+            _map.close()
+
+        return _index
+
+    @classmethod
+    def _skip(cls, data, position, expected):
+        """
+        Skip whitespace and an expected character
+
+        :return:                        The position after the character
+        :rtype:                         int
+        """
+        _position = cls._whitespace.match(data, position).end()
+
+        if data[_position:_position + 1] != expected:
+            raise ValueError("{0} expected at byte {1}".format(expected.decode("ascii"), _position))
+
+        return _position + 1
+
+    def _read(self, name):
+        """
+        Read the json of a mapping from the database file
+
+        :param name:                    The controller name
+        :type name:                     string
+        :return:                        The json of the mapping
+        :rtype:                         string
+        """
+        with self._lock:
+            _offset, _length = self.index[name]
+
+            with open(self.path, 'rb') as _file:
+                _file.seek(_offset)
+                return _file.read(_length).decode("utf-8")
+
+    def __getitem__(self, name):
+        _mapping = self.changed.get(name)
+        if _mapping is not None:
+            return _mapping
+
+        _mapping = self._decoded.get(name)
+        if _mapping is not None:
+            self._decoded.move_to_end(name)
+            return _mapping
+
+        _mapping = json.loads(self._read(name))
+
+        self._decoded[name] = _mapping
+        if len(self._decoded) > self.lru_size:
+            self._decoded.popitem(last=False)
+
+        return _mapping
+
+    def __setitem__(self, name, mapping):
+        self.changed[name] = mapping
+        self._decoded.pop(name, None)
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+
+        self.changed.pop(name, None)
+        self._decoded.pop(name, None)
+        self.index.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self.changed or name in self.index
+
+    def __iter__(self):
+        for _name in self.index:
+            if _name not in self.changed:
+                yield _name
+        for _name in self.changed:
+            yield _name
+
+    def __len__(self):
+        return len(self.index) + sum(1 for _name in self.changed if _name not in self.index)
+
+    def snapshot(self):
+        """
+        Copy the index and the changed mappings. The copy reads from the same database file
+
+        :return:                        The copy
+        :rtype:                         steuer.LazyMappings
+        """
+        _snapshot = LazyMappings(self.path, self.lru_size, self._lock)
+        _snapshot.index = dict(self.index)
+        _snapshot.changed = dict(self.changed)
+
+        return _snapshot
+
+    def dump(self, file):
+        """
+        Write the mappings as json object. Mappings that didn't change are copied from the database file without decoding them
+
+        :param file:                    The text file to write to
+        :type file:                     file
+        """
+        file.write("{")
+        _separator = ""
+
+        for _name in self:
+            file.write(_separator)
+            file.write(json.dumps(_name))
+            file.write(": ")
+            if _name in self.changed:
+                json.dump(self.changed[_name], file)
+            else:
+                file.write(self._read(_name))
+            _separator = ", "
+
+        file.write("}")
+
+    def replace_source(self, path, is_complete=False):
+        """
+        Replace the database file with a new file and index it again.
+        The changed mappings stay in memory, unless the new file was written from these mappings (is_complete=True),
+        because a compaction writes a snapshot and the mappings can change while it is written
+
+        :param path:                    The path of the new file
+        :type path:                     string
+        :param is_complete:             Flag if the new file holds the current changed mappings (True) or not (False)
+        :type is_complete:              bool
+        """
+        with self._lock:
+            os.replace(path, self.path)
+            self.index = self._build_index(self.path)
+
+            if is_complete:
+                self.changed = {}
+                self._decoded.clear()
+
+
+# class that stacks mapping databases. A mapping of a layer overrides the mappings of the layers below it.
+# A merged index maps every controller name to the layer that provides its mapping, so a lookup is one
+# hash probe. The index is updated when a layer changes. Register it like a mapping database:
+#
+#   steuer.mapping_databases['default'] = steuer.LayeredMappingDB('default', [system_db, site_db, user_db])
+# =====================================================================
+class LayeredMappingDB(object):
+    def __init__(self, database_name, layers, writable_layer=None):
+        """
+        Constructor. Builds the merged index
+
+        :param database_name:           The alias of the layered database
+        :type database_name:            string
+        :param layers:                  The mapping databases, lowest precedence first
+        :type layers:                   list
+        :param writable_layer:          The layer new mappings are saved to. None saves them to the layer with the highest precedence
+        :type writable_layer:           steuer.MappingDB
+        """
+        # @formatter:off
+        self.database_name = database_name                                      # alias of the database
+        self.layers = list(layers)                                              # the mapping databases, lowest precedence first
+        self.writable_layer = writable_layer if writable_layer is not None else self.layers[-1]  # the layer new mappings are saved to
+        self.index = {}                                                         # controller name -> the layer that provides the mapping
+        # @formatter:on
+
+        for _layer in self.layers:
+            _layer.listeners.append(self._on_layer_changed)
+            self._on_layer_changed(_layer, None)
+
+    @property
+    def found_database(self):
+        """
+        Flag that shows if at least one layer was found in the filesystem
+
+        :rtype:                         bool
+        """
+        return any(_layer.found_database for _layer in self.layers)
+
+    def close(self):
+        """
+        Stop following the changes of the layers
+        """
+        for _layer in self.layers:
+            if self._on_layer_changed in _layer.listeners:
+                _layer.listeners.remove(self._on_layer_changed)
+
+    def _on_layer_changed(self, layer, name):
+        """
+        Update the merged index after a mapping of a layer changed
+
+        :param layer:                   The layer that changed
+        :type layer:                    steuer.MappingDB
+        :param name:                    The name of the controller type whose mapping changed. None if all mappings changed
+        :type name:                     string
+        """
+        if name is not None:
+            self._update_index(name)
+        else:
+            # the names of the layer and the names the layer provided before it changed
+            for _name in set(layer.mappings) | set(_name for _name, _layer in self.index.items() if _layer is layer):
+                self._update_index(_name)
+
+    def _update_index(self, name):
+        """
+        Point the index entry of a controller name to the layer with the highest precedence that has a mapping for it
+
+        :param name:                    The name of the controller type
+        :type name:                     string
+        """
+        for _layer in reversed(self.layers):
+            if name in _layer.mappings:
+                self.index[name] = _layer
+                return
+
+        self.index.pop(name, None)
+
+    def get_layer(self, name):
+        """
+        Get the layer that provides the mapping of a controller type
+
+        :param name:                    The name of the controller type
+        :type name:                     string
+        :return:                        The layer or None if no layer has a mapping for the controller type
+        :rtype:                         steuer.MappingDB
+        """
+        return self.index.get(name)
+
+    def get_mapping_by_controller(self, controller):
+        """
+        Find a mapping by the name of the controller in the merged index.
+        Controllers that are in no layer are looked up in the imported SDL GameControllerDBs of the layers, highest precedence first.
+        If no mapping was found, the return is None
+
+        :param controller:              The controller to find
+        :type controller:               steuer.Controller
+        :return:                        The mapping
+        :rtype:                         dict
+        """
+        _layer = self.index.get(controller.name)
+
+        if _layer is not None:
+            logger.info("controller %s:%s was found in mapping db %s", controller.number, controller.name, _layer.database_name)
+            return _layer.mappings[controller.name]
+
+        for _layer in reversed(self.layers):
+            if _layer.gamecontrollerdb is not None:
+                _mapping = _layer.get_mapping_by_controller(controller)
+                if _mapping is not None:
+                    return _mapping
+
+        logger.info("controller %s was not found in mapping db", controller.name)
+        return None
+
+    def get_compiled_mapping(self, name):
+        """
+        Get the mapping of a controller type compiled by compile_mapping_entries
+
+        :param name:                    The name of the controller type
+        :type name:                     string
+        :return:                        The compiled mapping or None if no layer has a mapping for the controller type
+        :rtype:                         tuple
+        """
+        _layer = self.index.get(name)
+
+        if _layer is None:
+            return None
+
+        return _layer.get_compiled_mapping(name)
+
+    def add_mapping(self, controller):
+        """
+        save the mapping of the controller to the writable layer
+
+        :param controller:              The controller that has a mapping that should be saved
+        :type controller:               steuer.Controller
+        """
+        self.writable_layer.add_mapping(controller)
+
+    def save(self):
+        """
+        write the writable layer
+        """
+        self.writable_layer.save()
+
+
+# class that handle the configuration of an undetected controller
+class Configuration(object):
+    # Class attributes
+    # *****************************************************************
+    # controllers that could not be detected and later have to be configured
+    undetected_controllers = []
+
+    # Stages events
+    # --------------------------------------------------------------------------
+    # detection of controllers finished. All controllers where a mapping exists are mapped.
+    on_detection_finished = None
+
+    # Mapping events
+    # -----------------------------------------------------------------
+    # controller was not found in the mapping database
+    on_mapping_not_found = None
+
+    # Configuration mapping events
+    # -----------------------------------------------------------------
+    # Event that is triggered when a controller is selected to be configured
+    on_mapping_configuration_init = None
+
+    #  Event that is triggered when all actions are configured for a mapping
+    on_mapping_configuration_finished = None
+
+    # Configuration events
+    # -----------------------------------------------------------------
+    #  Event that is triggered when a new controller is selected to be configured
+    on_start_configuration = None
+
+    # Event that is triggered when all controllers that have to be configured are configured
+    on_configuration_finished = None
+
+    # Class functions
+    # *****************************************************************
+    @classmethod
+    def detect_connected_controllers(cls, database):
+        """
+        Scan all connected controllers and try to get the mapping of the controller from the mapping database.
+        If a mapping was found, the mapping of the controller is filled,
+        If no mapping was found, the mapping of the controller is empty and the controller is saved in the unmapped controllers list
+        Triggers the "on_detection_finished" event
+
+        :param database:                the database to search in for the controllers
+        :type database:                 steuer.MappingDB
+        """
+        for controller in controllers:
+            # Try to find the controller by its name in the library
+            # --------------------------------------------------------------
+            _mapping = database.get_mapping_by_controller(controller)
 
             if _mapping is None:
                 # No mapping was found and the controller is saved for later
@@ -792,7 +2413,7 @@ class Configuration(object):
             else:
                 # Controller was found
                 # Add mapping to the connected controller mappings
-                controllers[controller.number].set_mapping(_mapping)
+                controller.set_mapping(_mapping, database.get_compiled_mapping(controller.name))
 
         logger.debug("detection finished")
 
@@ -800,261 +2421,1172 @@ class Configuration(object):
         if cls.on_detection_finished is not None and _flags['use_events']:
             cls.on_detection_finished()
 
-    @classmethod
-    def init_undetected_controller_configuration(cls):
+    @classmethod
+    def init_undetected_controller_configuration(cls):
+        """
+        Initialize the configuration of undetected controllers
+        Triggers the "on start configuration" event
+        """
+        logger.debug("start configuration of unknown controller types")
+
+        # quit all controllers
+        for controller in controllers:
+            if controller.close():
+                logger.debug("Controller %s:%s disabled", controller.number, controller.name)
+
+        # trigger the "on start configuration" event
+        if cls.on_start_configuration is not None and _flags['use_events']:
+            cls.on_start_configuration()
+
+    @classmethod
+    def exit_undetected_controller_configuration(cls):
+        """
+        Finish the configuration of undetected mappings
+        Waits for the off-thread callbacks and shuts down the callback threads
+        Trigger the "on_configuration_finished" event
+        """
+        # remove all controllers from the unmapped controllers list
+        del Configuration.undetected_controllers[:]
+
+        # the actions are configured
+        Action.end_configuration()
+
+        # let the off-thread callbacks of the configuration finish
+        shutdown_callback_threads()
+
+        # init all mapped controllers. Controllers that are still unmapped are not needed
+        for controller in controllers:
+            if controller.is_mapped:
+                if controller.open():
+                    logger.debug("Controller %s:%s enabled", controller.number, controller.name)
+            elif controller.close():
+                logger.debug("Controller %s:%s disabled", controller.number, controller.name)
+
+        # trigger the "on_configuration_finished" event
+        if cls.on_configuration_finished is not None and _flags['use_events']:
+            cls.on_configuration_finished()
+
+    @classmethod
+    def init_mapping(cls, controller):
+        """
+        Enable the controller
+        Trigger the "on_mapping_configuration_init" event
+
+        :param controller:              the controller to be mapped
+        :type:                          steuer.Controller
+        """
+
+        # initialize controller
+        if controller.open():
+            logger.debug("Controller %s:%s enabled", controller.number, controller.name)
+
+        # initialize an empty mapping
+        controller.mapping = {"button": {}, "axis": {}, "hat": {}}
+        controller.compile_mapping()
+
+        # trigger the "on_mapping_configuration_init" event
+        if cls.on_mapping_configuration_init is not None and _flags['use_events']:
+            cls.on_mapping_configuration_init(controller)
+
+    @classmethod
+    def exit_mapping(cls, controller, database_name="default"):
+        """
+        The mapping is saved into the mapping database.
+        The controller is disabled.
+        The "mapping configuration finished" event is triggered
+
+        :param controller:              the controller that finished the mapping
+        :type controller                steuer.Controller
+        :param database_name:           the name of the mapping database where to look for the mapping.
+        :type database_name             string
+        :return:                        The now complete mapping of the controller
+        :rtype:                         dict
+        """
+        # Put mapping into the library and save mapping db
+        mapping_databases[database_name].add_mapping(controller)
+
+        # quit controller. A controller with a player slot is mapped next (see Controller.set_mapping) and stays opened
+        if controller.player is None and controller.close():
+            logger.debug("Controller %s:%s disabled", controller.number, controller.name)
+
+        # trigger the "mapping configuration finished" event
+        if cls.on_mapping_configuration_finished is not None and _flags['use_events']:
+            cls.on_mapping_configuration_finished(controller)
+
+        return controller.mapping
+
+    @classmethod
+    def mark_as_undetected(cls, controller):
+        """
+        Add a controller to the list of unmapped controllers and close it until it is configured (see init_mapping)
+        Triggers the "mapping not found" event
+
+        :param controller:              the controller to be marked as undetected
+        :type controller:               steuer.Controller
+        """
+        Configuration.undetected_controllers.append(controller)
+
+        # pygame 2 opens the joystick when it is enumerated
+        if controller.close():
+            logger.debug("Controller %s:%s disabled", controller.number, controller.name)
+
+        # trigger the "mapping not found" event
+        if cls.on_mapping_not_found is not None and _flags['use_events']:
+            cls.on_mapping_not_found(controller)
+
+    @classmethod
+    def get_mapping_if_already_configured(cls, controller, database_name="default"):
+        """
+        Try to get the mapping. This will be successful if the controller
+        was already mapped during the configuration of a controller of the
+        same controller type.
+
+        :param controller               the controller to search for in the mapping database
+        :type controller                steuer.Controller
+        :param database_name:           the name of the mapping database where to look for the mapping.
+        :type database_name             string
+        :return                         The mapping of the controller
+        :rtype                          dict
+        """
+        _mapping = mapping_databases[database_name].get_mapping_by_controller(controller)
+
+        return _mapping
+
+
+# interface of the input backends. A backend enumerates, opens and closes the controller devices and delivers
+# their events as pygame events (JOYBUTTONDOWN, JOYAXISMOTION etc. with joy and instance_id)
+# =====================================================================
+class InputBackend(object):
+    def get_count(self):
+        """
+        Get the number of connected devices
+
+        :return:                        The number of devices
+        :rtype:                         int
+        """
+        raise NotImplementedError
+
+    def get_device(self, device_index):
+        """
+        Get a device without opening it
+
+        :param device_index:            The device index
+        :type device_index:             int
+        :return:                        The device
+        :rtype:                         object
+        """
+        raise NotImplementedError
+
+    def describe(self, device):
+        """
+        Get the name, the SDL GUID and the instance id of a device
+
+        :param device:                  The device
+        :type device:                   object
+        :return:                        (name, guid, instance id). guid and instance id are None if the backend doesn't know them
+        :rtype:                         tuple
+        """
+        raise NotImplementedError
+
+    def is_open(self, device):
+        """
+        Test if a device is opened
+
+        :param device:                  The device
+        :type device:                   object
+        :return:                        True if the device is opened
+        :rtype:                         bool
+        """
+        raise NotImplementedError
+
+    def open(self, device):
+        """
+        Open a device, so that it sends events
+
+        :param device:                  The device
+        :type device:                   object
+        """
+        raise NotImplementedError
+
+    def close(self, device):
+        """
+        Close a device
+
+        :param device:                  The device
+        :type device:                   object
+        """
+        raise NotImplementedError
+
+    def get_events(self, event_types=None):
+        """
+        Get and remove the pending events
+
+        :param event_types:             The event types to get. Events of other types stay pending. None gets all events
+        :type event_types:              list
+        :return:                        The events
+        :rtype:                         list
+        """
+        raise NotImplementedError
+
+    def clear_events(self):
+        """
+        Drop all pending events
+        """
+        raise NotImplementedError
+
+
+# input backend of the pygame joysticks and the pygame event queue. The default backend
+# =====================================================================
+class PygameBackend(InputBackend):
+    def __init__(self):
+        """
+        Constructor. Imports pygame
+        """
+        _import_pygame()
+
+    def get_count(self):
+        return pygame.joystick.get_count()
+
+    def get_device(self, device_index):
+        # pygame 2 opens the joystick in the constructor already
+        return pygame.joystick.Joystick(device_index)
+
+    def describe(self, device):
+        # pygame 1 doesn't know the GUID and the instance id
+        _guid = device.get_guid() if hasattr(device, "get_guid") else None
+        _instance_id = device.get_instance_id() if hasattr(device, "get_instance_id") else None
+
+        return device.get_name(), _guid, _instance_id
+
+    def is_open(self, device):
+        return bool(device.get_init())
+
+    def open(self, device):
+        device.init()
+
+    def close(self, device):
+        device.quit()
+
+    def get_events(self, event_types=None):
+        if event_types is None:
+            return pygame.event.get()
+
+        return pygame.event.get(event_types)
+
+    def clear_events(self):
+        pygame.event.clear()
+
+
+# class that represents a connected controller and the mapping
+# =====================================================================
+class Controller(object):
+    # class variables
+    # *****************************************************************
+    # the attributes of a controller. The slots keep the controller small and the attribute access of the dispatch functions fast
+    __slots__ = ("is_mapped", "mapping", "name", "guid", "joystick", "is_open", "opens", "closes", "instance_id", "player", "number",
+                 "_bits_store", "_bits_index", "_frame_bits", "_last_axis_action", "_last_hat_action",
+                 "_button_actions", "_axis_actions", "_hat_actions", "_unbound_entries")
+
+    # Mapping events
+    # -----------------------------------------------------------------
+    # controller was successfully mapped
+    on_controller_mapped = None
+
+    # functions
+    # *****************************************************************
+    def __init__(self, controller_number, name=None, guid=None):
+        """
+        Constructor. Initialize a controller based on the pygame controller number
+
+        :param controller_number:       The pygame controller number
+        :type controller_number:        int
+        :param name:                    The name of the controller type. If given, no device of the input backend is used (virtual controller)
+        :type name:                     string
+        :param guid:                    The SDL GUID of the controller type. Read from the input backend if no name is given
+        :type guid:                     string
+        """
+        _controller = None
+        _instance_id = None
+        _is_open = False
+
+        if name is None:
+            # enumerate the controller by name and GUID. The controller is opened later on, when it is needed (see open)
+            _backend = get_backend()
+            _controller = _backend.get_device(controller_number)
+            name, guid, _instance_id = _backend.describe(_controller)
+            _is_open = _backend.is_open(_controller)
+
+        # @formatter:off
+        self.is_mapped = False  # flag that shows if the controller is already mapped
+        self.mapping = None  # the event to action mapping from the mapping database
+
+        # get data of the controller from pygame
+        self.name = name                    # the name of the controller type
+        self.guid = guid                    # the SDL GUID of the controller type. None if unknown
+        self.joystick = _controller         # the device of the input backend. The pygame joystick of the PygameBackend. None for virtual controllers
+        self.is_open = _is_open             # flag that shows if the device is opened
+        self.opens = 0                      # number of times the device was opened by steuer
+        self.closes = 0                     # number of times the device was closed by steuer
+        self.instance_id = _instance_id     # the SDL instance id of the joystick. Identifies the controller in the pygame 2 events
+        self.player = None                  # the player slot of the connected controller (see steuer.player_slots)
+        self.number = controller_number     # the pygame device index when the controller was added. Display information, the connected
+                                            # controller is identified by its instance_id and its player slot
+        self._bits_store = [0]              # storage of the bits. Replaced by the array of a steuer.StateStore when the controller is attached to one
+        self._bits_index = 0                # index of the bits in the storage
+        self._frame_bits = 0                # snapshot of the bits at the last frame boundary. Used for the pressed, released and held masks
+        self._last_axis_action = {}         # The last axis action. Used to determine on_release and on_unheading actions.
+                                            # The value will be a dictionary with axis number keys
+        self._last_hat_action = {}          # The last hat actions. Used to determine  on_release and on_unheading actions.
+                                            # The value will be a dictionary with hat * 2 (vertical) and hat * 2 + 1 (horizontal) keys
+        self._button_actions = {}           # compiled mapping: button number -> steuer.Action
+        self._axis_actions = {}             # compiled mapping: _axis_code(axis, positive) -> (steuer.Action, press threshold, release threshold, positive)
+        self._hat_actions = {}              # compiled mapping: _hat_code(hat, x, y) -> steuer.Action
+        self._unbound_entries = {}          # function -> entries of the compiled mapping whose action is not registered yet (see bind_action)
+        # @formatter:on
+
+    def set_mapping(self, mapping, entries=None):
+        """
+        Set the mapping of a controller
+        Triggers the 'controller mapped' event
+
+        :param mapping:                         The mapping
+        :type mapping:                          dict
+        :param entries:                         The mapping already compiled by compile_mapping_entries. None compiles the mapping
+        :type entries:                          tuple
+        """
+        self.mapping = mapping
+        self.is_mapped = True
+        self.compile_mapping(entries)
+
+        # a mapped controller that is assigned to a player is needed
+        if self.player is not None:
+            self.open()
+
+        # trigger the 'controller mapped' event
+        if Controller.on_controller_mapped is not None and _flags['use_events']:
+            Controller.on_controller_mapped(self)
+
+    def open(self):
+        """
+        Open the device, so that it sends events. Does nothing if it is already opened
+
+        :return:                                True if the device was opened, False if it was already opened or is virtual
+        :rtype:                                 bool
+        """
+        if self.joystick is None or self.is_open:
+            return False
+
+        get_backend().open(self.joystick)
+        self.is_open = True
+        self.opens += 1
+
+        return True
+
+    def close(self):
+        """
+        Close the device. Does nothing if it is already closed
+
+        :return:                                True if the device was closed, False if it was already closed or is virtual
+        :rtype:                                 bool
+        """
+        if self.joystick is None or not self.is_open:
+            return False
+
+        get_backend().close(self.joystick)
+        self.is_open = False
+        self.closes += 1
+
+        return True
+
+    def compile_mapping(self, entries=None):
+        """
+        Compile the mapping into the dispatch tables of the controller.
+        The tables are keyed by integers and resolve directly to the bound steuer.Action, so the dispatch
+        functions don't have to build or parse the string keys of the mapping database.
+        Has to be called again whenever the mapping is changed. Entries of actions that are registered later on are
+        kept aside and bound by bind_action, so registering an action doesn't compile the mapping again
+
+        :param entries:                         The mapping already compiled by compile_mapping_entries. None compiles the mapping
+        :type entries:                          tuple
+        """
+        self._button_actions = {}
+        self._axis_actions = {}
+        self._hat_actions = {}
+        self._unbound_entries = {}
+
+        if self.mapping is None:
+            return
+
+        if entries is None:
+            entries = compile_mapping_entries(self.mapping)
+
+        _buttons, _axes, _hats = entries
+
+        for _code, _function in _buttons.items():
+            _action = Action.get_bound_action(_function)
+            if _action is not None:
+                self._button_actions[_code] = _action
+            else:
+                self._unbound_entries.setdefault(_function, []).append((self._button_actions, _code, None))
+
+        for _code, (_function, _press, _release, _positive) in _axes.items():
+            _action = Action.get_bound_action(_function)
+            if _action is not None:
+                self._axis_actions[_code] = (_action, _press, _release, _positive)
+            else:
+                self._unbound_entries.setdefault(_function, []).append((self._axis_actions, _code, (_press, _release, _positive)))
+
+        for _code, _function in _hats.items():
+            _action = Action.get_bound_action(_function)
+            if _action is not None:
+                self._hat_actions[_code] = _action
+            else:
+                self._unbound_entries.setdefault(_function, []).append((self._hat_actions, _code, None))
+
+    def bind_action(self, action):
+        """
+        Bind the entries of the compiled mapping that wait for a newly registered action
+
+        :param action:                          The action
+        :type action:                           steuer.Action
+        """
+        for _table, _code, _thresholds in self._unbound_entries.pop(action.action, ()):
+            _table[_code] = action if _thresholds is None else (action,) + _thresholds
+
+    @property
+    def bits(self):
+        """
+        bitfields that holds the information if an action is active or not. Values could be DPAD_TOP...,BUTTON_TOP...,LEFT_STICK_TOP... etc
+
+        :rtype:                         int
+        """
+        return int(self._bits_store[self._bits_index])
+
+    @bits.setter
+    def bits(self, value):
+        self._bits_store[self._bits_index] = value
+
+    @property
+    def pressed_mask(self):
+        """
+        The bits of the actions that were pressed since the last frame boundary (steuer.begin_frame)
+
+        :rtype:                         int
+        """
+        _bits = self.bits
+        return (_bits ^ self._frame_bits) & _bits
+
+    @property
+    def released_mask(self):
+        """
+        The bits of the actions that were released since the last frame boundary (steuer.begin_frame)
+
+        :rtype:                         int
+        """
+        return (self.bits ^ self._frame_bits) & self._frame_bits
+
+    @property
+    def held_mask(self):
+        """
+        The bits of the actions that are active since before the last frame boundary (steuer.begin_frame)
+
+        :rtype:                         int
+        """
+        return self.bits & self._frame_bits
+
+    def is_event_mapped(self, event):
+        """
+        Check if the button, axis or hat of an event is bound to an action
+
+        :param event:                   The pygame event
+        :type event:                    pygame.Event
+        :return:                        True if the button, one side of the axis or one position of the hat is bound
+        :rtype:                         bool
+        """
+        _event_type = event.type
+
+        if _event_type == _joy_button_down or _event_type == _joy_button_up:
+            return event.dict["button"] in self._button_actions
+        elif _event_type == _joy_axis_motion:
+            _axis = event.dict["axis"]
+            return _axis_code(_axis, False) in self._axis_actions or _axis_code(_axis, True) in self._axis_actions
+        elif _event_type == _joy_hat_motion:
+            _code = _hat_code(event.dict["hat"], -1, -1)
+            return any(_code + _offset in self._hat_actions for _offset in range(9))
+
+        return False
+
+    def begin_frame(self):
+        """
+        Snapshot the bits at a frame boundary
+        """
+        self._frame_bits = int(self._bits_store[self._bits_index])
+
+    def change_bits(self, value, add_value):
+        """
+        Change the heading bit.
+        Depending on the add_value parameter the bits of the value are set in the heading bits (True)
+        or the bits of the value are cleared in the heading bits (False)
+
+        :param value:                   The value to set in the heading bits
+        :type value:                    int
+        :param add_value:               Flag to show it the value is set or cleared in the heading bits
+        :type add_value:                bool
+        :return:                        The heading bits
+        :rtype:                         int
+        """
+        if add_value:
+            _bits = int(self._bits_store[self._bits_index]) | value
+        else:
+            _bits = int(self._bits_store[self._bits_index]) & ~value
+
+        self._bits_store[self._bits_index] = _bits
+
+        return _bits
+
+    def get_last_axis_action(self, axis):
+        """
+        Getter for the last axis action
+
+        :param axis:                    The axis
+        :type axis:                     int
+        :return:                        The last axis action
+        :rtype:                         steuer.Action
+        """
+        _entry = self._last_axis_action.get(int(axis))
+
+        if _entry is None:
+            return None
+        else:
+            return _entry[0]
+
+    def set_last_axis_action(self, axis, action=None):
+        """
+        Setter for the last axis action
+
+        :param axis:                    The axis
+        :type axis:                     int
+        :param action:                  The action to become the last axis action
+        :type action:                   steuer.Action
+        """
+        _entry = None
+
+        if action is not None:
+            # find the compiled entry of the action on this axis
+            for _positive in (False, True):
+                _candidate = self._axis_actions.get(_axis_code(int(axis), _positive))
+                if _candidate is not None and _candidate[0] is action:
+                    _entry = _candidate
+
+        self._last_axis_action[int(axis)] = _entry
+
+    def get_last_hat_action(self, hat, direction):
+        """
+        Getter for the last hat action
+
+        :param hat:                     The hat
+        :type hat:                      int
+        :param direction:               Either 'vertical' or 'horizontal'
+        :type direction                 string
+        :return:                        The last hat action for the given direction
+        :rtype:                         steuer.Action
+        """
+        if direction == 'vertical':
+            return self._last_hat_action.get(int(hat) * 2)
+        else:
+            return self._last_hat_action.get(int(hat) * 2 + 1)
+
+    def set_last_hat_action(self, hat, direction, action=None):
+        """
+        Setter for the last hat actions
+
+        :param hat:                     The hat
+        :type hat:                      int
+        :param direction:               Either 'vertical' or 'horizontal'
+        :type direction                 string
+        :param action:                  The action to become the last hat action for the given direction
+        :type action:                   steuer.Action
+        """
+        if direction == 'vertical':
+            self._last_hat_action[int(hat) * 2] = action
+        else:
+            self._last_hat_action[int(hat) * 2 + 1] = action
+
+
+# class that keeps the bits of many controllers in one contiguous array. The array is a NumPy array
+# if NumPy is installed, otherwise an array('Q'). Attached controllers read and write their bits from the store
+# =====================================================================
+class StateStore(object):
+    def __init__(self, capacity=0, use_numpy=True):
+        """
+        Constructor.
+
+        :param capacity:                The number of controllers the store has room for. The store grows if more controllers are attached
+        :type capacity:                 int
+        :param use_numpy:               Use a NumPy array if NumPy is installed (True) or always use an array('Q') (False)
+        :type use_numpy:                bool
+        """
+        self._numpy = None
+
+        if use_numpy:
+            try:
+                import numpy
+                self._numpy = numpy
+            except ImportError:
+                logger.debug("NumPy not found, the state store uses array('Q')")
+
+        # @formatter:off
+        self.bits = self._new_array(max(capacity, 1))   # the bits of the attached controllers. The index is the slot of the controller
+        self.controllers = []                           # the attached controllers. The index is the slot of the controller, free slots are None
+        # @formatter:on
+
+    def _new_array(self, size):
+        """
+        Create a zeroed bits array
+
+        :param size:                    The number of slots
+        :type size:                     int
+        :return:                        The array
+        :rtype:                         array or numpy.ndarray
+        """
+        if self._numpy is not None:
+            return self._numpy.zeros(size, dtype=self._numpy.uint64)
+        else:
+            return array('Q', [0]) * size
+
+    def attach(self, controller):
+        """
+        Move the bits of a controller into the store. The controller keeps its bits.
+
+        :param controller:              The controller to attach
+        :type controller:               steuer.Controller
+        :return:                        The slot of the controller in the store
+        :rtype:                         int
+        """
+        _bits = controller.bits
+
+        if None in self.controllers:
+            # reuse a free slot
+            _slot = self.controllers.index(None)
+            self.controllers[_slot] = controller
+        else:
+            _slot = len(self.controllers)
+            self.controllers.append(controller)
+
+            if _slot >= len(self.bits):
+                self._grow(len(self.bits) * 2)
+
+        self.bits[_slot] = _bits
+        controller._bits_store = self.bits
+        controller._bits_index = _slot
+
+        return _slot
+
+    def detach(self, controller):
+        """
+        Move the bits of a controller out of the store and free its slot
+
+        :param controller:              The controller to detach
+        :type controller:               steuer.Controller
+        """
+        _slot = self.controllers.index(controller)
+        _bits = controller.bits
+
+        controller._bits_store = [_bits]
+        controller._bits_index = 0
+
+        self.bits[_slot] = 0
+        self.controllers[_slot] = None
+
+    def _grow(self, size):
+        """
+        Reallocate the bits array and point the attached controllers to the new one
+
+        :param size:                    The new number of slots
+        :type size:                     int
+        """
+        _bits = self._new_array(size)
+        _bits[:len(self.bits)] = self.bits
+        self.bits = _bits
+
+        for controller in self.controllers:
+            if controller is not None:
+                controller._bits_store = _bits
+
+    def is_set(self, value):
+        """
+        Test in one operation which attached controllers have the bits of a value set.
+        Example: steuer.state_store.is_set(steuer.DPAD_LEFT)
+
+        :param value:                   The bits to test. Values could be DPAD_TOP...,BUTTON_TOP... etc
+        :type value:                    int
+        :return:                        Per slot True if any bit of the value is set. A NumPy bool array if NumPy is used
+        :rtype:                         list or numpy.ndarray
+        """
+        if self._numpy is not None:
+            return (self.bits[:len(self.controllers)] & self._numpy.uint64(value)) != 0
+        else:
+            return [_bits & value != 0 for _bits in self.bits[:len(self.controllers)]]
+
+    def get_controllers(self, value):
+        """
+        Get the attached controllers that have the bits of a value set
+
+        :param value:                   The bits to test. Values could be DPAD_TOP...,BUTTON_TOP... etc
+        :type value:                    int
+        :return:                        The controllers
+        :rtype:                         list
+        """
+        return [self.controllers[_slot] for _slot, _is_set in enumerate(self.is_set(value)) if _is_set]
+
+
+# queue that records callbacks in deferred mode. Every priority has its own preallocated ring buffer.
+# Callbacks can be submitted from another thread (see steuer.sampler.Sampler) while run drains the queue
+# =====================================================================
+class CallbackQueue(object):
+    def __init__(self, capacity=256):
+        """
+        Constructor.
+
+        :param capacity:                The number of callbacks per priority the queue has room for before it grows
+        :type capacity:                 int
+        """
+        # @formatter:off
+        self.capacity = capacity        # the initial size of the ring buffer of a priority
+        self._rings = {}                # priority -> [entries, index of the oldest entry, number of entries]
+        self._priorities = []           # the priorities of the rings, highest first
+        self.size = 0                   # the number of queued callbacks
+        self._lock = threading.Lock()   # guards the rings. The callbacks run outside of the lock
+        # @formatter:on
+
+    def submit(self, callback, controller, owner):
+        """
+        Record a callback. The entry is (callback, controller, owner, timestamp)
+
+        :param callback:                The callback function
+        :type callback:                 function
+        :param controller:              The controller the callback is called with
+        :type controller:               steuer.Controller
+        :param owner:                   The action or direction of the callback. Its priority selects the ring buffer
+        :type owner:                    steuer.Action or steuer.Direction
+        """
+        _entry = (callback, controller, owner, time.perf_counter())
+
+        with self._lock:
+            _ring = self._rings.get(owner.priority)
+
+            if _ring is None:
+                _ring = self._rings[owner.priority] = [[None] * self.capacity, 0, 0]
+                self._priorities = sorted(self._rings, reverse=True)
+
+            _entries, _head, _count = _ring
+
+            if _count == len(_entries):
+                # the ring buffer is full. Unroll it into a buffer of twice the size
+                logger.warning("callback queue of priority %s is full, growing to %s", owner.priority, _count * 2)
+                _entries = _entries[_head:] + _entries[:_head] + [None] * _count
+                _ring[0] = _entries
+                _ring[1] = _head = 0
+
+            _entries[(_head + _count) % len(_entries)] = _entry
+            _ring[2] = _count + 1
+            self.size += 1
+
+    def run(self, budget_ms=None):
+        """
+        Run queued callbacks, highest priority first, until the queue is empty or the time budget is used up.
+        At least one callback runs per call, so the queue always makes progress
+
+        :param budget_ms:               The time budget in milliseconds. None runs all queued callbacks
+        :type budget_ms:                float
+        :return:                        The number of callbacks left in the queue
+        :rtype:                         int
+        """
+        _timer = time.perf_counter
+        _deadline = None if budget_ms is None else _timer() + budget_ms / 1000.0
+        _has_run = False
+        _lock = self._lock
+
+        for _priority in self._priorities:
+            _ring = self._rings[_priority]
+
+            while _ring[2]:
+                if _has_run and _deadline is not None and _timer() >= _deadline:
+                    return self.size
+
+                with _lock:
+                    _entries, _head, _count = _ring
+                    _entry = _entries[_head]
+                    _entries[_head] = None
+                    _ring[1] = (_head + 1) % len(_entries)
+                    _ring[2] = _count - 1
+                    self.size -= 1
+
+                _entry[0](_entry[1])
+                _has_run = True
+
+        return self.size
+
+    def clear(self):
         """
-        Initialize the configuration of undetected controllers
-        Triggers the "on start configuration" event
+        Remove all queued callbacks without running them
         """
-        logger.debug("start configuration of unknown controller types")
+        with self._lock:
+            for _ring in self._rings.values():
+                _ring[0] = [None] * len(_ring[0])
+                _ring[1] = 0
+                _ring[2] = 0
 
-        # quit all controllers
-        for controller in controllers:
-            logger.debug("Controller {0}:{1} disabled".format(controller.number, controller.name))
-            pygame.joystick.Joystick(controller.number).quit()
+            self.size = 0
 
-        # trigger the "on start configuration" event
-        if cls.on_start_configuration is not None and _flags['use_events']:
-            cls.on_start_configuration()
 
-    @classmethod
-    def exit_undetected_controller_configuration(cls):
+# class that runs callbacks on a bounded thread pool. The callbacks of a controller run one after another
+# in the order they were submitted, callbacks of different controllers run in parallel
+# =====================================================================
+class ThreadDispatcher(object):
+    def __init__(self, max_workers=4):
         """
-        Finish the configuration of undetected mappings
-        Trigger the "on_configuration_finished" event
+        Constructor.
+
+        :param max_workers:             The number of threads of the pool
+        :type max_workers:              int
         """
-        # remove all controllers from the unmapped controllers list
-        del Configuration.undetected_controllers[:]
+        # @formatter:off
+        self.max_workers = max_workers      # the number of threads of the pool
+        self._executor = None               # the pool. Started by the first callback
+        self._lock = threading.Lock()       # guards the executor and the pending callbacks
+        self._pending = {}                  # controller -> deque of the callbacks that wait for the controller's running worker
+        # @formatter:on
 
-        # init all mapped controllers
-        for controller in controllers:
-            if controller.is_mapped:
-                pygame.joystick.Joystick(controller.number).init()
-                logger.debug("Controller {0}:{1} enabled".format(controller.number, controller.name))
+    def submit(self, callback, controller, owner):
+        """
+        Run a callback on the thread pool
 
-        # trigger the "on_configuration_finished" event
-        if cls.on_configuration_finished is not None and _flags['use_events']:
-            cls.on_configuration_finished()
+        :param callback:                The callback function
+        :type callback:                 function
+        :param controller:              The controller the callback is called with
+        :type controller:               steuer.Controller
+        :param owner:                   The action or direction of the callback
+        :type owner:                    steuer.Action or steuer.Direction
+        """
+        with self._lock:
+            _queue = self._pending.get(controller)
 
-    @classmethod
-    def init_mapping(cls, controller):
+            if _queue is not None:
+                # a worker runs the callbacks of the controller. It will pick this one up
+                _queue.append(callback)
+            else:
+                if self._executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+                self._pending[controller] = deque((callback,))
+                self._executor.submit(self._run, controller)
+
+    def _run(self, controller):
         """
-        Enable the controller
-        Trigger the "on_mapping_configuration_init" event
+        Worker. Runs the pending callbacks of a controller until there are no more
 
-        :param controller:              the controller to be mapped
-        :type:                          steuer.Controller
+        :param controller:              The controller
+        :type controller:               steuer.Controller
         """
+        while True:
+            with self._lock:
+                _queue = self._pending[controller]
 
-        # initialize controller
-        pygame.joystick.Joystick(controller.number).init()
-        logger.debug("Controller {0}:{1} enabled".format(controller.number, controller.name))
+                if not _queue:
+                    del self._pending[controller]
+                    return
 
-        # initialize an empty mapping
-        controller.mapping = {"button": {}, "axis": {}, "hat": {}}
+                _callback = _queue.popleft()
 
-        # trigger the "on_mapping_configuration_init" event
-        if cls.on_mapping_configuration_init is not None and _flags['use_events']:
-            cls.on_mapping_configuration_init(controller)
+            try:
+                _callback(controller)
+            except Exception:
+                logger.exception("callback of controller %s failed", controller.number)
 
-    @classmethod
-    def exit_mapping(cls, controller, database_name="default"):
+    def shutdown(self, wait=True):
         """
-        The mapping is saved into the mapping database.
-        The controller is disabled.
-        The "mapping configuration finished" event is triggered
+        Shut down the thread pool
 
-        :param controller:              the controller that finished the mapping
-        :type controller                steuer.Controller
-        :param database_name:           the name of the mapping database where to look for the mapping.
-        :type database_name             string
-        :return:                        The now complete mapping of the controller
-        :rtype:                         dict
+        :param wait:                    Wait until the pending callbacks have run (True) or not (False)
+        :type wait:                     bool
         """
-        # Put mapping into the library and save mapping db
-        mapping_databases[database_name].add_mapping(controller)
+        with self._lock:
+            _executor = self._executor
+            self._executor = None
 
-        # quit controller
-        pygame.joystick.Joystick(controller.number).quit()
-        logger.debug("Controller {0}:{1} disabled".format(controller.number, controller.name))
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
 
-        # trigger the "mapping configuration finished" event
-        if cls.on_mapping_configuration_finished is not None and _flags['use_events']:
-            cls.on_mapping_configuration_finished(controller)
 
-        return controller.mapping
+# class of a latency histogram with fixed buckets
+# =====================================================================
+class LatencyHistogram(object):
+    # upper bounds of the buckets in microseconds. The last bucket holds everything above the last bound
+    bounds_us = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+    _bounds = tuple(_bound / 1000000.0 for _bound in bounds_us)
 
-    @classmethod
-    def mark_as_undetected(cls, controller):
+    def __init__(self):
         """
-        Add a controller to the list of unmapped controllers
-        Triggers the "mapping not found" event
-
-        :param controller:              the controller to be marked as undetected
-        :type controller:               steuer.Controller
+        Constructor.
         """
-        Configuration.undetected_controllers.append(controller)
+        # @formatter:off
+        self.counts = [0] * (len(self.bounds_us) + 1)   # the number of latencies per bucket
+        self.count = 0                                  # the number of latencies
+        self.total = 0.0                                # the sum of the latencies in seconds
+        self.max = 0.0                                  # the highest latency in seconds
+        # @formatter:on
 
-        # trigger the "mapping not found" event
-        if cls.on_mapping_not_found is not None and _flags['use_events']:
-            cls.on_mapping_not_found(controller)
+    def add(self, latency):
+        """
+        Add a latency
 
-    @classmethod
-    def get_mapping_if_already_configured(cls, controller, database_name="default"):
+        :param latency:                 The latency in seconds
+        :type latency:                  float
         """
-        Try to get the mapping. This will be successful if the controller
-        was already mapped during the configuration of a controller of the
-        same controller type.
+        self.counts[bisect.bisect_left(self._bounds, latency)] += 1
+        self.count += 1
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
 
-        :param controller               the controller to search for in the mapping database
-        :type controller                steuer.Controller
-        :param database_name:           the name of the mapping database where to look for the mapping.
-        :type database_name             string
-        :return                         The mapping of the controller
-        :rtype                          dict
+    def snapshot(self):
         """
-        _mapping = mapping_databases[database_name].get_mapping_by_controller(controller)
+        Get a copy of the histogram
 
-        return _mapping
+        :return:                        bounds_us, counts, count, total_ms and max_ms
+        :rtype:                         dict
+        """
+        return {
+            "bounds_us": list(self.bounds_us),
+            "counts": list(self.counts),
+            "count": self.count,
+            "total_ms": self.total * 1000.0,
+            "max_ms": self.max * 1000.0
+        }
 
 
-# class that represents a connected controller and the mapping
+# class that holds the counters and latency histograms of the statistics (see steuer.enable_stats)
 # =====================================================================
-class Controller(object):
-    # functions
-    # *****************************************************************
-    def __init__(self, controller_number):
+class Instrumentation(object):
+    def __init__(self):
         """
-        Constructor. Initialize a controller based on the pygame controller number
-
-        :param controller_number:       The pygame controller number
-        :type controller_number:        int
+        Constructor.
         """
-        # pygame controller initialization
-        _controller = pygame.joystick.Joystick(controller_number)
-        _controller.init()
+        # pygame event type -> name of the event counter
+        self.event_names = {
+            _joy_button_down: "button_down",
+            _joy_button_up: "button_up",
+            _joy_axis_motion: "axis_motion",
+            _joy_hat_motion: "hat_motion"
+        }
 
         # @formatter:off
-        self.is_mapped = False  # flag that shows if the controller is already mapped
-        self.mapping = None  # the event to action mapping from the mapping database
-
-        # get data of the controller from pygame
-        self.name = _controller.get_name()  # the name of the controller type
-        self.number = controller_number     # the pygame controller number
-        self.bits = 0                       # bitfields that holds the information if an action is active or not. Values could be DPAD_TOP...,BUTTON_TOP...,LEFT_STICK_TOP... etc
-        self._last_axis_action = {}         # The last axis action. Used to determine on_release and on_unheading actions.
-                                            # The value will be a dictionary with axis number keys
-        self._last_hat_action = {}          # The last hat actions. Used to determine  on_release and on_unheading actions.
-                                            # The value will be an dictionary with 'vertical' and 'horizontal' keys
+        self.enabled = False                # flag that shows if the statistics are enabled
+        self.originals = None               # the original dispatch functions while the statistics are enabled
+        self._lock = threading.Lock()       # guards the callback histograms. Callbacks can run on the thread pool
         # @formatter:on
 
-        # Mapping events
-        # -----------------------------------------------------------------
-        # controller was successfully mapped
-        self.on_controller_mapped = None
+        self.reset()
 
-    def set_mapping(self, mapping):
+    def reset(self):
         """
-        Set the mapping of a controller
-        Triggers the 'controller mapped' event
+        Clear the counters and histograms
+        """
+        # @formatter:off
+        self.since = time.time()            # the time of the last reset
+        self.events = {}                    # player slot -> event name -> number of events
+        self.unmapped = {}                  # player slot -> number of events of unmapped buttons, axes and hats
+        self.actions = {}                   # action name -> [number of presses, number of releases]
+        self.dispatch = {}                  # dispatch function name -> steuer.LatencyHistogram
+        self.callbacks = {}                 # "action.callback" -> steuer.LatencyHistogram
+        # @formatter:on
 
-        :param mapping:                         The mapping
-        :type mapping:                          dict
+    def instrument(self, dispatch_function, name):
         """
-        self.mapping = mapping
-        self.is_mapped = True
+        Create the instrumented version of a per-controller dispatch function (_get_action, _call_event or _call_event_and_direction).
+        The run time includes the callbacks that are called inline
+
+        :param dispatch_function:       The dispatch function
+        :type dispatch_function:        function
+        :param name:                    The name of the latency histogram of the dispatch function
+        :type name:                     string
+        :return:                        The instrumented dispatch function
+        :rtype:                         function
+        """
+        _timer = time.perf_counter
 
-        # trigger the 'controller mapped' event
-        if self.on_controller_mapped is not None and _flags['use_events']:
-            self.on_controller_mapped(self)
+        def _instrumented_dispatch(_controller, event):
+            _old_bits = _controller.bits
+            _start = _timer()
+            _action = dispatch_function(_controller, event)
+            _latency = _timer() - _start
 
-    def change_bits(self, value, add_value):
-        """
-        Change the heading bit.
-        Depending on the add_value parameter the value is added to the heading bits (True)
-        or the value is substracted from the heading bits (False)
+            _histogram = self.dispatch.get(name)
+            if _histogram is None:
+                _histogram = self.dispatch[name] = LatencyHistogram()
+            _histogram.add(_latency)
 
-        :param value:                   The value to add to the heading bits
-        :type value:                    int
-        :param add_value:               Flag to show it the value is added or substracted from the heading bits
-        :type add_value:                bool
-        :return:                        The heading bits
-        :rtype:                         int
-        """
-        if add_value:
-            self.bits += value
-        else:
-            self.bits -= value
+            self.count_event(_controller, event, _old_bits, _controller.bits)
 
-        return self.bits
+            return _action
 
-    def get_last_axis_action(self, axis):
+        return _instrumented_dispatch
+
+    def count_event(self, controller, event, old_bits, new_bits):
         """
-        Getter for the last axis action
+        Count an event of a controller and the actions it pressed and released
 
-        :param axis:                    The axis
-        :type axis:                     string
-        :return:                        The last axis action
-        :rtype:                         steuer.Action
+        :param controller:              The controller that sent the event
+        :type controller:               steuer.Controller
+        :param event:                   The pygame event
+        :type event:                    pygame.Event
+        :param old_bits:                The bits of the controller before the event
+        :type old_bits:                 int
+        :param new_bits:                The bits of the controller after the event
+        :type new_bits:                 int
         """
-        if axis not in self._last_axis_action:
-            # There is no last axis action for the given axis
-            return None
-        else:
-            return self._last_axis_action[axis]
+        _events = self.events.get(controller.player)
+        if _events is None:
+            _events = self.events[controller.player] = {}
 
-    def set_last_axis_action(self, axis, action=None):
+        _name = self.event_names.get(event.type, "other")
+        _events[_name] = _events.get(_name, 0) + 1
+
+        if not controller.is_event_mapped(event):
+            self.unmapped[controller.player] = self.unmapped.get(controller.player, 0) + 1
+
+        if new_bits != old_bits:
+            for _action in Action.get_actions_by_bits(new_bits & ~old_bits):
+                self._get_action_counters(_action)[0] += 1
+            for _action in Action.get_actions_by_bits(old_bits & ~new_bits):
+                self._get_action_counters(_action)[1] += 1
+
+    def _get_action_counters(self, action):
         """
-        Setter for the last axis action
+        Get the press and release counters of an action
 
-        :param axis:                    The axis
-        :type axis:                     string
-        :param action:                  The action to become the last axis action
+        :param action:                  The action
         :type action:                   steuer.Action
+        :return:                        [number of presses, number of releases]
+        :rtype:                         list
         """
-        self._last_axis_action[axis] = action
+        _counters = self.actions.get(action.action)
+        if _counters is None:
+            _counters = self.actions[action.action] = [0, 0]
 
-    def get_last_hat_action(self, hat, direction):
+        return _counters
+
+    def add_callback_latency(self, owner, callback, latency):
         """
-        Getter for the last hat action
+        Add the run time of a callback to its latency histogram
+
+        :param owner:                   The action or direction of the callback
+        :type owner:                    steuer.Action or steuer.Direction
+        :param callback:                The callback function
+        :type callback:                 function
+        :param latency:                 The run time in seconds
+        :type latency:                  float
+        """
+        _kind = getattr(callback, "__name__", "callback")
+        for _attribute in ("on_pressed", "on_released", "on_heading", "on_unheading"):
+            if getattr(owner, _attribute, None) is callback:
+                _kind = _attribute
+                break
 
-        :param hat:                     The hat
-        :type hat:                      int
-        :param direction:               Either 'vertical' or 'horizontal'
-        :type direction                 string
-        :return:                        The last hat action for the given direction
-        :rtype:                         steuer.Action
+        _name = "{0}.{1}".format(owner.action, _kind)
+
+        with self._lock:
+            _histogram = self.callbacks.get(_name)
+            if _histogram is None:
+                _histogram = self.callbacks[_name] = LatencyHistogram()
+            _histogram.add(latency)
+
+    def snapshot(self):
         """
-        _hat = str(hat)
+        Get a copy of the counters and histograms
 
-        if _hat not in self._last_hat_action:
-            # There is no last action for this hat
-            return None
-        else:
-            if direction not in self._last_hat_action[_hat]:
-                # There is no last action on this hat for the given direction
-                return None
-            else:
-                return self._last_hat_action[_hat][direction]
+        :return:                        See steuer.stats
+        :rtype:                         dict
+        """
+        with self._lock:
+            _callbacks = dict((_name, _histogram.snapshot()) for _name, _histogram in self.callbacks.items())
+
+        return {
+            "enabled": self.enabled,
+            "since": self.since,
+            "controllers": dict((_player, {"events": dict(_events), "unmapped": self.unmapped.get(_player, 0)})
+                                for _player, _events in self.events.items()),
+            "actions": dict((_name, {"pressed": _counters[0], "released": _counters[1]}) for _name, _counters in self.actions.items()),
+            "dispatch": dict((_name, _histogram.snapshot()) for _name, _histogram in self.dispatch.items()),
+            "callbacks": _callbacks
+        }
+
+
+# dispatcher that measures the run time of the callbacks and passes them on to the wrapped dispatcher.
+# Only used while the statistics are enabled
+# =====================================================================
+class InstrumentedDispatcher(object):
+    def __init__(self, dispatcher, instrumentation):
+        """
+        Constructor.
 
-    def set_last_hat_action(self, hat, direction, action=None):
+        :param dispatcher:              The wrapped dispatcher. None calls the callbacks inline
+        :type dispatcher:               steuer.CallbackQueue or steuer.ThreadDispatcher
+        :param instrumentation:         The statistics the latencies are added to
+        :type instrumentation:          steuer.Instrumentation
         """
-        Setter for the last hat actions
+        # @formatter:off
+        self.dispatcher = dispatcher            # the wrapped dispatcher
+        self.instrumentation = instrumentation  # the statistics
+        # @formatter:on
 
-        :param hat:                     The hat
-        :type hat:                      int
-        :param direction:               Either 'vertical' or 'horizontal'
-        :type direction                 string
-        :param action:                  The action to become the last hat action for the given direction
-        :type action:                   steuer.Action
+    def submit(self, callback, controller, owner):
+        """
+        Run or pass on a callback and measure its run time
+
+        :param callback:                The callback function
+        :type callback:                 function
+        :param controller:              The controller the callback is called with
+        :type controller:               steuer.Controller
+        :param owner:                   The action or direction of the callback
+        :type owner:                    steuer.Action or steuer.Direction
         """
-        _hat = str(hat)
+        if self.dispatcher is None:
+            _start = time.perf_counter()
+            try:
+                callback(controller)
+            finally:
+                self.instrumentation.add_callback_latency(owner, callback, time.perf_counter() - _start)
+        else:
+            _instrumentation = self.instrumentation
+
+            def _measured_callback(_controller):
+                _start = time.perf_counter()
+                try:
+                    callback(_controller)
+                finally:
+                    _instrumentation.add_callback_latency(owner, callback, time.perf_counter() - _start)
 
-        if _hat not in self._last_hat_action:
-            # If there was no last action on this hat for the given direction before, a dictionary for the hat is created
-            self._last_hat_action[_hat] = {}
+            self.dispatcher.submit(_measured_callback, controller, owner)
 
-        self._last_hat_action[_hat][direction] = action
+
+# class that holds the state of an action while it is configured. Only exists during the configuration of a controller
+# =====================================================================
+class ConfigurationSession(object):
+    __slots__ = ("status", "mapping_key", "trigger_event", "delay_counter")
+
+    def __init__(self):
+        """
+        Constructor. Starts with the status unconfigured
+        """
+        # @formatter:off
+        self.status = Action.status_unconfigured    # the status is used to determine the phases of the mapping
+        self.mapping_key = None                     # the key of the detected event in the mapping. Example: "0:>"
+        self.trigger_event = None                   # the pygame event that triggers a configuration
+        self.delay_counter = 5                      # counter how ofter a delay is called to ensure that the event is finally released
+        # @formatter:on
 
 
 # class to connect callback functions to a action-name that then could be
@@ -1063,11 +3595,19 @@ class Controller(object):
 class Action(object):
     # class variables
     # *****************************************************************
+    # the attributes of an action. The slots keep the action small and the attribute access of the dispatch functions fast
+    __slots__ = ("action", "value", "long_name", "short_name", "on_pressed", "on_released", "priority", "dispatch_policy", "dispatcher",
+                 "mapped", "event_is_mapped", "configuration")
+
     # @formatter:off
     unconfigured_actions = []   # Ordered list of actions to configure.
     actions = {}                # Actions dictionary. This dictionary will be used to get an action
                                 # based on it's key from the mapping
     directions = {}             # List of directions
+    default_dispatcher = None   # Runs the callback functions of the actions that have no own dispatcher. None calls them inline
+    unregistered_functions = set()  # functions of the mapping database without registered action. Warned about once
+    direction_transitions = []  # (shift, table) per direction group (dpad, left stick, right stick) that has directions.
+                                # The table is indexed by old << 4 | new 4 bit direction and holds the (unheading, heading) directions
     status_unconfigured = 0     # action is no bound to an event
     status_waiting = 1          # the action mapping is waiting that the trigger of the event is released
     status_delayed = 2          # the action mapping is delayed without event processing to ensure, that the trigger is finally released
@@ -1093,7 +3633,7 @@ class Action(object):
 
     # functions
     # *****************************************************************
-    def __init__(self, action, value, long_name, short_name, on_pressed=None, on_released=None):
+    def __init__(self, action, value, long_name, short_name, on_pressed=None, on_released=None, priority=0, dispatch_policy=None):
         """
         Action constructor.
 
@@ -1113,6 +3653,10 @@ class Action(object):
         :type on_pressed:                   function
         :param on_released:                 The callback function that is triggered when the button that triggered an action is released
         :type on_released:                  function
+        :param priority:                    The priority of the callback functions in deferred mode. Higher priorities run first
+        :type priority:                     int
+        :param dispatch_policy:             DISPATCH_INLINE, DISPATCH_DEFERRED or DISPATCH_THREAD. None follows the mode of all actions
+        :type dispatch_policy:              int
         """
         # @formatter:off
         self.action = action                        # The name of the action
@@ -1121,17 +3665,142 @@ class Action(object):
         self.short_name = short_name                # The short description
         self.on_pressed = on_pressed                # The callback function that is triggered when the button to trigger a action is pressed
         self.on_released = on_released              # The callback function that is triggered when the button that triggered an action is released
+        self.priority = priority                    # The priority of the callback functions in deferred mode
+        self.dispatch_policy = None                 # The dispatch policy of the action. None follows the mode of all actions
+        self.dispatcher = Action.default_dispatcher # Runs the callback functions of the action. None calls them inline
         self.mapped = False                         # Flag to show, if an action is already mapped
         self.event_is_mapped = False
-        self.status = None                          # the status is used to determine the phases of the mapping
-        self._configuration_mapping_key = None
-        self._configuration_trigger_event = None    # the pygame event that triggers a configuration
-        self._delay_counter = 5                     # counter how ofter a delay is called to ensure that the event is finally released
+        self.configuration = None                   # the state of the action while it is configured (see steuer.ConfigurationSession)
         # @formater:on
 
+        if dispatch_policy is not None:
+            self.set_dispatch_policy(dispatch_policy)
+
+        _replaced_action = Action.actions.get(self.action)
+
         Action.unconfigured_actions.append(self)
         Action.actions[self.action] = self
 
+        # bind the action in the compiled mappings of controllers that were mapped before the action was registered.
+        # Only an action that replaces one with the same name needs a compile
+        for controller in controllers:
+            if _replaced_action is not None and controller.mapping is not None:
+                controller.compile_mapping()
+            elif controller._unbound_entries:
+                controller.bind_action(self)
+
+    def set_dispatch_policy(self, dispatch_policy):
+        """
+        Set how the callback functions of the action are run
+
+        :param dispatch_policy:         DISPATCH_INLINE, DISPATCH_DEFERRED or DISPATCH_THREAD
+        :type dispatch_policy:          int
+        """
+        self.dispatch_policy = dispatch_policy
+        self.dispatcher = _instrument_dispatcher(get_dispatcher(dispatch_policy))
+
+    @property
+    def status(self):
+        """
+        The status is used to determine the phases of the mapping. None if the action is not configured
+
+        :rtype:                         int
+        """
+        if self.configuration is None:
+            return None
+
+        return self.configuration.status
+
+    @status.setter
+    def status(self, status):
+        if self.configuration is None:
+            self.configuration = ConfigurationSession()
+
+        self.configuration.status = status
+
+    @classmethod
+    def set_default_dispatcher(cls, dispatcher):
+        """
+        Set the dispatcher of all actions that have no own dispatch policy
+
+        :param dispatcher:              The dispatcher. None calls the callback functions inline
+        :type dispatcher:               steuer.CallbackQueue or steuer.ThreadDispatcher or steuer.InstrumentedDispatcher
+        """
+        cls.default_dispatcher = dispatcher
+
+        for _action in cls.actions.values():
+            if _action.dispatch_policy is None:
+                _action.dispatcher = dispatcher
+
+    @classmethod
+    def end_configuration(cls):
+        """
+        Drop the configuration sessions of all actions
+        """
+        for _action in cls.actions.values():
+            _action.configuration = None
+
+    @classmethod
+    def build_direction_transitions(cls):
+        """
+        Build the direction transition tables from the registered directions.
+        Every direction group (dpad, left stick, right stick) with at least one registered direction gets a table with
+        an entry for every change of its 4 direction bits. The entry holds the direction to unhead and the direction to head to.
+        Changes without a registered direction on either side have no entry (None).
+        """
+        cls.direction_transitions = []
+
+        for _shift in (0, 4, 8):
+            # the registered directions of the group by its 4 direction bits
+            _directions = [cls.directions.get(str(_bits << _shift)) for _bits in range(0, 16)]
+            _directions[0] = None
+
+            if not any(_directions):
+                continue
+
+            _transitions = []
+            for _old in range(0, 16):
+                for _new in range(0, 16):
+                    if _old != _new and (_directions[_old] is not None or _directions[_new] is not None):
+                        _transitions.append((_directions[_old], _directions[_new]))
+                    else:
+                        _transitions.append(None)
+
+            cls.direction_transitions.append((_shift, tuple(_transitions)))
+
+    @classmethod
+    def get_actions_by_bits(cls, bits):
+        """
+        Get the registered actions whose bits are in the given bits
+
+        :param bits:                    The bits. Example: the bits that changed between two Controller.bits values
+        :type bits:                     int
+        :return:                        The actions
+        :rtype:                         list
+        """
+        if bits == 0:
+            return []
+
+        return [_action for _action in cls.actions.values() if _action.value & bits]
+
+    @classmethod
+    def get_bound_action(cls, function):
+        """
+        Get the action that a mapping database entry is bound to
+
+        :param function:                The function of the mapping database entry. Example: "DPAD_TOP" of {"Function": "DPAD_TOP"}
+        :type function:                 string
+        :return:                        The action or None if no action with the name of the function is registered
+        :rtype:                         steuer.Action
+        """
+        _action = cls.actions.get(function)
+
+        if _action is None and function not in cls.unregistered_functions:
+            cls.unregistered_functions.add(function)
+            logger.warning("action %s is mapped but not registered", function)
+
+        return _action
+
     def init_event_detection(self, controller):
         """
         Reset the status
@@ -1140,9 +3809,8 @@ class Action(object):
         :param controller:              The controller the action is configured for
         :type controller:               steuer.Controller
         """
-        # reset the status of the action to unconfigured
-        self.status = Action.status_unconfigured
-        self._delay_counter = 5
+        # start a new configuration session with the status unconfigured
+        self.configuration = ConfigurationSession()
 
         # triggers the "request action" event
         if Action.on_request_action is not None and _flags['use_events']:
@@ -1160,22 +3828,22 @@ class Action(object):
         _detected = False
 
         if "joy" in event.dict:
-            if event.dict["joy"] == controller.number:
+            if get_controller(event) is controller:
                 # Map a button event
                 # --------------------------------------------------------
-                if event.type == pygame.JOYBUTTONDOWN:
+                if event.type == _joy_button_down:
                     _detected = True
                 # Map a axis event
                 # --------------------------------------------------------
-                elif event.type == pygame.JOYAXISMOTION and (event.dict["value"] <= -1 or event.dict["value"] >= 1):
+                elif event.type == _joy_axis_motion and (event.dict["value"] <= -axis_press_threshold or event.dict["value"] >= axis_press_threshold):
                     _detected = True
                 # Map a hat event
                 # --------------------------------------------------------
-                elif event.type == pygame.JOYHATMOTION and (event.dict["value"][0] != 0 or event.dict["value"][1] != 0):
+                elif event.type == _joy_hat_motion and (event.dict["value"][0] != 0 or event.dict["value"][1] != 0):
                     _detected = True
 
         if _detected is True:
-            self._configuration_trigger_event = event
+            self.configuration.trigger_event = event
             self.status = Action.status_waiting
 
     def wait_for_trigger_release(self, event):
@@ -1187,27 +3855,29 @@ class Action(object):
         """
         _event_detected = False
 
+        _trigger_dict = self.configuration.trigger_event.dict
+
         if "joy" in event.dict:
-            if event.dict["joy"] == self._configuration_trigger_event.dict["joy"]:
+            if event.dict["joy"] == _trigger_dict["joy"] and event.dict.get("instance_id") == _trigger_dict.get("instance_id"):
                 # wait that the button is released
                 # --------------------------------------------------------
-                if event.type == pygame.JOYBUTTONUP and self._configuration_trigger_event.type == pygame.JOYBUTTONDOWN:
+                if event.type == _joy_button_up and self.configuration.trigger_event.type == _joy_button_down:
                     _button = event.dict["button"]
-                    _key = self._configuration_trigger_event.dict["button"]
+                    _key = self.configuration.trigger_event.dict["button"]
 
                     # test if the event is the one that triggered the configuration
                     if _button == _key:
                         # save section
-                        self._configuration_mapping_key = str(_key)
+                        self.configuration.mapping_key = str(_key)
                         _event_detected = True
 
                 # wait that a axis return the value 0, that means, that the axis is not moved anymore
                 # --------------------------------------------------------
-                elif event.type == pygame.JOYAXISMOTION and self._configuration_trigger_event.type == pygame.JOYAXISMOTION:
+                elif event.type == _joy_axis_motion and self.configuration.trigger_event.type == _joy_axis_motion:
                     _axis = event.dict["axis"]
                     _value = event.dict["value"]
-                    _axis_trigger = self._configuration_trigger_event.dict["axis"]
-                    _value_trigger = self._configuration_trigger_event.dict["value"]
+                    _axis_trigger = self.configuration.trigger_event.dict["axis"]
+                    _value_trigger = self.configuration.trigger_event.dict["value"]
 
                     # test if the event is the one that triggered the configuration
                     if _axis == _axis_trigger and _value != _value_trigger:
@@ -1219,25 +3889,25 @@ class Action(object):
                         _key = str(_axis_trigger) + ":" + str(_value_trigger)
 
                         # save section
-                        self._configuration_mapping_key = _key
+                        self.configuration.mapping_key = _key
                         _event_detected = True
 
                 # wait that the hat is released
                 # --------------------------------------------------------
-                elif event.type == pygame.JOYHATMOTION and self._configuration_trigger_event.type == pygame.JOYHATMOTION:
+                elif event.type == _joy_hat_motion and self.configuration.trigger_event.type == _joy_hat_motion:
                     _hat = str(event.dict["hat"])
-                    _hat_trigger = str(self._configuration_trigger_event.dict["hat"])
+                    _hat_trigger = str(self.configuration.trigger_event.dict["hat"])
                     _value_x = event.dict["value"][0]
                     _value_y = event.dict["value"][1]
-                    _value_x_trigger = self._configuration_trigger_event.dict["value"][0]
-                    _value_y_trigger = self._configuration_trigger_event.dict["value"][1]
+                    _value_x_trigger = self.configuration.trigger_event.dict["value"][0]
+                    _value_y_trigger = self.configuration.trigger_event.dict["value"][1]
 
                     # test if the event is the one that triggered the configuration  and the release event is of type central position
                     if _hat == _hat_trigger and _value_x == 0 and _value_y == 0:
                         _key = str(_hat_trigger) + ":" + str(_value_x_trigger) + ":" + str(_value_y_trigger)
 
                         # save section
-                        self._configuration_mapping_key = _key
+                        self.configuration.mapping_key = _key
                         _event_detected = True
 
             if _event_detected is True:
@@ -1256,17 +3926,17 @@ class Action(object):
         """
         _event_unmapped = True
 
-        if self._configuration_trigger_event.type == pygame.JOYBUTTONDOWN:
+        if self.configuration.trigger_event.type == _joy_button_down:
             # Test a button event
-            if self._configuration_mapping_key in controller.mapping['button'].keys():
+            if self.configuration.mapping_key in controller.mapping['button'].keys():
                 _event_unmapped = False
-        elif self._configuration_trigger_event.type == pygame.JOYAXISMOTION:
+        elif self.configuration.trigger_event.type == _joy_axis_motion:
             # Test a axis event
-            if self._configuration_mapping_key in controller.mapping['axis'].keys():
+            if self.configuration.mapping_key in controller.mapping['axis'].keys():
                 _event_unmapped = False
-        elif self._configuration_trigger_event.type == pygame.JOYHATMOTION:
+        elif self.configuration.trigger_event.type == _joy_hat_motion:
             # Test a hat event
-            if self._configuration_mapping_key in controller.mapping['hat'].keys():
+            if self.configuration.mapping_key in controller.mapping['hat'].keys():
                 _event_unmapped = False
 
         if _event_unmapped is True:
@@ -1295,16 +3965,16 @@ class Action(object):
         :param controller:              The controller to configure
         :type controller:               steuer.Controller
         """
-        # Clear pygame event queue
-        pygame.event.clear()
+        # Clear the event queue
+        get_backend().clear_events()
 
         # trigger the "wait" event
         if Action.on_wait is not None and _flags['use_events']:
             Action.on_wait(controller)
 
-        self._delay_counter -= 1
+        self.configuration.delay_counter -= 1
 
-        if self._delay_counter == 0:
+        if self.configuration.delay_counter == 0:
             self.status = Action.status_configured
 
     def map_event(self, controller):
@@ -1315,15 +3985,18 @@ class Action(object):
         :param controller:              The controller to configure
         :type controller:               steuer.Controller
         """
-        if self._configuration_trigger_event.type == pygame.JOYBUTTONDOWN:
+        if self.configuration.trigger_event.type == _joy_button_down:
             # Map a button event
-            controller.mapping['button'][str(self._configuration_mapping_key)] = {"Function": self.action}
-        elif self._configuration_trigger_event.type == pygame.JOYAXISMOTION:
+            controller.mapping['button'][str(self.configuration.mapping_key)] = {"Function": self.action}
+        elif self.configuration.trigger_event.type == _joy_axis_motion:
             # Map a axis event
-            controller.mapping['axis'][str(self._configuration_mapping_key)] = {"Function": self.action}
-        elif self._configuration_trigger_event.type == pygame.JOYHATMOTION:
+            controller.mapping['axis'][str(self.configuration.mapping_key)] = {"Function": self.action}
+        elif self.configuration.trigger_event.type == _joy_hat_motion:
             # Map a hat event
-            controller.mapping['hat'][str(self._configuration_mapping_key)] = {"Function": self.action}
+            controller.mapping['hat'][str(self.configuration.mapping_key)] = {"Function": self.action}
+
+        # update the dispatch tables of the controller
+        controller.compile_mapping()
 
         # trigger the "event mapped" event
         if Action.on_event_mapped is not None and _flags['use_events']:
@@ -1334,7 +4007,14 @@ class Action(object):
 # or it is a result of pressed actions. For example topleft is the combination of top and left
 # =====================================================================
 class Direction(object):
-    def __init__(self, action, value, long_name, short_name, on_heading=None, on_unheading=None):
+    # class variables
+    # *****************************************************************
+    # the attributes of a direction. The slots keep the direction small and the attribute access of the dispatch functions fast
+    __slots__ = ("action", "value", "long_name", "short_name", "on_heading", "on_unheading", "priority", "dispatch_policy", "dispatcher")
+
+    default_dispatcher = None   # Runs the callback functions of the directions that have no own dispatcher. None calls them inline
+
+    def __init__(self, action, value, long_name, short_name, on_heading=None, on_unheading=None, priority=0, dispatch_policy=None):
         """
         Constructor. Creates a direction and save it in Action.directions
 
@@ -1354,6 +4034,10 @@ class Direction(object):
         :type on_heading:               function
         :param on_unheading:            The callback function that is called when the controller is unheading in the direction
         :type on_unheading:             function
+        :param priority:                The priority of the callback functions in deferred mode. Higher priorities run first
+        :type priority:                 int
+        :param dispatch_policy:         DISPATCH_INLINE, DISPATCH_DEFERRED or DISPATCH_THREAD. None follows the mode of all directions
+        :type dispatch_policy:          int
         """
         # @formatter: off
         self.action = action                # The action that add its value to the direction bitmap
@@ -1362,6 +4046,37 @@ class Direction(object):
         self.short_name = short_name        # The short name of the direction
         self.on_heading = on_heading        # The callback function that is called when the controller is heading in the direction
         self.on_unheading = on_unheading    # The callback function that is called when the controller is unheading in the direction
+        self.priority = priority            # The priority of the callback functions in deferred mode
+        self.dispatch_policy = None         # The dispatch policy of the direction. None follows the mode of all directions
+        self.dispatcher = Direction.default_dispatcher  # Runs the callback functions of the direction. None calls them inline
         # @formatter: on
 
+        if dispatch_policy is not None:
+            self.set_dispatch_policy(dispatch_policy)
+
         Action.directions[str(value)] = self
+        Action.build_direction_transitions()
+
+    def set_dispatch_policy(self, dispatch_policy):
+        """
+        Set how the callback functions of the direction are run
+
+        :param dispatch_policy:         DISPATCH_INLINE, DISPATCH_DEFERRED or DISPATCH_THREAD
+        :type dispatch_policy:          int
+        """
+        self.dispatch_policy = dispatch_policy
+        self.dispatcher = _instrument_dispatcher(get_dispatcher(dispatch_policy))
+
+    @classmethod
+    def set_default_dispatcher(cls, dispatcher):
+        """
+        Set the dispatcher of all directions that have no own dispatch policy
+
+        :param dispatcher:              The dispatcher. None calls the callback functions inline
+        :type dispatcher:               steuer.CallbackQueue or steuer.ThreadDispatcher or steuer.InstrumentedDispatcher
+        """
+        cls.default_dispatcher = dispatcher
+
+        for _direction in Action.directions.values():
+            if _direction.dispatch_policy is None:
+                _direction.dispatcher = dispatcher
@@ -0,0 +1,163 @@
+import asyncio  # the event loop the actions are streamed to
+
+import pygame  # the controller framework
+
+import steuer  # the mapping logic
+
+# Steuer asyncio integration
+# ==========================================================================
+# Streams the actions of the connected controllers to coroutines:
+#
+#   async for record in steuer.aio.actions(rate_hz=1000):
+#       print(record.player, record.action, record.pressed)
+#
+# The stream pumps the pygame joystick events on a fixed cadence, runs them
+# through the steuer mapping and puts action records into a bounded queue.
+# If pumping fails, the waiting consumer gets the exception and the stream ends.
+# ==========================================================================
+
+# what to do when the queue of a stream is full
+OVERFLOW_BLOCK = 0          # stop pumping until the consumer takes a record
+OVERFLOW_DROP_NEWEST = 1    # drop the new record
+OVERFLOW_DROP_OLDEST = 2    # drop the oldest record in the queue
+
+# the pygame events that are pumped by the stream
+_joystick_events = [pygame.JOYAXISMOTION, pygame.JOYHATMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP]
+
+# an action that was pressed (pressed=True) or released (pressed=False) on a controller
+ActionRecord = steuer.ActionRecord
+
+
+def actions(rate_hz=1000, maxsize=256, overflow=OVERFLOW_DROP_OLDEST, use_callbacks=False):
+    """
+    Create a stream of the actions of the connected controllers. The stream starts pumping when it is iterated.
+
+    :param rate_hz:                     How often per second the pygame events are pumped
+    :type rate_hz:                      int
+    :param maxsize:                     The number of records the queue of the stream holds
+    :type maxsize:                      int
+    :param overflow:                    OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST or OVERFLOW_DROP_OLDEST
+    :type overflow:                     int
+    :param use_callbacks:               Defines if the callback functions of the actions are called as well (call_event semantics)
+    :type use_callbacks:                bool
+    :return:                            The stream
+    :rtype:                             steuer.aio.ActionStream
+    """
+    return ActionStream(rate_hz, maxsize, overflow, use_callbacks)
+
+
+# class that pumps pygame events and streams the resulting actions through a bounded queue
+# =====================================================================
+class ActionStream(object):
+    def __init__(self, rate_hz=1000, maxsize=256, overflow=OVERFLOW_DROP_OLDEST, use_callbacks=False):
+        """
+        Constructor.
+
+        :param rate_hz:                 How often per second the pygame events are pumped
+        :type rate_hz:                  int
+        :param maxsize:                 The number of records the queue of the stream holds
+        :type maxsize:                  int
+        :param overflow:                OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST or OVERFLOW_DROP_OLDEST
+        :type overflow:                 int
+        :param use_callbacks:           Defines if the callback functions of the actions are called as well (call_event semantics)
+        :type use_callbacks:            bool
+        """
+        # @formatter:off
+        self.period = 1.0 / rate_hz                 # the time between two pumps in seconds
+        self.overflow = overflow                    # the overflow policy
+        self.dropped_records = 0                    # the number of records dropped because the queue was full
+        self.queue = asyncio.Queue(maxsize)         # the action records
+        self.use_callbacks = use_callbacks          # flag that shows if the callback functions of the actions are called
+        self._pump_task = None                      # the task that pumps the pygame events
+        # @formatter:on
+
+    def __aiter__(self):
+        if self._pump_task is None:
+            self._pump_task = asyncio.ensure_future(self._pump())
+
+        return self
+
+    async def __anext__(self):
+        if not self.queue.empty() or self._pump_task is None:
+            return await self.queue.get()
+
+        # wait for the next record or the end of the pump task, whatever comes first
+        _get = asyncio.ensure_future(self.queue.get())
+
+        try:
+            await asyncio.wait((_get, self._pump_task), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not _get.done():
+                _get.cancel()
+
+        if _get.done() and not _get.cancelled():
+            return _get.result()
+
+        # the pump task ended. Raise its exception once, a closed stream ends the iteration
+        _pump_task = self._pump_task
+        self._pump_task = None
+
+        if not _pump_task.cancelled() and _pump_task.exception() is not None:
+            raise _pump_task.exception()
+
+        raise StopAsyncIteration
+
+    async def __aenter__(self):
+        return self.__aiter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Stop pumping the pygame events. Raises the exception of the pump task if it failed and no consumer got it
+        """
+        if self._pump_task is not None:
+            _pump_task = self._pump_task
+            self._pump_task = None
+            _pump_task.cancel()
+
+            try:
+                await _pump_task
+            except asyncio.CancelledError:
+                pass
+
+    async def _pump(self):
+        """
+        Pump the joystick events of the input backend on a fixed cadence and put the resulting action records into the queue
+        """
+        _loop = asyncio.get_running_loop()
+        _next_pump = _loop.time()
+
+        while True:
+            for _record in steuer.get_action_records(steuer.get_events(_joystick_events), self.use_callbacks):
+                await self._put(_record)
+
+            # wait for the next pump. If the pump is late, the cadence restarts from now
+            _next_pump += self.period
+            _delay = _next_pump - _loop.time()
+
+            if _delay < 0:
+                _next_pump -= _delay
+                _delay = 0
+
+            await asyncio.sleep(_delay)
+
+    async def _put(self, record):
+        """
+        Put a record into the queue according to the overflow policy
+
+        :param record:                  The action record
+        :type record:                   steuer.ActionRecord
+        """
+        if not self.queue.full():
+            self.queue.put_nowait(record)
+        elif self.overflow == OVERFLOW_BLOCK:
+            await self.queue.put(record)
+        elif self.overflow == OVERFLOW_DROP_OLDEST:
+            self.queue.get_nowait()
+            self.queue.put_nowait(record)
+            self.dropped_records += 1
+        else:
+            self.dropped_records += 1
+
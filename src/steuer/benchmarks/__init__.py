@@ -0,0 +1,468 @@
+import gc  # disabled while measuring
+import json  # used to save the results
+import operator  # used to read the attributes of the objects
+import platform  # used to describe the machine in the results
+import random  # used to generate the synthetic events
+import sys  # used to count the retained memory blocks
+import time  # used to measure the dispatch functions
+import tracemalloc  # used to measure the memory of the dispatch functions
+
+import pygame  # the controller framework
+
+import steuer  # the dispatch functions
+
+# Steuer benchmarks
+# ==========================================================================
+# Measures the dispatch functions with synthetic pygame events. No controller
+# hardware and no display is needed:
+#
+#   python -m steuer.benchmarks --output results.json
+#
+# Every scenario is run for every number of controllers and every dispatch mode.
+# The results contain events per second, nanoseconds per event, the number of
+# memory blocks per event that are still allocated after a run and the traced
+# memory peak of a run. Python has no counter of the allocations, so the
+# retained blocks show memory growth (caches, leaks), not the allocation rate.
+# The object benchmark compares the memory and the attribute access time of the
+# slotted Controller, Action and Direction objects with __dict__ based copies.
+# ==========================================================================
+
+# the name of the virtual controller type the benchmark maps
+CONTROLLER_NAME = "steuer benchmark controller"
+
+# the mapping of the virtual controller type
+MAPPING = {
+    "button": dict((str(_button), {"Function": _function}) for _button, _function in enumerate([
+        "BUTTON_TOP", "BUTTON_DOWN", "BUTTON_LEFT", "BUTTON_RIGHT", "SHOULDER_L1", "SHOULDER_L2",
+        "SHOULDER_R1", "SHOULDER_R2", "ANALOG_L3", "ANALOG_R3", "BUTTON_START", "BUTTON_SELECT"])),
+    "axis": {
+        "0:<": {"Function": "DPAD_LEFT"},
+        "0:>": {"Function": "DPAD_RIGHT"},
+        "1:<": {"Function": "DPAD_TOP"},
+        "1:>": {"Function": "DPAD_DOWN"}
+    },
+    "hat": {
+        "0:-1:0": {"Function": "DPAD_LEFT"},
+        "0:1:0": {"Function": "DPAD_RIGHT"},
+        "0:0:1": {"Function": "DPAD_TOP"},
+        "0:0:-1": {"Function": "DPAD_DOWN"}
+    }
+}
+
+# the directions of the dpad
+_directions = [
+    ("DPAD_TOP", 0b0001), ("DPAD_DOWN", 0b0010), ("DPAD_LEFT", 0b0100), ("DPAD_RIGHT", 0b1000),
+    ("DPAD_TOPLEFT", 0b0101), ("DPAD_TOPRIGHT", 0b1001), ("DPAD_DOWNLEFT", 0b0110), ("DPAD_DOWNRIGHT", 0b1010)
+]
+
+
+def _callback(controller):
+    """
+    Callback function of the benchmark actions and directions. Does nothing
+    """
+    pass
+
+
+# scenarios
+# **************************************************************************
+def button_mashing(number_of_controllers, number_of_events, seed=0):
+    """
+    Buttons pressed and released at random on all controllers
+
+    :param number_of_controllers:       The number of controllers
+    :type number_of_controllers:        int
+    :param number_of_events:            The number of events
+    :type number_of_events:             int
+    :param seed:                        The seed of the random events
+    :type seed:                         int
+    :return:                            The events
+    :rtype:                             list
+    """
+    _random = random.Random(seed)
+    _pressed = [set() for _ in range(number_of_controllers)]
+    _events = []
+
+    while len(_events) < number_of_events:
+        _joy = _random.randrange(number_of_controllers)
+        _button = _random.randrange(12)
+
+        if _button in _pressed[_joy]:
+            _pressed[_joy].discard(_button)
+            _events.append(pygame.event.Event(pygame.JOYBUTTONUP, joy=_joy, button=_button))
+        else:
+            _pressed[_joy].add(_button)
+            _events.append(pygame.event.Event(pygame.JOYBUTTONDOWN, joy=_joy, button=_button))
+
+    return _events
+
+
+def stick_noise(number_of_controllers, number_of_events, seed=0):
+    """
+    Noisy analog sticks that are moved between the center and the edges
+
+    :param number_of_controllers:       The number of controllers
+    :type number_of_controllers:        int
+    :param number_of_events:            The number of events
+    :type number_of_events:             int
+    :param seed:                        The seed of the random events
+    :type seed:                         int
+    :return:                            The events
+    :rtype:                             list
+    """
+    _random = random.Random(seed)
+    _events = []
+
+    while len(_events) < number_of_events:
+        _target = _random.choice((-1.0, 0.0, 1.0))
+        _value = min(1.0, max(-1.0, _target + _random.gauss(0.0, 0.05)))
+        _events.append(pygame.event.Event(pygame.JOYAXISMOTION, joy=_random.randrange(number_of_controllers), axis=_random.randrange(2), value=_value))
+
+    return _events
+
+
+def hat_sweeps(number_of_controllers, number_of_events, seed=0):
+    """
+    Hats that are swept around all 8 positions and back to the center
+
+    :param number_of_controllers:       The number of controllers
+    :type number_of_controllers:        int
+    :param number_of_events:            The number of events
+    :type number_of_events:             int
+    :param seed:                        The seed of the random events
+    :type seed:                         int
+    :return:                            The events
+    :rtype:                             list
+    """
+    _positions = [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1), (0, 0)]
+    _random = random.Random(seed)
+    _position = [0] * number_of_controllers
+    _events = []
+
+    while len(_events) < number_of_events:
+        _joy = _random.randrange(number_of_controllers)
+        _position[_joy] = (_position[_joy] + 1) % len(_positions)
+        _events.append(pygame.event.Event(pygame.JOYHATMOTION, joy=_joy, hat=0, value=_positions[_position[_joy]]))
+
+    return _events
+
+
+def mixed(number_of_controllers, number_of_events, seed=0):
+    """
+    A mix of button mashing, stick noise and hat sweeps
+
+    :param number_of_controllers:       The number of controllers
+    :type number_of_controllers:        int
+    :param number_of_events:            The number of events
+    :type number_of_events:             int
+    :param seed:                        The seed of the random events
+    :type seed:                         int
+    :return:                            The events
+    :rtype:                             list
+    """
+    _events = button_mashing(number_of_controllers, number_of_events // 2, seed)
+    _events += stick_noise(number_of_controllers, number_of_events // 3, seed)
+    _events += hat_sweeps(number_of_controllers, number_of_events - len(_events), seed)
+    random.Random(seed).shuffle(_events)
+
+    return _events
+
+
+SCENARIOS = {
+    "button_mashing": button_mashing,
+    "stick_noise": stick_noise,
+    "hat_sweeps": hat_sweeps,
+    "mixed": mixed
+}
+
+
+# dispatch modes
+# **************************************************************************
+def _run_each(dispatch_function):
+    """
+    Create a runner that calls a dispatch function for every event
+    """
+    def _run(events):
+        for event in events:
+            dispatch_function(event)
+
+    return _run
+
+
+def _run_batches(batch_size, **kwargs):
+    """
+    Create a runner that calls steuer.process_events for batches of events
+    """
+    def _run(events):
+        for _start in range(0, len(events), batch_size):
+            steuer.process_events(events[_start:_start + batch_size], **kwargs)
+
+    return _run
+
+
+MODES = {
+    "get_action": _run_each(steuer.get_action),
+    "call_event": _run_each(steuer.call_event),
+    "call_event_and_direction": _run_each(steuer.call_event_and_direction),
+    "process_events": _run_batches(64),
+    "process_events_coalesced": _run_batches(64, coalesce=True)
+}
+
+
+# runner
+# **************************************************************************
+def setup(number_of_controllers):
+    """
+    Register the benchmark actions and directions and replace the controllers of steuer by mapped virtual controllers.
+    Actions and directions that are already registered are kept
+
+    :param number_of_controllers:       The number of virtual controllers
+    :type number_of_controllers:        int
+    :return:                            The controllers of steuer before the setup
+    :rtype:                             list
+    """
+    for _function in set(_entry["Function"] for _section in MAPPING.values() for _entry in _section.values()):
+        if _function not in steuer.Action.actions:
+            steuer.Action(_function, getattr(steuer, _function), _function, _function, _callback, _callback)
+            steuer.Action.unconfigured_actions.pop()
+
+    for _name, _value in _directions:
+        if str(_value) not in steuer.Action.directions:
+            steuer.Direction(_name, _value, _name, _name, _callback, _callback)
+
+    _previous_controllers = list(steuer.controllers)
+    for _controller in _previous_controllers:
+        steuer._remove_controller(_controller)
+
+    for _number in range(number_of_controllers):
+        _controller = steuer.Controller(_number, CONTROLLER_NAME)
+        _controller.set_mapping(MAPPING)
+        steuer._add_controller(_controller)
+
+    return _previous_controllers
+
+
+def _reset_controllers():
+    """
+    Reset the state of the virtual controllers
+    """
+    for _controller in steuer.controllers:
+        _controller.bits = 0
+        _controller._last_axis_action.clear()
+        _controller._last_hat_action.clear()
+
+
+def measure(run, events, repeat=5):
+    """
+    Measure a dispatch mode
+
+    :param run:                         The runner of the dispatch mode
+    :type run:                          function
+    :param events:                      The events
+    :type events:                       list
+    :param repeat:                      How often the events are run. The fastest run counts
+    :type repeat:                       int
+    :return:                            events, events_per_sec, ns_per_event, retained_blocks_per_event (memory blocks per event
+                                        that are still allocated after a run, not the number of allocations) and traced_peak_bytes
+    :rtype:                             dict
+    """
+    _number_of_events = len(events)
+    _best = None
+
+    _gc_was_enabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        for _ in range(repeat):
+            _reset_controllers()
+            _start = time.perf_counter()
+            run(events)
+            _duration = time.perf_counter() - _start
+
+            if _best is None or _duration < _best:
+                _best = _duration
+
+        # memory blocks that are still allocated after the run. Blocks that are allocated and freed during the run are not counted
+        _reset_controllers()
+        _blocks = sys.getallocatedblocks()
+        run(events)
+        _retained_blocks = sys.getallocatedblocks() - _blocks
+
+        # peak of the memory allocated during a run
+        _reset_controllers()
+        tracemalloc.start()
+        run(events)
+        _traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        if _gc_was_enabled:
+            gc.enable()
+
+    return {
+        "events": _number_of_events,
+        "events_per_sec": _number_of_events / _best if _best > 0 else None,
+        "ns_per_event": _best * 1e9 / _number_of_events,
+        "retained_blocks_per_event": float(_retained_blocks) / _number_of_events,
+        "traced_peak_bytes": _traced_peak
+    }
+
+
+def run(scenarios=None, modes=None, controller_counts=(1, 8, 64), number_of_events=20000, repeat=5):
+    """
+    Run the benchmarks
+
+    :param scenarios:                   Names of the scenarios to run. None runs all scenarios
+    :type scenarios:                    list
+    :param modes:                       Names of the dispatch modes to run. None runs all modes
+    :type modes:                        list
+    :param controller_counts:           The numbers of controllers to run every scenario with
+    :type controller_counts:            list
+    :param number_of_events:            The number of events per scenario
+    :type number_of_events:             int
+    :param repeat:                      How often every measurement is repeated
+    :type repeat:                       int
+    :return:                            The results
+    :rtype:                             dict
+    """
+    _results = []
+
+    for _number_of_controllers in controller_counts:
+        _previous_controllers = setup(_number_of_controllers)
+
+        try:
+            for _scenario in scenarios or sorted(SCENARIOS):
+                _events = SCENARIOS[_scenario](_number_of_controllers, number_of_events)
+
+                for _mode in modes or sorted(MODES):
+                    _result = {"scenario": _scenario, "controllers": _number_of_controllers, "mode": _mode}
+                    _result.update(measure(MODES[_mode], _events, repeat))
+                    _results.append(_result)
+        finally:
+            for _controller in list(steuer.controllers):
+                steuer._remove_controller(_controller)
+            for _controller in _previous_controllers:
+                steuer._add_controller(_controller)
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "results": _results
+    }
+
+
+# objects
+# **************************************************************************
+# the attributes the dispatch functions read per event
+HOT_ATTRIBUTES = {
+    "Controller": ("_bits_store", "_bits_index", "_button_actions", "_axis_actions", "_hat_actions", "number"),
+    "Action": ("value", "on_pressed", "on_released", "dispatcher", "priority"),
+    "Direction": ("value", "on_heading", "on_unheading", "dispatcher", "priority")
+}
+
+
+def _unslotted(cls):
+    """
+    Create a copy of a slotted class that keeps its attributes in a __dict__
+    """
+    _namespace = dict((_name, _value) for _name, _value in vars(cls).items() if _name not in cls.__slots__ and _name != "__slots__")
+
+    return type(cls.__name__, (object,), _namespace)
+
+
+def _build(cls, prototype, number_of_objects):
+    """
+    Create objects of a class with the attribute values of a prototype, without running the constructor
+    """
+    _attributes = [(_name, getattr(prototype, _name)) for _name in type(prototype).__slots__]
+    _objects = [None] * number_of_objects
+
+    for _index in range(number_of_objects):
+        _object = cls.__new__(cls)
+        for _name, _value in _attributes:
+            setattr(_object, _name, _value)
+        _objects[_index] = _object
+
+    return _objects
+
+
+def _measure_objects(cls, prototype, attributes, number_of_objects, repeat):
+    """
+    Measure the memory and the attribute access time of objects of a class
+    """
+    _gc_was_enabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        tracemalloc.start()
+        _objects = _build(cls, prototype, number_of_objects)
+        _traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        _get = operator.attrgetter(*attributes)
+        _best = None
+        for _ in range(repeat):
+            _start = time.perf_counter()
+            for _object in _objects:
+                _get(_object)
+            _duration = time.perf_counter() - _start
+
+            if _best is None or _duration < _best:
+                _best = _duration
+    finally:
+        if _gc_was_enabled:
+            gc.enable()
+
+    return {
+        "bytes_per_object": float(_traced) / number_of_objects,
+        "ns_per_access": _best * 1e9 / (number_of_objects * len(attributes))
+    }
+
+
+def run_objects(number_of_objects=10000, repeat=5):
+    """
+    Compare the memory and the attribute access time of the slotted Controller, Action and Direction objects with
+    copies of the classes that keep the attributes in a __dict__
+
+    :param number_of_objects:           The number of objects per class
+    :type number_of_objects:            int
+    :param repeat:                      How often the attribute access is measured. The fastest run counts
+    :type repeat:                       int
+    :return:                            The results
+    :rtype:                             list
+    """
+    _previous_controllers = setup(1)
+
+    try:
+        _prototypes = {
+            "Controller": steuer.controllers[0],
+            "Action": steuer.Action.actions["BUTTON_TOP"],
+            "Direction": steuer.Action.directions[str(steuer.DPAD_TOP)]
+        }
+
+        _results = []
+        for _class in (steuer.Controller, steuer.Action, steuer.Direction):
+            _name = _class.__name__
+            for _layout, _layout_class in (("slots", _class), ("dict", _unslotted(_class))):
+                _result = {"class": _name, "layout": _layout, "objects": number_of_objects}
+                _result.update(_measure_objects(_layout_class, _prototypes[_name], HOT_ATTRIBUTES[_name], number_of_objects, repeat))
+                _results.append(_result)
+    finally:
+        for _controller in list(steuer.controllers):
+            steuer._remove_controller(_controller)
+        for _controller in _previous_controllers:
+            steuer._add_controller(_controller)
+
+    return _results
+
+
+def save(results, path):
+    """
+    Save the results as json file
+
+    :param results:                     The results of run
+    :type results:                      dict
+    :param path:                        The path of the json file
+    :type path:                         string
+    """
+    with open(path, "w") as _file:
+        json.dump(results, _file, indent=2, sort_keys=True)
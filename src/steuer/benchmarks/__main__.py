@@ -0,0 +1,48 @@
+import argparse  # the command line options
+import os  # used to select the SDL dummy video driver
+
+# run headless. Has to be set before pygame is initialized
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import steuer.benchmarks  # the benchmarks
+
+
+def main():
+    """
+    Run the benchmarks from the command line and print or save the results
+    """
+    _parser = argparse.ArgumentParser(prog="python -m steuer.benchmarks", description="Benchmark the steuer dispatch functions with synthetic events")
+    _parser.add_argument("--events", type=int, default=20000, help="number of events per scenario")
+    _parser.add_argument("--controllers", default="1,8,64", help="comma separated numbers of controllers")
+    _parser.add_argument("--scenarios", default=None, help="comma separated scenarios: " + ", ".join(sorted(steuer.benchmarks.SCENARIOS)))
+    _parser.add_argument("--modes", default=None, help="comma separated dispatch modes: " + ", ".join(sorted(steuer.benchmarks.MODES)))
+    _parser.add_argument("--repeat", type=int, default=5, help="how often every measurement is repeated")
+    _parser.add_argument("--objects", type=int, default=10000, help="number of objects per class of the object benchmark. 0 skips it")
+    _parser.add_argument("--output", default=None, help="path of the json results file")
+    _arguments = _parser.parse_args()
+
+    _results = steuer.benchmarks.run(
+        _arguments.scenarios.split(",") if _arguments.scenarios else None,
+        _arguments.modes.split(",") if _arguments.modes else None,
+        [int(_count) for _count in _arguments.controllers.split(",")],
+        _arguments.events,
+        _arguments.repeat)
+
+    print("{0:<16} {1:>11} {2:<26} {3:>14} {4:>10} {5:>14}".format("scenario", "controllers", "mode", "events/s", "ns/event", "retained/event"))
+    for _result in _results["results"]:
+        print("{scenario:<16} {controllers:>11} {mode:<26} {events_per_sec:>14.0f} {ns_per_event:>10.0f} {retained_blocks_per_event:>14.3f}".format(**_result))
+
+    if _arguments.objects > 0:
+        _results["objects"] = steuer.benchmarks.run_objects(_arguments.objects, _arguments.repeat)
+
+        print("")
+        print("{0:<16} {1:<6} {2:>16} {3:>14}".format("class", "layout", "bytes/object", "ns/access"))
+        for _result in _results["objects"]:
+            print("{class:<16} {layout:<6} {bytes_per_object:>16.1f} {ns_per_access:>14.2f}".format(**_result))
+
+    if _arguments.output is not None:
+        steuer.benchmarks.save(_results, _arguments.output)
+
+
+if __name__ == "__main__":
+    main()
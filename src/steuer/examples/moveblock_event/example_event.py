@@ -253,6 +253,7 @@ steuer.Direction('DPAD_DOWNLEFT', 0b0110, 'DPad down left', 'Down Left')
 steuer.Direction('DPAD_DOWNRIGHT', 0b1010, 'DPad down right', 'Down Right')
 
 # Module init
+steuer.configure_logging('logging.conf')
 steuer.init()
 
 # detect connected controllers
@@ -188,6 +188,7 @@ steuer.Action('BUTTON_SELECT', 4194304, 'Button select', 'BSelect'),
 
 # Module initialization
 # ======================================================================================================
+steuer.configure_logging('logging.conf')
 steuer.init()
 
 # Controller detection and configuration
@@ -690,6 +690,7 @@ steuer.Direction('DPAD_DOWNRIGHT', 0b1010, 'DPad down right', 'Down Right', dpad
 
 # Module initialization
 # ======================================================================================================
+steuer.configure_logging('logging.conf')
 steuer.init()
 
 # Controller detection and configuration
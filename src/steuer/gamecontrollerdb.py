@@ -0,0 +1,256 @@
+import re  # used to normalize the controller names
+import sys  # used to detect the platform of the mappings
+
+# Steuer SDL GameControllerDB importer
+# ==========================================================================
+# Converts the mappings of the SDL GameControllerDB (gamecontrollerdb.txt) into
+# the button/axis/hat mappings of steuer:
+#
+#   steuer.init(gamecontrollerdb="gamecontrollerdb.txt")
+#
+# A line of the database is "GUID,name,element:binding,...,platform:Linux,".
+# The bindings are buttons (b3), hats (h0.4), axes (a1), half axes (+a2, -a2)
+# and inverted axes (a1~). Only the mappings of the current platform are
+# imported, because the numbering of the buttons and axes differs per platform.
+# The mappings are indexed by GUID and by normalized name.
+# ==========================================================================
+
+# SDL element -> steuer function of buttons, hats and half axes
+ELEMENT_FUNCTIONS = {
+    "a": "BUTTON_DOWN",
+    "b": "BUTTON_RIGHT",
+    "x": "BUTTON_LEFT",
+    "y": "BUTTON_TOP",
+    "back": "BUTTON_SELECT",
+    "start": "BUTTON_START",
+    "guide": "BUTTON_HOME",
+    "leftshoulder": "SHOULDER_L1",
+    "rightshoulder": "SHOULDER_R1",
+    "lefttrigger": "SHOULDER_L2",
+    "righttrigger": "SHOULDER_R2",
+    "leftstick": "ANALOG_L3",
+    "rightstick": "ANALOG_R3",
+    "dpup": "DPAD_TOP",
+    "dpdown": "DPAD_DOWN",
+    "dpleft": "DPAD_LEFT",
+    "dpright": "DPAD_RIGHT"
+}
+
+# SDL stick axis element -> steuer functions of the negative and the positive side
+AXIS_FUNCTIONS = {
+    "leftx": ("LEFT_STICK_LEFT", "LEFT_STICK_RIGHT"),
+    "lefty": ("LEFT_STICK_TOP", "LEFT_STICK_DOWN"),
+    "rightx": ("RIGHT_STICK_LEFT", "RIGHT_STICK_RIGHT"),
+    "righty": ("RIGHT_STICK_TOP", "RIGHT_STICK_DOWN")
+}
+
+# SDL hat mask -> (x, y) of the pygame hat value
+HAT_VALUES = {
+    1: (0, 1),
+    2: (1, 0),
+    4: (0, -1),
+    8: (-1, 0)
+}
+
+# sys.platform -> SDL platform name
+PLATFORMS = {
+    "linux": "Linux",
+    "win32": "Windows",
+    "cygwin": "Windows",
+    "darwin": "Mac OS X"
+}
+
+_binding = re.compile(r"^([+-]?)([abh])(\d+)(?:\.(\d+))?(~?)$")
+_non_alphanumeric = re.compile(r"[^0-9a-z]+")
+
+
+def get_platform():
+    """
+    Get the SDL platform name of the current platform
+
+    :return:                            The platform name. Example: "Linux"
+    :rtype:                             string
+    """
+    for _prefix, _platform in PLATFORMS.items():
+        if sys.platform.startswith(_prefix):
+            return _platform
+
+    return None
+
+
+def normalize_name(name):
+    """
+    Normalize a controller name for the name index. Case, punctuation and whitespace are ignored
+
+    :param name:                        The controller name
+    :type name:                         string
+    :return:                            The normalized name. Example: "xboxwirelesscontroller"
+    :rtype:                             string
+    """
+    return _non_alphanumeric.sub("", name.lower())
+
+
+def normalize_guid(guid):
+    """
+    Normalize a SDL GUID for the GUID index. The CRC of the name that newer SDL versions put into
+    bytes 2-3 is cleared, as SDL does when it looks up a mapping
+
+    :param guid:                        The GUID as hex string
+    :type guid:                         string
+    :return:                            The normalized GUID
+    :rtype:                             string
+    """
+    _guid = guid.lower()
+
+    if len(_guid) == 32:
+        _guid = _guid[:4] + "0000" + _guid[8:]
+
+    return _guid
+
+
+def parse_line(line):
+    """
+    Parse a line of the SDL GameControllerDB
+
+    :param line:                        The line
+    :type line:                         string
+    :return:                            (guid, name, platform, mapping) or None if the line is no mapping
+    :rtype:                             tuple
+    """
+    line = line.strip()
+
+    if not line or line.startswith("#"):
+        return None
+
+    _fields = line.split(",")
+    if len(_fields) < 3:
+        return None
+
+    _guid, _name = _fields[0], _fields[1]
+    _platform = None
+    _mapping = {"button": {}, "axis": {}, "hat": {}}
+
+    for _field in _fields[2:]:
+        _element, _separator, _value = _field.partition(":")
+        if not _separator:
+            continue
+
+        if _element == "platform":
+            _platform = _value
+            continue
+
+        _match = _binding.match(_value)
+        if _match is None:
+            continue
+
+        _half, _kind, _index, _hat_mask, _inverted = _match.groups()
+
+        if _element in AXIS_FUNCTIONS and _kind == "a":
+            _negative, _positive = AXIS_FUNCTIONS[_element]
+            if _inverted:
+                _negative, _positive = _positive, _negative
+            _mapping["axis"][_index + ":<"] = {"Function": _negative}
+            _mapping["axis"][_index + ":>"] = {"Function": _positive}
+            continue
+
+        _function = ELEMENT_FUNCTIONS.get(_element)
+        if _function is None:
+            continue
+
+        if _kind == "b":
+            _mapping["button"][_index] = {"Function": _function}
+        elif _kind == "h":
+            _hat_value = HAT_VALUES.get(int(_hat_mask or 0))
+            if _hat_value is not None:
+                _mapping["hat"]["{0}:{1}:{2}".format(_index, _hat_value[0], _hat_value[1])] = {"Function": _function}
+        elif _half == "-":
+            _mapping["axis"][_index + ":<"] = {"Function": _function}
+        else:
+            # triggers and full axes are pressed on the positive side, unless they are inverted
+            _mapping["axis"][_index + (":<" if _inverted else ":>")] = {"Function": _function}
+
+    return _guid, _name, _platform, _mapping
+
+
+# class that holds the imported mappings of a SDL GameControllerDB, indexed by GUID and normalized name
+# =====================================================================
+class GameControllerDB(object):
+    def __init__(self, path=None, platform=None):
+        """
+        Constructor. Imports the database file, if one is given
+
+        :param path:                    The path of the gamecontrollerdb.txt file
+        :type path:                     string
+        :param platform:                The platform whose mappings are imported. None imports the mappings of the current platform
+        :type platform:                 string
+        """
+        # @formatter:off
+        self.platform = platform if platform is not None else get_platform()   # the platform whose mappings are imported
+        self.by_guid = {}                                                       # normalized GUID -> (name, mapping)
+        self.by_name = {}                                                       # normalized name -> (name, mapping)
+        # @formatter:on
+
+        if path is not None:
+            self.load(path)
+
+    def load(self, path):
+        """
+        Import the mappings of a database file. Later lines override earlier ones
+
+        :param path:                    The path of the gamecontrollerdb.txt file
+        :type path:                     string
+        :return:                        The number of imported mappings
+        :rtype:                         int
+        """
+        with open(path, encoding="utf-8", errors="replace") as _file:
+            return self.add_lines(_file)
+
+    def add_lines(self, lines):
+        """
+        Import the mappings of database lines
+
+        :param lines:                   The lines
+        :type lines:                    iterable
+        :return:                        The number of imported mappings
+        :rtype:                         int
+        """
+        _imported = 0
+
+        for _line in lines:
+            _entry = parse_line(_line)
+            if _entry is None:
+                continue
+
+            _guid, _name, _platform, _mapping = _entry
+            if _platform is not None and self.platform is not None and _platform != self.platform:
+                continue
+
+            self.by_guid[normalize_guid(_guid)] = (_name, _mapping)
+            self.by_name[normalize_name(_name)] = (_name, _mapping)
+            _imported += 1
+
+        return _imported
+
+    def find(self, guid=None, name=None):
+        """
+        Find the mapping of a controller type. The GUID is looked up first, then the name
+
+        :param guid:                    The SDL GUID of the controller type
+        :type guid:                     string
+        :param name:                    The name of the controller type
+        :type name:                     string
+        :return:                        (name, mapping) or None if the controller type is unknown
+        :rtype:                         tuple
+        """
+        if guid:
+            _entry = self.by_guid.get(normalize_guid(guid))
+            if _entry is not None:
+                return _entry
+
+        if name:
+            return self.by_name.get(normalize_name(name))
+
+        return None
+
+    def __len__(self):
+        return len(self.by_guid)
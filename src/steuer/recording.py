@@ -0,0 +1,348 @@
+import mmap  # used to replay recordings without loading them
+import struct  # used for the fixed-width records
+import time  # used to timestamp the records and to replay in real time
+
+import pygame  # the controller framework
+
+import steuer  # the dispatch functions that are recorded and replayed
+
+# Steuer recording
+# ==========================================================================
+# Records the controller events that go through steuer.get_action, steuer.call_event,
+# steuer.call_event_and_direction and steuer.process_events into a compact binary log
+# and replays them:
+#
+#   recorder = steuer.recording.Recorder("session.steuer")
+#   recorder.start()
+#   ...
+#   recorder.stop()
+#
+#   steuer.recording.Replayer("session.steuer").replay(realtime=False)
+#
+# The file starts with a header, followed by fixed-width little endian records:
+# timestamp (double, seconds since the start of the recording), joy (uint16),
+# instance id (int32, -1 if the event had none), dispatch function (uint8),
+# event type (uint8), index (uint16: button, axis or hat), value (float: axis value
+# or hat x) and value2 (float: hat y).
+# The events of one process_events call share their timestamp and are replayed as one
+# batch. While recording, the dispatch functions of the steuer module are replaced by
+# recording wrappers. Code that holds references to the original functions is not recorded.
+#
+# The recorded instance ids are only valid in the recorded session. On replay, events
+# whose instance id doesn't belong to the connected controller of their joy get the
+# instance id of that controller, or are looked up by their joy (see Replayer.events).
+# ==========================================================================
+
+# file header and record layout
+_header = b"STEUERR\x02"
+_record = struct.Struct("<dHiBBHff")
+
+# the recorded dispatch functions
+DISPATCH_GET_ACTION = 0
+DISPATCH_CALL_EVENT = 1
+DISPATCH_CALL_EVENT_AND_DIRECTION = 2
+DISPATCH_PROCESS_EVENTS = 3                         # process_events(use_callbacks=False)
+DISPATCH_PROCESS_EVENTS_AND_CALL_EVENT = 4          # process_events(use_callbacks=True)
+DISPATCH_PROCESS_EVENTS_AND_DIRECTION = 5           # process_events(use_directions=True)
+
+# the recorded event types
+EVENT_BUTTON_DOWN = 0
+EVENT_BUTTON_UP = 1
+EVENT_AXIS_MOTION = 2
+EVENT_HAT_MOTION = 3
+
+# pygame event type -> recorded event type
+_event_types = {
+    pygame.JOYBUTTONDOWN: EVENT_BUTTON_DOWN,
+    pygame.JOYBUTTONUP: EVENT_BUTTON_UP,
+    pygame.JOYAXISMOTION: EVENT_AXIS_MOTION,
+    pygame.JOYHATMOTION: EVENT_HAT_MOTION
+}
+
+# recorded event type -> pygame event type
+_pygame_event_types = dict((_event_type, _pygame_event_type) for _pygame_event_type, _event_type in _event_types.items())
+
+
+# class that records the events of the dispatch functions to a file
+# =====================================================================
+class Recorder(object):
+    def __init__(self, path):
+        """
+        Constructor.
+
+        :param path:                    The path of the recording file. An existing file is overwritten
+        :type path:                     string
+        """
+        # @formatter:off
+        self.path = path                # the path of the recording file
+        self.records = 0                # the number of recorded events
+        self._file = None               # the recording file while recording
+        self._start = 0.0               # the start time of the recording
+        self._originals = None          # the original dispatch functions and process_events while recording
+        # @formatter:on
+
+    def start(self):
+        """
+        Start recording. Replaces the dispatch functions and process_events of the steuer module with recording wrappers
+        """
+        if self._file is not None:
+            return
+
+        self._file = open(self.path, "wb")
+        self._file.write(_header)
+        self._start = time.perf_counter()
+        self._originals = (steuer.get_action, steuer.call_event, steuer.call_event_and_direction, steuer.process_events)
+
+        steuer.get_action = self._wrap(steuer.get_action, DISPATCH_GET_ACTION)
+        steuer.call_event = self._wrap(steuer.call_event, DISPATCH_CALL_EVENT)
+        steuer.call_event_and_direction = self._wrap(steuer.call_event_and_direction, DISPATCH_CALL_EVENT_AND_DIRECTION)
+        steuer.process_events = self._wrap_process_events(steuer.process_events)
+
+    def stop(self):
+        """
+        Stop recording. Restores the dispatch functions of the steuer module
+        """
+        if self._file is None:
+            return
+
+        steuer.get_action, steuer.call_event, steuer.call_event_and_direction, steuer.process_events = self._originals
+        self._originals = None
+
+        self._file.close()
+        self._file = None
+
+    def _wrap(self, dispatch_function, dispatch):
+        """
+        Create a recording wrapper of a dispatch function
+
+        :param dispatch_function:       The dispatch function
+        :type dispatch_function:        function
+        :param dispatch:                DISPATCH_GET_ACTION, DISPATCH_CALL_EVENT or DISPATCH_CALL_EVENT_AND_DIRECTION
+        :type dispatch:                 int
+        :return:                        The wrapper
+        :rtype:                         function
+        """
+        _write = self._file.write
+        _timer = time.perf_counter
+        _start = self._start
+
+        def _recording_dispatch(event):
+            _record_data = _pack_event(_timer() - _start, dispatch, event)
+
+            if _record_data is not None:
+                _write(_record_data)
+                self.records += 1
+
+            return dispatch_function(event)
+
+        return _recording_dispatch
+
+    def _wrap_process_events(self, process_events):
+        """
+        Create a recording wrapper of process_events. The events of a call are recorded with the same timestamp
+
+        :param process_events:          The process_events function
+        :type process_events:           function
+        :return:                        The wrapper
+        :rtype:                         function
+        """
+        _write = self._file.write
+        _timer = time.perf_counter
+        _start = self._start
+
+        def _recording_process_events(events, use_callbacks=True, use_directions=False, coalesce=False):
+            # the coalesced events are recorded, so the replay doesn't depend on the coalescing
+            if coalesce:
+                events = steuer.coalesce_events(events)
+
+            if use_directions:
+                _dispatch = DISPATCH_PROCESS_EVENTS_AND_DIRECTION
+            elif use_callbacks:
+                _dispatch = DISPATCH_PROCESS_EVENTS_AND_CALL_EVENT
+            else:
+                _dispatch = DISPATCH_PROCESS_EVENTS
+
+            _timestamp = _timer() - _start
+
+            for event in events:
+                _record_data = _pack_event(_timestamp, _dispatch, event)
+
+                if _record_data is not None:
+                    _write(_record_data)
+                    self.records += 1
+
+            return process_events(events, use_callbacks, use_directions)
+
+        return _recording_process_events
+
+
+def _pack_event(timestamp, dispatch, event):
+    """
+    Pack a controller event into a record
+
+    :param timestamp:                   The time since the start of the recording
+    :type timestamp:                    float
+    :param dispatch:                    The recorded dispatch function. Example: DISPATCH_GET_ACTION
+    :type dispatch:                     int
+    :param event:                       The pygame event
+    :type event:                        pygame.Event
+    :return:                            The record or None if the event is no button, axis or hat event
+    :rtype:                             bytes
+    """
+    _event_type = _event_types.get(event.type)
+
+    if _event_type is None:
+        return None
+
+    _event_dict = event.dict
+    _instance_id = _event_dict.get("instance_id")
+    if _instance_id is None:
+        _instance_id = -1
+
+    if _event_type == EVENT_AXIS_MOTION:
+        return _record.pack(timestamp, _event_dict["joy"], _instance_id, dispatch, _event_type, _event_dict["axis"], _event_dict["value"], 0.0)
+    elif _event_type == EVENT_HAT_MOTION:
+        return _record.pack(timestamp, _event_dict["joy"], _instance_id, dispatch, _event_type, _event_dict["hat"], _event_dict["value"][0], _event_dict["value"][1])
+    else:
+        return _record.pack(timestamp, _event_dict["joy"], _instance_id, dispatch, _event_type, _event_dict["button"], 0.0, 0.0)
+
+
+# class that replays a recording file through the dispatch functions
+# =====================================================================
+class Replayer(object):
+    def __init__(self, path):
+        """
+        Constructor.
+
+        :param path:                    The path of the recording file
+        :type path:                     string
+        """
+        self.path = path    # the path of the recording file
+
+    def events(self, remap_instance_ids=False):
+        """
+        Read the recording file through a memory map, one record at a time.
+        The recorded instance ids are only valid in the recorded session. With remap_instance_ids an instance id that isn't
+        connected gets the instance id of the connected controller of the joy, or is dropped, so the event is looked up by
+        its joy
+
+        :param remap_instance_ids:      Map the recorded instance ids to the connected controllers (True) or keep them (False)
+        :type remap_instance_ids:       bool
+        :return:                        Generator of (timestamp, dispatch, pygame event)
+        :rtype:                         generator
+        """
+        _instance_ids = {}  # recorded instance id -> instance id of the connected controller or None
+        with open(self.path, "rb") as _file:
+            _file_header = _file.read(len(_header))
+            if _file_header != _header:
+                if _file_header[:-1] == _header[:-1]:
+                    raise ValueError("{0} is a steuer recording of an unsupported version".format(self.path))
+                raise ValueError("{0} is no steuer recording".format(self.path))
+
+            _size = _file.seek(0, 2)
+            if _size == len(_header):
+                return
+
+            _map = mmap.mmap(_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            try:
+                _unpack_from = _record.unpack_from
+                _offset = len(_header)
+                _end = _size - _record.size
+
+                while _offset <= _end:
+                    _timestamp, _joy, _instance_id, _dispatch, _event_type, _index, _value, _value2 = _unpack_from(_map, _offset)
+                    _offset += _record.size
+
+                    if _instance_id >= 0 and remap_instance_ids:
+                        if _instance_id not in _instance_ids:
+                            _instance_ids[_instance_id] = _get_connected_instance_id(_joy, _instance_id)
+                        _instance_id = _instance_ids[_instance_id]
+                        if _instance_id is None:
+                            _instance_id = -1
+
+                    # events without instance id (pygame 1) are replayed without instance id
+                    _ids = {"joy": _joy} if _instance_id < 0 else {"joy": _joy, "instance_id": _instance_id}
+
+                    if _event_type == EVENT_AXIS_MOTION:
+                        _event = pygame.event.Event(pygame.JOYAXISMOTION, axis=_index, value=_value, **_ids)
+                    elif _event_type == EVENT_HAT_MOTION:
+                        _event = pygame.event.Event(pygame.JOYHATMOTION, hat=_index, value=(int(_value), int(_value2)), **_ids)
+                    else:
+                        _event = pygame.event.Event(_pygame_event_types[_event_type], button=_index, **_ids)
+
+                    yield _timestamp, _dispatch, _event
+            finally:
+                _map.close()
+
+    def replay(self, realtime=True, speed=1.0):
+        """
+        Feed the recorded events back through the dispatch function they were recorded from. The events that were recorded
+        by one process_events call are replayed by one process_events call. The instance ids are mapped to the connected
+        controllers (see events)
+
+        :param realtime:                Keep the timing of the recording (True) or replay as fast as possible (False)
+        :type realtime:                 bool
+        :param speed:                   Speed factor of the real time replay
+        :type speed:                    float
+        :return:                        The number of replayed events
+        :rtype:                         int
+        """
+        _dispatch_functions = {
+            DISPATCH_GET_ACTION: steuer.get_action,
+            DISPATCH_CALL_EVENT: steuer.call_event,
+            DISPATCH_CALL_EVENT_AND_DIRECTION: steuer.call_event_and_direction
+        }
+        # the process_events dispatches -> (use_callbacks, use_directions)
+        _process_events_options = {
+            DISPATCH_PROCESS_EVENTS: (False, False),
+            DISPATCH_PROCESS_EVENTS_AND_CALL_EVENT: (True, False),
+            DISPATCH_PROCESS_EVENTS_AND_DIRECTION: (True, True)
+        }
+        _timer = time.perf_counter
+        _start = _timer()
+        _replayed = 0
+        _batch = []             # the events of the current process_events call
+        _batch_key = None       # (timestamp, dispatch) of the current process_events call
+
+        for _timestamp, _dispatch, _event in self.events(remap_instance_ids=True):
+            if _batch and _batch_key != (_timestamp, _dispatch):
+                steuer.process_events(_batch, *_process_events_options[_batch_key[1]])
+                _batch = []
+
+            if realtime:
+                _delay = _timestamp / speed - (_timer() - _start)
+                if _delay > 0:
+                    time.sleep(_delay)
+
+            if _dispatch in _process_events_options:
+                _batch.append(_event)
+                _batch_key = (_timestamp, _dispatch)
+            else:
+                _dispatch_functions[_dispatch](_event)
+            _replayed += 1
+
+        if _batch:
+            steuer.process_events(_batch, *_process_events_options[_batch_key[1]])
+
+        return _replayed
+
+
+def _get_connected_instance_id(joy, instance_id):
+    """
+    Get the instance id of the connected controller that replays the events of a recorded controller
+
+    :param joy:                         The recorded joy
+    :type joy:                          int
+    :param instance_id:                 The recorded instance id
+    :type instance_id:                  int
+    :return:                            The recorded instance id if it is connected, otherwise the instance id of the connected
+                                        controller of the joy. None if the joy has no connected controller with an instance id
+    :rtype:                             int
+    """
+    if instance_id in steuer.controllers_by_instance_id:
+        return instance_id
+
+    _controller = steuer.controllers_by_joy.get(joy)
+
+    return None if _controller is None else _controller.instance_id
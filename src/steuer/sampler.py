@@ -0,0 +1,266 @@
+import threading  # the sampling thread
+import time  # used to keep the sampling rate
+
+import pygame  # the controller framework
+
+import steuer  # the mapping logic
+
+# Steuer input sampler
+# ==========================================================================
+# Maps the controller events on a background thread, independent of the render loop:
+#
+#   sampler = steuer.sampler.Sampler(rate_hz=1000)
+#   sampler.start()
+#   while is_running:
+#       sampler.pump()
+#       for record in sampler.drain():
+#           ...
+#
+# SDL has to pump its event queue on the thread that initialised the video system,
+# on every platform. So the game thread pumps: Sampler.pump gets the pygame joystick
+# events and hands them over (Sampler.feed does the same for events the game loop
+# already got with pygame.event.get). The sampler thread wakes up at a fixed rate,
+# runs the handed over events through the steuer mapping and writes the timestamped
+# action transitions into a preallocated single-producer/single-consumer ring buffer.
+# The game thread drains the ring buffer once per frame.
+#
+# The records are stamped with the input time: events that carry the SDL event
+# timestamp are converted to the time.perf_counter() clock (see get_input_times).
+# Events without SDL timestamp are stamped when they are handed over, so pump them
+# more often than once per frame for finer timestamps.
+#
+# While the sampler runs, the sampler thread is the only thread that dispatches
+# events and changes the bits of the controllers. Don't call process_events,
+# get_action or call_event with joystick events on the game thread in the meantime.
+# With use_callbacks the callbacks run on the sampler thread. Deferred callbacks go
+# to steuer.callback_queue, which the game thread can run with steuer.run_callbacks.
+# ==========================================================================
+
+# the pygame events that are pumped by Sampler.pump
+_joystick_events = [pygame.JOYAXISMOTION, pygame.JOYHATMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP]
+
+
+def get_input_times(events):
+    """
+    Get the times the events were created by SDL, on the time.perf_counter() clock.
+    Events that carry the SDL event timestamp (a "timestamp" attribute in milliseconds of SDL_GetTicks) are converted
+    with the current SDL ticks, all other events get the current time
+
+    :param events:                      The pygame events
+    :type events:                       list
+    :return:                            The time of every event. A single time if no event carries an SDL timestamp
+    :rtype:                             list or float
+    """
+    _now = time.perf_counter()
+    _offset = None
+    _times = []
+
+    for event in events:
+        _ticks = event.dict.get("timestamp")
+
+        if _ticks is None:
+            _times.append(_now)
+        else:
+            if _offset is None:
+                _offset = _now - pygame.time.get_ticks() / 1000.0
+            _times.append(_offset + _ticks / 1000.0)
+
+    return _now if _offset is None else _times
+
+
+# class of the single-producer/single-consumer ring buffer of the sampler. The producer only writes
+# the write index, the consumer only writes the read index, so no lock is needed
+# =====================================================================
+class RingBuffer(object):
+    def __init__(self, capacity=4096):
+        """
+        Constructor.
+
+        :param capacity:                The number of records the ring buffer holds. Rounded up to a power of two
+        :type capacity:                 int
+        """
+        _capacity = 1
+        while _capacity < capacity:
+            _capacity *= 2
+
+        # @formatter:off
+        self.capacity = _capacity               # the number of records the ring buffer holds
+        self.overflows = 0                      # the number of records dropped because the ring buffer was full
+        self._records = [None] * _capacity      # the preallocated slots of the records
+        self._mask = _capacity - 1              # maps the indexes to the slots
+        self._write_index = 0                   # written by the producer only
+        self._read_index = 0                    # written by the consumer only
+        # @formatter:on
+
+    def put(self, record):
+        """
+        Producer side. Write a record. If the ring buffer is full the record is dropped and counted as overflow
+
+        :param record:                  The record
+        :type record:                   steuer.ActionRecord
+        :return:                        True if the record was written
+        :rtype:                         bool
+        """
+        _write_index = self._write_index
+
+        if _write_index - self._read_index >= self.capacity:
+            self.overflows += 1
+            return False
+
+        self._records[_write_index & self._mask] = record
+        # publish the record after the slot is written
+        self._write_index = _write_index + 1
+
+        return True
+
+    def drain(self):
+        """
+        Consumer side. Read all records that were written since the last drain
+
+        :return:                        The records, oldest first
+        :rtype:                         list
+        """
+        _read_index = self._read_index
+        _write_index = self._write_index
+        _records = self._records
+        _mask = self._mask
+
+        _drained = []
+        while _read_index < _write_index:
+            _slot = _read_index & _mask
+            _drained.append(_records[_slot])
+            _records[_slot] = None
+            _read_index += 1
+
+        # free the slots after they are read
+        self._read_index = _read_index
+
+        return _drained
+
+    def __len__(self):
+        return self._write_index - self._read_index
+
+
+# class that samples the controllers on a background thread
+# =====================================================================
+class Sampler(object):
+    def __init__(self, rate_hz=1000, capacity=4096, use_callbacks=False):
+        """
+        Constructor.
+
+        :param rate_hz:                 How often per second the sampler thread maps the handed over events
+        :type rate_hz:                  int
+        :param capacity:                The number of records the ring buffer holds. Also the number of event batches
+                                        that can be handed over between two wake-ups of the sampler thread
+        :type capacity:                 int
+        :param use_callbacks:           Defines if the callback functions of the actions are called as well (call_event semantics).
+                                        The callbacks then run on the sampler thread
+        :type use_callbacks:            bool
+        """
+        # @formatter:off
+        self.period = 1.0 / rate_hz                 # the time between two wake-ups of the sampler thread in seconds
+        self.ring = RingBuffer(capacity)            # the action records
+        self.inbox = RingBuffer(capacity)           # the timestamped event batches handed over by the game thread
+        self.use_callbacks = use_callbacks          # flag that shows if the callback functions of the actions are called
+        self._thread = None                         # the sampling thread
+        self._is_running = False                    # flag that keeps the sampling thread running
+        # @formatter:on
+
+    @property
+    def overflows(self):
+        """
+        The number of records and event batches dropped because a ring buffer was full
+
+        :rtype:                         int
+        """
+        return self.ring.overflows + self.inbox.overflows
+
+    def start(self):
+        """
+        Start the sampling thread
+        """
+        if self._thread is not None:
+            return
+
+        self._is_running = True
+        self._thread = threading.Thread(target=self._run, name="steuer-sampler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the sampling thread. Events that were handed over are still mapped, the records can be drained afterwards
+        """
+        if self._thread is None:
+            return
+
+        self._is_running = False
+        self._thread.join()
+        self._thread = None
+
+        self._map_events()
+
+    def pump(self):
+        """
+        Pump the pygame joystick events and hand them over to the sampler thread. Call it from the thread that
+        initialised the video system (the game thread), at least once per frame
+
+        :return:                        True if the events were handed over
+        :rtype:                         bool
+        """
+        return self.feed(steuer.get_events(_joystick_events))
+
+    def feed(self, events, timestamp=None):
+        """
+        Hand events over to the sampler thread. Use it if the game loop gets the pygame events itself.
+        Events that don't belong to a connected controller are ignored by the sampler thread
+
+        :param events:                  The pygame events
+        :type events:                   list
+        :param timestamp:               The timestamp of the events. None uses the input times (see get_input_times)
+        :type timestamp:                float
+        :return:                        True if the events were handed over
+        :rtype:                         bool
+        """
+        if not events:
+            return True
+
+        return self.inbox.put((get_input_times(events) if timestamp is None else timestamp, events))
+
+    def drain(self):
+        """
+        Get the action records that were sampled since the last drain. Call it once per frame from the game thread
+
+        :return:                        The records, oldest first
+        :rtype:                         list
+        """
+        return self.ring.drain()
+
+    def _run(self):
+        """
+        The sampling thread. Maps the handed over events at a fixed rate and writes the action transitions
+        """
+        _timer = time.perf_counter
+        _next_wake_up = _timer()
+
+        while self._is_running:
+            self._map_events()
+
+            # wait for the next wake-up. If the mapping is late, the cadence restarts from now
+            _next_wake_up += self.period
+            _delay = _next_wake_up - _timer()
+
+            if _delay > 0:
+                time.sleep(_delay)
+            else:
+                _next_wake_up -= _delay
+
+    def _map_events(self):
+        """
+        Run the handed over events through the mapping and write the action transitions into the ring buffer
+        """
+        _put = self.ring.put
+
+        for _timestamp, _events in self.inbox.drain():
+            for _record in steuer.get_action_records(_events, self.use_callbacks, _timestamp):
+                _put(_record)
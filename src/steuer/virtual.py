@@ -0,0 +1,314 @@
+import random  # used to generate the random traffic
+from collections import deque  # the event queue
+
+import pygame  # the event types and the events
+
+import steuer  # the input backend interface
+
+# Steuer virtual controllers
+# ==========================================================================
+# An in-memory input backend that simulates controllers without hardware. The
+# virtual controllers send the same pygame events as real controllers, so the
+# events go through the exact same mapping code:
+#
+#   backend = steuer.virtual.VirtualBackend()
+#   for _ in range(200):
+#       backend.plug("steuer virtual controller")
+#   steuer.init(input_backend=backend)
+#   steuer.detect_connected_controllers()
+#
+#   backend.random_traffic(10000, seed=1)
+#   steuer.process_events(steuer.get_events())
+#
+# Like SDL, only opened controllers send button, axis and hat events (see
+# steuer.Controller.open), and every plugged in controller sends a JOYDEVICEADDED
+# event, also the controllers that are plugged in before steuer.init and are
+# enumerated by it. Unplugged controllers send JOYDEVICEREMOVED (pygame 2).
+# ==========================================================================
+
+# the device events of pygame 2. None with pygame 1
+_device_added = getattr(pygame, "JOYDEVICEADDED", None)
+_device_removed = getattr(pygame, "JOYDEVICEREMOVED", None)
+
+# the positions of a hat
+_hat_positions = [(0, 0), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)]
+
+
+# class that simulates a controller device
+# =====================================================================
+class VirtualDevice(object):
+    def __init__(self, backend, device_index, name, guid, instance_id, number_of_buttons, number_of_axes, number_of_hats):
+        """
+        Constructor. Use VirtualBackend.plug to create a virtual controller
+
+        :param backend:                 The backend the device is plugged into
+        :type backend:                  steuer.virtual.VirtualBackend
+        :param device_index:            The device index when the device was plugged in. Sent as joy of the events
+        :type device_index:             int
+        :param name:                    The name of the controller type
+        :type name:                     string
+        :param guid:                    The SDL GUID of the controller type
+        :type guid:                     string
+        :param instance_id:             The instance id of the device
+        :type instance_id:              int
+        :param number_of_buttons:       The number of buttons
+        :type number_of_buttons:        int
+        :param number_of_axes:          The number of axes
+        :type number_of_axes:           int
+        :param number_of_hats:          The number of hats
+        :type number_of_hats:           int
+        """
+        # @formatter:off
+        self.backend = backend                          # the backend the device is plugged into
+        self.joy = device_index                         # the device index when the device was plugged in. Sent as joy of the events
+        self.name = name                                # the name of the controller type
+        self.guid = guid                                # the SDL GUID of the controller type
+        self.instance_id = instance_id                  # the instance id of the device
+        self.is_open = False                            # flag that shows if the device is opened and sends events
+        self.is_plugged = True                          # flag that shows if the device is plugged in
+        self.buttons = [False] * number_of_buttons      # the pressed buttons
+        self.axes = [0.0] * number_of_axes              # the values of the axes
+        self.hats = [(0, 0)] * number_of_hats           # the values of the hats
+        # @formatter:on
+
+    def press(self, button):
+        """
+        Press a button. Sends a JOYBUTTONDOWN event if the button wasn't pressed
+
+        :param button:                  The button number
+        :type button:                   int
+        :return:                        The sent event or None
+        :rtype:                         pygame.Event
+        """
+        if self.buttons[button]:
+            return None
+
+        self.buttons[button] = True
+
+        return self._send(pygame.JOYBUTTONDOWN, button=button)
+
+    def release(self, button):
+        """
+        Release a button. Sends a JOYBUTTONUP event if the button was pressed
+
+        :param button:                  The button number
+        :type button:                   int
+        :return:                        The sent event or None
+        :rtype:                         pygame.Event
+        """
+        if not self.buttons[button]:
+            return None
+
+        self.buttons[button] = False
+
+        return self._send(pygame.JOYBUTTONUP, button=button)
+
+    def move_axis(self, axis, value):
+        """
+        Move an axis. Sends a JOYAXISMOTION event if the value changed
+
+        :param axis:                    The axis number
+        :type axis:                     int
+        :param value:                   The value between -1.0 and 1.0
+        :type value:                    float
+        :return:                        The sent event or None
+        :rtype:                         pygame.Event
+        """
+        value = min(1.0, max(-1.0, float(value)))
+
+        if self.axes[axis] == value:
+            return None
+
+        self.axes[axis] = value
+
+        return self._send(pygame.JOYAXISMOTION, axis=axis, value=value)
+
+    def move_hat(self, hat, value):
+        """
+        Move a hat. Sends a JOYHATMOTION event if the value changed
+
+        :param hat:                     The hat number
+        :type hat:                      int
+        :param value:                   The position. Example: (-1, 1) for top left
+        :type value:                    tuple
+        :return:                        The sent event or None
+        :rtype:                         pygame.Event
+        """
+        value = (int(value[0]), int(value[1]))
+
+        if self.hats[hat] == value:
+            return None
+
+        self.hats[hat] = value
+
+        return self._send(pygame.JOYHATMOTION, hat=hat, value=value)
+
+    def _send(self, event_type, **attributes):
+        """
+        Put an event of the device into the event queue of the backend. Closed devices send no events
+        """
+        if not self.is_open or not self.is_plugged:
+            return None
+
+        _event = pygame.event.Event(event_type, joy=self.joy, instance_id=self.instance_id, **attributes)
+        self.backend.events.append(_event)
+
+        return _event
+
+
+# input backend of virtual controllers
+# =====================================================================
+class VirtualBackend(steuer.InputBackend):
+    def __init__(self):
+        """
+        Constructor. The backend starts without devices
+        """
+        # @formatter:off
+        self.devices = []               # the plugged in devices. The list index is the device index
+        self.events = deque()           # the pending events
+        self._next_instance_id = 0      # the instance id of the next plugged in device
+        # @formatter:on
+
+    def plug(self, name="steuer virtual controller", guid=None, number_of_buttons=12, number_of_axes=4, number_of_hats=1):
+        """
+        Plug in a virtual controller. Sends a JOYDEVICEADDED event (pygame 2)
+
+        :param name:                    The name of the controller type
+        :type name:                     string
+        :param guid:                    The SDL GUID of the controller type
+        :type guid:                     string
+        :param number_of_buttons:       The number of buttons
+        :type number_of_buttons:        int
+        :param number_of_axes:          The number of axes
+        :type number_of_axes:           int
+        :param number_of_hats:          The number of hats
+        :type number_of_hats:           int
+        :return:                        The device
+        :rtype:                         steuer.virtual.VirtualDevice
+        """
+        _device_index = len(self.devices)
+        _device = VirtualDevice(self, _device_index, name, guid, self._next_instance_id, number_of_buttons, number_of_axes, number_of_hats)
+        self._next_instance_id += 1
+        self.devices.append(_device)
+
+        if _device_added is not None:
+            self.events.append(pygame.event.Event(_device_added, device_index=_device_index, guid=guid))
+
+        return _device
+
+    def unplug(self, device):
+        """
+        Unplug a virtual controller. The device indexes of the following devices move down, like in SDL.
+        Pending JOYDEVICEADDED events of the following devices have to be handled before
+
+        :param device:                  The device
+        :type device:                   steuer.virtual.VirtualDevice
+        """
+        self.devices.remove(device)
+        device.is_plugged = False
+        device.is_open = False
+
+        if _device_removed is not None:
+            self.events.append(pygame.event.Event(_device_removed, instance_id=device.instance_id))
+
+    def play(self, script):
+        """
+        Play scripted traffic. Every step is (device or device index, function, arguments...). The functions are
+        "press", "release", "move_axis" and "move_hat". Example: [(0, "press", 3), (0, "move_axis", 1, -1.0)]
+
+        :param script:                  The steps
+        :type script:                   iterable
+        :return:                        The number of sent events
+        :rtype:                         int
+        """
+        _sent = 0
+
+        for _step in script:
+            _device = _step[0] if isinstance(_step[0], VirtualDevice) else self.devices[_step[0]]
+            if getattr(_device, _step[1])(*_step[2:]) is not None:
+                _sent += 1
+
+        return _sent
+
+    def random_traffic(self, number_of_events, seed=None, devices=None):
+        """
+        Send random button, axis and hat traffic of the opened devices. Buttons are toggled, axes jump between the
+        center and the edges with some noise and hats move to another position
+
+        :param number_of_events:        The number of events to send
+        :type number_of_events:         int
+        :param seed:                    The seed of the random traffic
+        :type seed:                     int
+        :param devices:                 The devices that send the traffic. None uses all devices
+        :type devices:                  list
+        :return:                        The number of sent events. 0 if no device is opened
+        :rtype:                         int
+        """
+        _random = random.Random(seed)
+        _devices = [_device for _device in (devices if devices is not None else self.devices)
+                    if _device.is_open and _device.is_plugged and (_device.buttons or _device.axes or _device.hats)]
+        _sent = 0
+
+        if not _devices:
+            return 0
+
+        while _sent < number_of_events:
+            _device = _random.choice(_devices)
+            _kind = _random.random()
+
+            if _kind < 0.5 and _device.buttons:
+                _button = _random.randrange(len(_device.buttons))
+                _event = _device.release(_button) if _device.buttons[_button] else _device.press(_button)
+            elif _kind < 0.8 and _device.axes:
+                _target = _random.choice((-1.0, 0.0, 1.0))
+                _event = _device.move_axis(_random.randrange(len(_device.axes)), _target + _random.gauss(0.0, 0.05))
+            elif _device.hats:
+                _hat = _random.randrange(len(_device.hats))
+                _event = _device.move_hat(_hat, _random.choice([_position for _position in _hat_positions if _position != _device.hats[_hat]]))
+            else:
+                continue
+
+            if _event is not None:
+                _sent += 1
+
+        return _sent
+
+    # input backend functions
+    # *****************************************************************
+    def get_count(self):
+        return len(self.devices)
+
+    def get_device(self, device_index):
+        return self.devices[device_index]
+
+    def describe(self, device):
+        return device.name, device.guid, device.instance_id
+
+    def is_open(self, device):
+        return device.is_open
+
+    def open(self, device):
+        device.is_open = True
+
+    def close(self, device):
+        device.is_open = False
+
+    def get_events(self, event_types=None):
+        if event_types is None:
+            _events = list(self.events)
+            self.events.clear()
+            return _events
+
+        _events = []
+        _pending = deque()
+        for _event in self.events:
+            if _event.type in event_types:
+                _events.append(_event)
+            else:
+                _pending.append(_event)
+        self.events = _pending
+
+        return _events
+
+    def clear_events(self):
+        self.events.clear()
@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("pygame")
+
+import steuer  # the module state that is reset between the tests
+
+
+@pytest.fixture(autouse=True)
+def steuer_state(tmp_path, monkeypatch):
+    """
+    Run every test in its own directory with fresh module state of steuer
+    """
+    monkeypatch.chdir(tmp_path)
+
+    yield
+
+    steuer.enable_stats(False)
+    steuer.instrumentation = None
+    steuer.defer_callbacks(False)
+    steuer.callback_queue = None
+    steuer.shutdown_callback_threads()
+    steuer.thread_dispatcher = None
+
+    del steuer.controllers[:]
+    steuer.controllers_by_instance_id.clear()
+    steuer.controllers_by_joy.clear()
+    del steuer.player_slots[:]
+    del steuer._player_slot_identities[:]
+    steuer.mapping_databases.clear()
+    steuer.state_store = None
+    steuer.backend = None
+    steuer.on_controller_added = None
+    steuer.on_controller_removed = None
+    del steuer.Configuration.undetected_controllers[:]
+    del steuer.Action.unconfigured_actions[:]
+    steuer.Action.actions.clear()
+    steuer.Action.unregistered_functions.clear()
+    steuer.Action.directions.clear()
+    steuer.Action.build_direction_transitions()
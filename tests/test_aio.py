@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+import steuer
+import steuer.aio
+import steuer.virtual
+
+
+@pytest.fixture
+def pad():
+    """
+    A mapped virtual controller whose button 0 is mapped to BUTTON_TOP
+    """
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_TOP"}}, "axis": {}, "hat": {}}}, _file)
+
+    steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top")
+
+    _backend = steuer.virtual.VirtualBackend()
+    _pad = _backend.plug("Pad")
+    steuer.init(use_events=False, input_backend=_backend)
+    steuer.detect_connected_controllers()
+    steuer.get_events()
+
+    return _pad
+
+
+def test_actions_are_streamed(pad):
+    async def _main():
+        pad.press(0)
+        pad.release(0)
+
+        async with steuer.aio.actions(rate_hz=1000) as _stream:
+            return [await _stream.__anext__(), await _stream.__anext__()]
+
+    _records = asyncio.run(asyncio.wait_for(_main(), 5))
+
+    assert [(_record.player, _record.action, _record.pressed) for _record in _records] == [(0, "BUTTON_TOP", True), (0, "BUTTON_TOP", False)]
+
+
+def test_pump_error_reaches_the_consumer(pad, monkeypatch):
+    def _failing_get_events(event_types=None):
+        raise RuntimeError("backend failed")
+
+    monkeypatch.setattr(steuer, "get_events", _failing_get_events)
+
+    async def _main():
+        _stream = steuer.aio.actions(rate_hz=1000)
+        async for _record in _stream:
+            pass
+        await _stream.aclose()
+
+    with pytest.raises(RuntimeError, match="backend failed"):
+        asyncio.run(asyncio.wait_for(_main(), 5))
+
+
+def test_pump_error_is_raised_on_close(pad, monkeypatch):
+    def _failing_get_events(event_types=None):
+        raise RuntimeError("backend failed")
+
+    monkeypatch.setattr(steuer, "get_events", _failing_get_events)
+
+    async def _main():
+        _stream = steuer.aio.actions(rate_hz=1000).__aiter__()
+        await asyncio.sleep(0.01)
+        await _stream.aclose()
+
+    with pytest.raises(RuntimeError, match="backend failed"):
+        asyncio.run(asyncio.wait_for(_main(), 5))
@@ -0,0 +1,61 @@
+import json
+import logging
+
+import pytest
+
+import steuer
+import steuer.virtual
+
+
+@pytest.fixture
+def pad():
+    """
+    A virtual controller whose axis 0 presses LEFT_STICK_RIGHT at 0.6 and releases it below 0.3
+    """
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {},
+                           "axis": {"0:<": {"Function": "LEFT_STICK_LEFT"},
+                                    "0:>": {"Function": "LEFT_STICK_RIGHT", "Press": 0.6, "Release": 0.3}},
+                           "hat": {}}}, _file)
+
+    steuer.Action("LEFT_STICK_LEFT", steuer.LEFT_STICK_LEFT, "Left stick left", "left")
+    steuer.Action("LEFT_STICK_RIGHT", steuer.LEFT_STICK_RIGHT, "Left stick right", "right")
+
+    _backend = steuer.virtual.VirtualBackend()
+    _pad = _backend.plug("Pad")
+    steuer.init(use_events=False, input_backend=_backend)
+    steuer.detect_connected_controllers()
+    steuer.process_events(steuer.get_events())
+
+    return _pad
+
+
+def _move(pad, value):
+    pad.move_axis(0, value)
+    steuer.process_events(steuer.get_events())
+
+    return steuer.controllers[0].bits
+
+
+def test_hysteresis(pad):
+    assert _move(pad, 0.5) == 0
+    assert _move(pad, 0.6) == steuer.LEFT_STICK_RIGHT
+    # inside of the hysteresis band the action is kept
+    assert _move(pad, 0.4) == steuer.LEFT_STICK_RIGHT
+    assert _move(pad, 0.3) == steuer.LEFT_STICK_RIGHT
+    assert _move(pad, 0.2) == 0
+    assert _move(pad, 0.5) == 0
+
+
+def test_default_thresholds(pad):
+    assert _move(pad, -0.99) == 0
+    assert _move(pad, -1.0) == steuer.LEFT_STICK_LEFT
+    assert _move(pad, 1.0) == steuer.LEFT_STICK_RIGHT
+
+
+def test_release_threshold_above_the_press_threshold(caplog):
+    with caplog.at_level(logging.WARNING, logger="Steuer"):
+        _buttons, _axes, _hats = steuer.compile_mapping_entries({"button": {}, "axis": {"1:<": {"Function": "LEFT_STICK_LEFT", "Press": 0.5, "Release": 0.8}}, "hat": {}})
+
+    assert _axes == {steuer._axis_code(1, False): ("LEFT_STICK_LEFT", 0.5, 0.5, False)}
+    assert "release threshold of axis 1:< is above the press threshold" in caplog.text
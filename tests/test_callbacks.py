@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+
+import pytest
+
+import steuer
+import steuer.virtual
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def pad(calls):
+    """
+    A mapped virtual controller with a low and a high priority action that record their callbacks in calls
+    """
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_TOP"}, "1": {"Function": "BUTTON_DOWN"}}, "axis": {}, "hat": {}}}, _file)
+
+    steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top",
+                  on_pressed=lambda controller: calls.append("top pressed"),
+                  on_released=lambda controller: calls.append("top released"))
+    steuer.Action("BUTTON_DOWN", steuer.BUTTON_DOWN, "Button down", "down",
+                  on_pressed=lambda controller: calls.append("down pressed"), priority=1)
+
+    _backend = steuer.virtual.VirtualBackend()
+    _pad = _backend.plug("Pad")
+    steuer.init(use_events=False, input_backend=_backend)
+    steuer.detect_connected_controllers()
+    steuer.process_events(steuer.get_events())
+
+    return _pad
+
+
+def test_inline_callbacks(pad, calls):
+    pad.press(0)
+    pad.press(1)
+    steuer.process_events(steuer.get_events())
+
+    assert calls == ["top pressed", "down pressed"]
+
+
+def test_deferred_callbacks_run_by_priority(pad, calls):
+    steuer.defer_callbacks()
+    pad.press(0)
+    pad.release(0)
+    pad.press(1)
+    steuer.process_events(steuer.get_events())
+
+    assert calls == []
+    assert steuer.callback_queue.size == 3
+
+    assert steuer.run_callbacks() == 0
+    assert calls == ["down pressed", "top pressed", "top released"]
+
+
+def test_run_callbacks_keeps_the_rest_for_the_next_call(pad, calls):
+    steuer.defer_callbacks()
+    pad.press(0)
+    pad.release(0)
+    steuer.process_events(steuer.get_events())
+
+    # a used up budget still runs one callback
+    assert steuer.run_callbacks(budget_ms=0) == 1
+    assert calls == ["top pressed"]
+    assert steuer.run_callbacks(budget_ms=0) == 0
+    assert calls == ["top pressed", "top released"]
+
+
+def test_callback_queue_grows_in_order():
+    _calls = []
+    _queue = steuer.CallbackQueue(capacity=2)
+    _owner = steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top")
+
+    for _index in range(5):
+        _queue.submit(lambda controller, index=_index: _calls.append(index), None, _owner)
+
+    assert _queue.size == 5
+    assert _queue.run() == 0
+    assert _calls == [0, 1, 2, 3, 4]
+
+
+def test_thread_dispatch_keeps_the_order_per_controller(pad, calls):
+    _threads = set()
+
+    def _on_pressed(controller):
+        time.sleep(0.001)
+        _threads.add(threading.current_thread())
+        calls.append("top pressed")
+
+    def _on_released(controller):
+        _threads.add(threading.current_thread())
+        calls.append("top released")
+
+    _action = steuer.Action.actions["BUTTON_TOP"]
+    _action.on_pressed, _action.on_released = _on_pressed, _on_released
+    _action.set_dispatch_policy(steuer.DISPATCH_THREAD)
+
+    for _index in range(10):
+        pad.press(0)
+        pad.release(0)
+    pad.press(1)
+    steuer.process_events(steuer.get_events())
+    steuer.shutdown_callback_threads()
+
+    # the inline callback of BUTTON_DOWN doesn't wait for the threads
+    assert calls[0] == "down pressed"
+    assert calls[1:] == ["top pressed", "top released"] * 10
+    assert threading.current_thread() not in _threads
+
+
+def test_failed_thread_callback_is_logged(pad, calls, caplog):
+    def _on_pressed(controller):
+        raise ValueError("failed")
+
+    _action = steuer.Action.actions["BUTTON_TOP"]
+    _action.on_pressed = _on_pressed
+    _action.set_dispatch_policy(steuer.DISPATCH_THREAD)
+
+    pad.press(0)
+    pad.release(0)
+    steuer.process_events(steuer.get_events())
+    steuer.shutdown_callback_threads()
+
+    assert calls == ["top released"]
+    assert "callback of controller 0 failed" in caplog.text
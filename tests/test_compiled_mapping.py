@@ -0,0 +1,62 @@
+import json
+import logging
+
+import pytest
+
+import steuer
+import steuer.virtual
+
+
+@pytest.fixture
+def pad():
+    """
+    A virtual controller mapped to BUTTON_TOP, LEFT_STICK_RIGHT and DPAD_DOWN of which only BUTTON_TOP is registered
+    """
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_TOP"}},
+                           "axis": {"0:>": {"Function": "LEFT_STICK_RIGHT"}},
+                           "hat": {"0:-1:0": {"Function": "DPAD_DOWN"}}}}, _file)
+
+    steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top")
+
+    _backend = steuer.virtual.VirtualBackend()
+    _pad = _backend.plug("Pad")
+    steuer.init(use_events=False, input_backend=_backend)
+    steuer.detect_connected_controllers()
+    steuer.process_events(steuer.get_events())
+
+    return _pad
+
+
+def test_compiled_tables(pad):
+    _controller = steuer.controllers[0]
+
+    assert _controller._button_actions == {0: steuer.Action.actions["BUTTON_TOP"]}
+    assert _controller._axis_actions == {}
+    assert _controller._hat_actions == {}
+    assert sorted(_controller._unbound_entries) == ["DPAD_DOWN", "LEFT_STICK_RIGHT"]
+
+
+def test_late_action_is_bound_without_compile(pad, monkeypatch):
+    _controller = steuer.controllers[0]
+    monkeypatch.setattr(steuer.Controller, "compile_mapping", lambda self, entries=None: pytest.fail("mapping compiled again"))
+
+    _action = steuer.Action("LEFT_STICK_RIGHT", steuer.LEFT_STICK_RIGHT, "Left stick right", "right")
+
+    assert _controller._axis_actions[steuer._axis_code(0, True)][0] is _action
+    assert "LEFT_STICK_RIGHT" not in _controller._unbound_entries
+
+    pad.move_axis(0, 1.0)
+    assert steuer.process_events(steuer.get_events())[0][0] == steuer.LEFT_STICK_RIGHT
+
+
+def test_unregistered_function_is_warned_about_once(pad, caplog):
+    assert steuer.Action.unregistered_functions == {"DPAD_DOWN", "LEFT_STICK_RIGHT"}
+    steuer.Action.unregistered_functions.clear()
+
+    with caplog.at_level(logging.WARNING, logger="Steuer"):
+        steuer.controllers[0].compile_mapping()
+        steuer.controllers[0].compile_mapping()
+
+    assert sorted(_record.getMessage() for _record in caplog.records if "not registered" in _record.getMessage()) == \
+        ["action DPAD_DOWN is mapped but not registered", "action LEFT_STICK_RIGHT is mapped but not registered"]
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import steuer
+import steuer.virtual
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def pad(calls):
+    """
+    A virtual controller whose hat is mapped to the dpad, with the top, top right and right directions registered
+    """
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {}, "axis": {},
+                           "hat": {"0:1:0": {"Function": "DPAD_TOP"}, "0:-1:0": {"Function": "DPAD_DOWN"},
+                                   "0:0:-1": {"Function": "DPAD_LEFT"}, "0:0:1": {"Function": "DPAD_RIGHT"}}}}, _file)
+
+    for _name, _value in (("DPAD_TOP", steuer.DPAD_TOP), ("DPAD_DOWN", steuer.DPAD_DOWN), ("DPAD_LEFT", steuer.DPAD_LEFT), ("DPAD_RIGHT", steuer.DPAD_RIGHT)):
+        steuer.Action(_name, _value, _name, _name)
+
+    for _name, _value in (("top", steuer.DPAD_TOP), ("top right", steuer.DPAD_TOP | steuer.DPAD_RIGHT), ("right", steuer.DPAD_RIGHT)):
+        steuer.Direction(_name, _value, _name, _name,
+                         on_heading=lambda controller, name=_name: calls.append("heading " + name),
+                         on_unheading=lambda controller, name=_name: calls.append("unheading " + name))
+
+    _backend = steuer.virtual.VirtualBackend()
+    _pad = _backend.plug("Pad")
+    steuer.init(use_events=False, input_backend=_backend)
+    steuer.detect_connected_controllers()
+    steuer.process_events(steuer.get_events())
+
+    return _pad
+
+
+def test_transition_table(pad):
+    assert len(steuer.Action.direction_transitions) == 1
+
+    _shift, _transitions = steuer.Action.direction_transitions[0]
+    _top, _top_right = steuer.Action.directions["1"], steuer.Action.directions["9"]
+
+    assert _shift == 0 and len(_transitions) == 256
+    assert _transitions[1 << 4 | 9] == (_top, _top_right)
+    assert _transitions[0 << 4 | 1] == (None, _top)
+    # neither top left nor left are registered
+    assert _transitions[5 << 4 | 4] is None
+    assert _transitions[9 << 4 | 9] is None
+
+
+def test_heading_and_unheading(pad, calls):
+    for _value in ((1, 0), (1, 1), (0, 1), (0, 0), (-1, 0)):
+        pad.move_hat(0, _value)
+    steuer.process_events(steuer.get_events(), use_directions=True)
+
+    assert calls == ["heading top", "unheading top", "heading top right", "unheading top right", "heading right", "unheading right"]
@@ -0,0 +1,53 @@
+import steuer
+import steuer.gamecontrollerdb
+import steuer.virtual
+
+_GUID = "03000000de280000ff11000001000000"
+_LINES = [
+    "# Linux",
+    _GUID + ",Steam Virtual Gamepad,a:b0,b:b1,dpup:h0.1,dpleft:h0.8,leftx:a0,lefty:a1~,lefttrigger:+a2,righttrigger:-a5,platform:Linux,",
+    "030000005e0400008e02000000007801,Xbox 360 Controller,a:b1,platform:Windows,",
+    "broken line"
+]
+
+
+def test_parse_line():
+    _guid, _name, _platform, _mapping = steuer.gamecontrollerdb.parse_line(_LINES[1])
+
+    assert (_guid, _name, _platform) == (_GUID, "Steam Virtual Gamepad", "Linux")
+    assert _mapping == {
+        "button": {"0": {"Function": "BUTTON_DOWN"}, "1": {"Function": "BUTTON_RIGHT"}},
+        "axis": {"0:<": {"Function": "LEFT_STICK_LEFT"}, "0:>": {"Function": "LEFT_STICK_RIGHT"},
+                 "1:<": {"Function": "LEFT_STICK_DOWN"}, "1:>": {"Function": "LEFT_STICK_TOP"},
+                 "2:>": {"Function": "SHOULDER_L2"}, "5:<": {"Function": "SHOULDER_R2"}},
+        "hat": {"0:0:1": {"Function": "DPAD_TOP"}, "0:-1:0": {"Function": "DPAD_LEFT"}}
+    }
+
+
+def test_lookup_by_guid_and_name():
+    _database = steuer.gamecontrollerdb.GameControllerDB(platform="Linux")
+
+    assert _database.add_lines(_LINES) == 1
+    # the name CRC in bytes 2-3 of newer GUIDs is ignored
+    assert _database.find(guid="0300abcdde280000ff11000001000000")[0] == "Steam Virtual Gamepad"
+    assert _database.find(guid="ffff", name="STEAM virtual-gamepad")[0] == "Steam Virtual Gamepad"
+    assert _database.find(guid="030000005e0400008e02000000007801") is None
+
+
+def test_unknown_controller_is_mapped_from_the_gamecontrollerdb(monkeypatch):
+    monkeypatch.setattr(steuer.gamecontrollerdb, "get_platform", lambda: "Linux")
+    with open("gamecontrollerdb.txt", "w") as _file:
+        _file.write("\n".join(_LINES))
+
+    steuer.Action("BUTTON_DOWN", steuer.BUTTON_DOWN, "Button down", "down")
+
+    _backend = steuer.virtual.VirtualBackend()
+    _pad = _backend.plug("Renamed Pad", guid=_GUID)
+    steuer.init(use_events=False, gamecontrollerdb="gamecontrollerdb.txt", input_backend=_backend)
+    steuer.detect_connected_controllers()
+    steuer.process_events(steuer.get_events())
+
+    _pad.press(0)
+
+    assert steuer.controllers[0].is_mapped
+    assert steuer.process_events(steuer.get_events())[0] == (steuer.BUTTON_DOWN, 0)
@@ -0,0 +1,160 @@
+import json
+
+import pygame
+import pytest
+
+import steuer
+import steuer.virtual
+
+pytestmark = pytest.mark.skipif(not hasattr(pygame, "JOYDEVICEADDED"), reason="hotplug events need pygame 2")
+
+
+@pytest.fixture
+def backend():
+    """
+    A virtual backend with a mapping database that maps button 0 of the "Pad" controllers to BUTTON_TOP
+    """
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_TOP"}}, "axis": {}, "hat": {}}}, _file)
+
+    steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top")
+
+    return steuer.virtual.VirtualBackend()
+
+
+def _init(backend):
+    steuer.init(use_events=False, input_backend=backend)
+    steuer.detect_connected_controllers()
+
+    # the JOYDEVICEADDED events of the controllers that were connected at startup
+    _process(backend)
+
+
+def _process(backend):
+    return steuer.process_events(steuer.get_events())
+
+
+def test_number_collision_after_unplug(backend):
+    # SDL moves the device indexes down on unplug, so C gets the number B was added with
+    pad_a = backend.plug("Pad")
+    pad_b = backend.plug("Pad")
+    _init(backend)
+
+    backend.unplug(pad_a)
+    _process(backend)
+    pad_c = backend.plug("Pad")
+    _process(backend)
+
+    controller_b = steuer.controllers_by_instance_id[pad_b.instance_id]
+    controller_c = steuer.controllers_by_instance_id[pad_c.instance_id]
+    assert controller_b.number == controller_c.number
+    assert steuer.controllers_by_joy[controller_b.number] is controller_b
+
+    pad_b.press(0)
+    pad_c.press(0)
+    _result = _process(backend)
+
+    assert _result[controller_b.player] == (steuer.BUTTON_TOP, 0)
+    assert _result[controller_c.player] == (steuer.BUTTON_TOP, 0)
+    assert controller_b.bits == steuer.BUTTON_TOP
+    assert controller_c.bits == steuer.BUTTON_TOP
+
+
+def test_slots_are_assigned_in_plug_order(backend):
+    pads = [backend.plug("Pad") for _ in range(3)]
+    _init(backend)
+
+    assert [steuer.controllers_by_instance_id[_pad.instance_id].player for _pad in pads] == [0, 1, 2]
+    assert steuer.get_player(1) is steuer.controllers_by_instance_id[pads[1].instance_id]
+
+
+def test_replugged_controller_gets_its_slot_back(backend):
+    pad_a = backend.plug("Pad")
+    pad_b = backend.plug("Pad", guid="03000000aaaa0000bbbb000011010000")
+    _init(backend)
+
+    backend.unplug(pad_b)
+    _process(backend)
+    assert steuer.get_player(1) is None
+
+    pad_b = backend.plug("Pad", guid="03000000aaaa0000bbbb000011010000")
+    _process(backend)
+
+    assert steuer.controllers_by_instance_id[pad_b.instance_id].player == 1
+    assert steuer.controllers_by_instance_id[pad_a.instance_id].player == 0
+
+
+def test_new_controller_gets_the_lowest_free_slot(backend):
+    pads = [backend.plug("Pad") for _ in range(3)]
+    _init(backend)
+
+    backend.unplug(pads[0])
+    backend.unplug(pads[2])
+    _process(backend)
+
+    pad = backend.plug("Other pad")
+    _process(backend)
+
+    assert steuer.controllers_by_instance_id[pad.instance_id].player == 0
+
+
+def test_mapped_controller_is_opened_and_unmapped_controller_is_closed(backend):
+    mapped = backend.plug("Pad")
+    unmapped = backend.plug("Unknown pad")
+    _init(backend)
+
+    assert mapped.is_open
+    assert not unmapped.is_open
+    assert steuer.controllers_by_instance_id[mapped.instance_id].opens == 1
+
+
+def test_hotplugged_controller_is_opened_only_if_mapped(backend):
+    _init(backend)
+
+    mapped = backend.plug("Pad")
+    unmapped = backend.plug("Unknown pad")
+    _process(backend)
+
+    assert mapped.is_open
+    assert not unmapped.is_open
+
+
+def test_number_is_handed_over_on_remove(backend):
+    pad_a = backend.plug("Pad")
+    pad_b = backend.plug("Pad")
+    _init(backend)
+
+    backend.unplug(pad_a)
+    _process(backend)
+    pad_c = backend.plug("Pad")
+    _process(backend)
+
+    backend.unplug(pad_b)
+    _process(backend)
+
+    assert steuer.controllers_by_joy[1] is steuer.controllers_by_instance_id[pad_c.instance_id]
+
+
+def test_startup_device_events_are_ignored(backend):
+    # SDL sends JOYDEVICEADDED for every controller that is connected at startup
+    pad = backend.plug("Pad")
+    steuer.init(use_events=False, input_backend=backend)
+
+    assert _process(backend) == {}
+    assert [_controller.instance_id for _controller in steuer.controllers] == [pad.instance_id]
+    assert steuer.player_slots == [steuer.controllers[0]]
+
+
+def test_other_controllers_keep_their_state(backend):
+    pad_a = backend.plug("Pad")
+    _init(backend)
+    pad_a.press(0)
+    _process(backend)
+
+    pad_b = backend.plug("Pad")
+    _process(backend)
+    backend.unplug(pad_b)
+    _process(backend)
+
+    assert steuer.controllers_by_instance_id[pad_a.instance_id].bits == steuer.BUTTON_TOP
+    assert pad_a.is_open
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+_check = """
+import logging, sys
+import steuer
+print("pygame" in sys.modules, [type(_handler).__name__ for _handler in logging.getLogger("Steuer").handlers])
+"""
+
+
+def test_import_is_side_effect_free(tmp_path):
+    # no logging.conf in the working directory and nothing printed
+    _result = subprocess.run([sys.executable, "-c", _check], cwd=str(tmp_path), env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+    assert _result.stdout == "False ['NullHandler']\n"
+    assert _result.stderr == ""
+
+
+def test_pygame_is_imported_by_init(tmp_path):
+    import steuer
+    import steuer.virtual
+
+    steuer.init(use_events=False, input_backend=steuer.virtual.VirtualBackend())
+
+    assert steuer.pygame is sys.modules["pygame"]
+    assert steuer._joy_button_down == steuer.pygame.JOYBUTTONDOWN
@@ -0,0 +1,213 @@
+import json
+import os
+import threading
+
+import pytest
+
+import steuer
+
+
+def _controller(name, function):
+    _controller = steuer.Controller(0, name=name)
+    _controller.mapping = {"button": {"0": {"Function": function}}, "axis": {}, "hat": {}}
+
+    return _controller
+
+
+def _database(**options):
+    return steuer.MappingDB("test", "steuer.json", os.getcwd(), False, **options)
+
+
+def test_journal_is_replayed_on_load():
+    _database(use_journal=True).add_mapping(_controller("Pad", "BUTTON_TOP"))
+
+    assert not os.path.isfile("steuer.json")
+    assert _database().mappings["Pad"]["button"]["0"]["Function"] == "BUTTON_TOP"
+
+
+def test_incomplete_journal_record_is_skipped():
+    _journaled = _database(use_journal=True)
+    _journaled.add_mapping(_controller("Pad", "BUTTON_TOP"))
+
+    with open(_journaled.journal_path, "a") as _journal:
+        _journal.write('{"name": "cut')
+
+    assert list(_database(use_journal=True).mappings) == ["Pad"]
+
+
+def test_save_removes_stale_journal():
+    _database(use_journal=True).add_mapping(_controller("Pad", "OLD"))
+
+    _saving = _database()
+    _saving.add_mapping(_controller("Pad", "NEW"))
+
+    assert not os.path.isfile(_saving.journal_path)
+    assert _database().mappings["Pad"]["button"]["0"]["Function"] == "NEW"
+
+
+def test_save_removes_interrupted_compaction():
+    _journaled = _database(use_journal=True)
+    _journaled.add_mapping(_controller("Pad", "OLD"))
+    os.replace(_journaled.journal_path, _journaled._compacting_path)
+
+    _saving = _database()
+    _saving.add_mapping(_controller("Pad", "NEW"))
+
+    assert not os.path.isfile(_saving._compacting_path)
+    assert _database().mappings["Pad"]["button"]["0"]["Function"] == "NEW"
+
+
+def test_compaction_folds_journal_into_database():
+    _journaled = _database(use_journal=True, compaction_threshold=5)
+    for _number in range(12):
+        _journaled.add_mapping(_controller("Pad {0}".format(_number % 8), "BUTTON_{0}".format(_number)))
+
+    _journaled.compact()
+
+    assert not os.path.isfile(_journaled.journal_path)
+    assert not os.path.isfile(_journaled._compacting_path)
+    assert _journaled.journal_records == 0
+
+    with open("steuer.json") as _file:
+        assert json.load(_file) == _journaled.mappings
+    assert _journaled.mappings["Pad 3"]["button"]["0"]["Function"] == "BUTTON_11"
+
+
+def test_compaction_waits_for_the_running_compaction(monkeypatch):
+    _journaled = _database(use_journal=True)
+    _journaled.add_mapping(_controller("Pad", "OLD"))
+
+    _release = threading.Event()
+    _write_database = _journaled._write_database
+    monkeypatch.setattr(_journaled, "_write_database", lambda mappings: _release.wait(5) and _write_database(mappings))
+    _journaled.compact(wait=False)
+
+    # appended while the background compaction is running
+    _journaled.add_mapping(_controller("Pad", "NEW"))
+    threading.Timer(0.05, _release.set).start()
+    _journaled.compact()
+
+    assert not os.path.isfile(_journaled.journal_path)
+    with open("steuer.json") as _file:
+        assert json.load(_file)["Pad"]["button"]["0"]["Function"] == "NEW"
+
+
+def test_interrupted_compaction_is_completed_by_load():
+    _journaled = _database(use_journal=True)
+    _journaled.add_mapping(_controller("Pad", "OLD"))
+    os.replace(_journaled.journal_path, _journaled._compacting_path)
+
+    # the records of the new journal follow the records of the interrupted compaction
+    _database(use_journal=True).add_mapping(_controller("Pad", "NEW"))
+
+    _loaded = _database(use_journal=True)
+
+    assert _loaded.mappings["Pad"]["button"]["0"]["Function"] == "NEW"
+
+
+def test_cache_is_used_until_the_database_changes(monkeypatch):
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_TOP"}}, "axis": {}, "hat": {}}}, _file)
+
+    _database(use_cache=True)
+    assert os.path.isfile("steuer.json.cache")
+
+    with monkeypatch.context() as _patch:
+        _patch.setattr(json, "load", lambda _file: pytest.fail("database parsed again"))
+        _cached = _database(use_cache=True)
+
+    assert _cached.found_database
+    assert _cached.mappings["Pad"]["button"]["0"]["Function"] == "BUTTON_TOP"
+    assert _cached.get_compiled_mapping("Pad") == ({0: "BUTTON_TOP"}, {}, {})
+
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_DOWN"}}, "axis": {}, "hat": {}}}, _file)
+
+    assert _database(use_cache=True).get_compiled_mapping("Pad") == ({0: "BUTTON_DOWN"}, {}, {})
+
+
+def test_cache_follows_the_journal():
+    _database(use_journal=True, use_cache=True).add_mapping(_controller("Pad", "BUTTON_TOP"))
+    _database(use_journal=True, use_cache=True)
+
+    _database(use_journal=True).add_mapping(_controller("Pad", "BUTTON_DOWN"))
+
+    assert _database(use_journal=True, use_cache=True).mappings["Pad"]["button"]["0"]["Function"] == "BUTTON_DOWN"
+
+
+def test_unreadable_cache_is_rebuilt():
+    _database(use_journal=True).add_mapping(_controller("Pad", "BUTTON_TOP"))
+
+    with open("steuer.json.cache", "wb") as _file:
+        _file.write(b"\x00broken")
+
+    assert _database(use_journal=True, use_cache=True).mappings["Pad"]["button"]["0"]["Function"] == "BUTTON_TOP"
+    assert _database(use_journal=True, use_cache=True).compiled["Pad"] == ({0: "BUTTON_TOP"}, {}, {})
+
+
+def test_lazy_mappings_decode_on_demand(monkeypatch):
+    _mappings = dict(("Pad {0}".format(_number), {"button": {"0": {"Function": "BUTTON_{0}".format(_number)}}, "axis": {},
+                                                  "hat": {"0:1:0": {"Function": "{ [tricky\" }"}}}) for _number in range(5))
+    with open("steuer.json", "w") as _file:
+        json.dump(_mappings, _file, indent=2)
+
+    _lazy = _database(use_lazy_loading=True, lru_size=2).mappings
+
+    assert isinstance(_lazy, steuer.LazyMappings)
+    assert sorted(_lazy) == sorted(_mappings)
+    assert len(_lazy._decoded) == 0
+
+    _decoded = []
+    _loads = json.loads
+    monkeypatch.setattr(json, "loads", lambda data: _decoded.append(data) or _loads(data))
+
+    assert _lazy["Pad 3"] == _mappings["Pad 3"]
+    assert _lazy["Pad 1"] == _mappings["Pad 1"]
+    assert _lazy["Pad 3"] == _mappings["Pad 3"]
+    assert len(_decoded) == 2
+
+    # Pad 1 is the least recently used mapping
+    assert _lazy["Pad 4"] == _mappings["Pad 4"]
+    assert list(_lazy._decoded) == ["Pad 3", "Pad 4"]
+
+
+def test_lazy_database_saves_changed_mappings():
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_TOP"}}, "axis": {}, "hat": {}}, "Stick": {"button": {}, "axis": {}, "hat": {}}}, _file)
+
+    _lazy = _database(use_lazy_loading=True)
+    _lazy.add_mapping(_controller("Pad", "BUTTON_DOWN"))
+    _lazy.add_mapping(_controller("Wheel", "BUTTON_TOP"))
+
+    _loaded = _database().mappings
+    assert sorted(_loaded) == ["Pad", "Stick", "Wheel"]
+    assert _loaded["Pad"]["button"]["0"]["Function"] == "BUTTON_DOWN"
+    assert _loaded["Stick"] == {"button": {}, "axis": {}, "hat": {}}
+
+
+def test_layers_override_the_layers_below():
+    os.mkdir("system")
+    os.mkdir("user")
+    _system = steuer.MappingDB("system", "steuer.json", "system", False)
+    _system.add_mapping(_controller("Pad", "SYSTEM"))
+    _system.add_mapping(_controller("Stick", "SYSTEM"))
+    _user = steuer.MappingDB("user", "steuer.json", "user", False)
+
+    _layered = steuer.LayeredMappingDB("layered", [_system, _user])
+    assert _layered.get_layer("Pad") is _system
+
+    # a new mapping is saved to the top layer and updates the index
+    _layered.add_mapping(_controller("Pad", "USER"))
+
+    assert _layered.get_layer("Pad") is _user
+    assert _layered.get_layer("Stick") is _system
+    assert _layered.get_mapping_by_controller(_controller("Pad", None))["button"]["0"]["Function"] == "USER"
+    assert _layered.get_compiled_mapping("Stick") == ({0: "SYSTEM"}, {}, {})
+    assert _system.mappings["Pad"]["button"]["0"]["Function"] == "SYSTEM"
+
+    # a reloaded layer drops the names it no longer provides
+    os.remove(os.path.join("user", "steuer.json"))
+    _user.load()
+
+    assert _layered.get_layer("Pad") is _system
+    assert _layered.get_layer("Wheel") is None
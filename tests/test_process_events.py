@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+import steuer
+import steuer.virtual
+
+
+@pytest.fixture
+def pads():
+    """
+    Two mapped virtual controllers
+    """
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_TOP"}, "1": {"Function": "BUTTON_DOWN"}},
+                           "axis": {"0:<": {"Function": "LEFT_STICK_LEFT"}, "0:>": {"Function": "LEFT_STICK_RIGHT"}},
+                           "hat": {}}}, _file)
+
+    steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top")
+    steuer.Action("BUTTON_DOWN", steuer.BUTTON_DOWN, "Button down", "down")
+    steuer.Action("LEFT_STICK_LEFT", steuer.LEFT_STICK_LEFT, "Left stick left", "left")
+    steuer.Action("LEFT_STICK_RIGHT", steuer.LEFT_STICK_RIGHT, "Left stick right", "right")
+
+    _backend = steuer.virtual.VirtualBackend()
+    _pads = [_backend.plug("Pad"), _backend.plug("Pad")]
+    steuer.init(use_events=False, input_backend=_backend)
+    steuer.detect_connected_controllers()
+    steuer.process_events(steuer.get_events())
+
+    return _pads
+
+
+def test_frame_result_per_player(pads):
+    _first, _second = pads
+    _first.press(0)
+    _second.press(1)
+    _second.release(1)
+    _second.move_axis(0, 1.0)
+
+    _result = steuer.process_events(steuer.get_events())
+
+    assert isinstance(_result, steuer.FrameResult)
+    assert _result == {0: (steuer.BUTTON_TOP, 0), 1: (steuer.LEFT_STICK_RIGHT, 0)}
+    assert _result.dropped_events == 0
+
+
+def test_frame_result_of_a_release(pads):
+    _first = pads[0]
+    _first.press(0)
+    steuer.process_events(steuer.get_events())
+
+    _first.release(0)
+    _first.press(1)
+
+    assert steuer.process_events(steuer.get_events()) == {0: (steuer.BUTTON_DOWN, steuer.BUTTON_TOP)}
+    assert steuer.controllers[0].bits == steuer.BUTTON_DOWN
+
+
+def test_same_bits_as_get_action(pads):
+    _first = pads[0]
+    for _value in (1.0, -1.0, 0.0, -1.0):
+        _first.move_axis(0, _value)
+    _first.press(1)
+    _events = steuer.get_events()
+
+    steuer.process_events(_events, use_callbacks=False)
+    _batch_bits = steuer.controllers[0].bits
+
+    steuer.controllers[0].bits = 0
+    steuer.controllers[0]._last_axis_action = {}
+    for _event in _events:
+        steuer.get_action(_event)
+
+    assert _batch_bits == steuer.controllers[0].bits == steuer.LEFT_STICK_LEFT | steuer.BUTTON_DOWN
+
+
+def test_frame_masks(pads):
+    _first = pads[0]
+    _controller = steuer.controllers[0]
+    _first.press(0)
+    steuer.process_events(steuer.get_events())
+
+    steuer.begin_frame()
+    _first.press(1)
+    steuer.process_events(steuer.get_events())
+
+    assert _controller.pressed_mask == steuer.BUTTON_DOWN
+    assert _controller.released_mask == 0
+    assert _controller.held_mask == steuer.BUTTON_TOP
+
+    steuer.begin_frame()
+    _first.release(0)
+    _first.press(0)
+    _first.release(1)
+    steuer.process_events(steuer.get_events())
+
+    # a press and release within the frame doesn't show up
+    assert _controller.pressed_mask == 0
+    assert _controller.released_mask == steuer.BUTTON_DOWN
+    assert _controller.held_mask == steuer.BUTTON_TOP
+
+
+def test_coalesce_events(pads):
+    _first, _second = pads
+    _first.move_axis(0, -1.0)
+    _first.press(1)
+    _second.move_axis(0, -1.0)
+    _first.move_hat(0, (1, 0))
+    _first.move_axis(0, 1.0)
+    _first.move_hat(0, (0, 0))
+    _events = steuer.get_events()
+
+    _kept, _dropped = steuer.coalesce_events(_events)
+
+    assert _dropped == 2
+    assert _kept == [_events[1], _events[2], _events[4], _events[5]]
+
+
+def test_process_coalesced_events(pads):
+    _first = pads[0]
+    for _value in (-1.0, 0.0, 1.0, 0.5, 1.0):
+        _first.move_axis(0, _value)
+
+    _result = steuer.process_events(steuer.get_events(), coalesce=True)
+
+    assert _result.dropped_events == 4
+    assert _result == {0: (steuer.LEFT_STICK_RIGHT, 0)}
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+import steuer
+import steuer.recording
+import steuer.virtual
+
+
+@pytest.fixture
+def backend():
+    """
+    A virtual backend with a mapping database that maps button 0 to BUTTON_TOP and button 300 to BUTTON_DOWN
+    """
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_TOP"}, "300": {"Function": "BUTTON_DOWN"}}, "axis": {}, "hat": {}}}, _file)
+
+    steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top")
+    steuer.Action("BUTTON_DOWN", steuer.BUTTON_DOWN, "Button down", "down")
+
+    return steuer.virtual.VirtualBackend()
+
+
+def _connect(backend, number_of_pads):
+    _pads = [backend.plug("Pad", number_of_buttons=400) for _ in range(number_of_pads)]
+    steuer.init(use_events=False, input_backend=backend)
+    steuer.detect_connected_controllers()
+    steuer.get_events()
+
+    return _pads
+
+
+def _reconnect(backend, pads):
+    # a new session: the pads come back with new instance ids
+    for _pad in pads:
+        backend.unplug(_pad)
+    steuer.process_events(steuer.get_events())
+
+    _pads = [backend.plug("Pad", number_of_buttons=400) for _ in pads]
+    steuer.process_events(steuer.get_events())
+
+    return _pads
+
+
+def test_records_keep_wide_indexes_and_instance_ids(backend):
+    _pad, = _connect(backend, 1)
+    _recorder = steuer.recording.Recorder("session.steuer")
+    _recorder.start()
+
+    _pad.press(300)
+    for event in steuer.get_events():
+        steuer.get_action(event)
+    _recorder.stop()
+
+    (_timestamp, _dispatch, _event), = steuer.recording.Replayer("session.steuer").events()
+    assert _dispatch == steuer.recording.DISPATCH_GET_ACTION
+    assert (_event.button, _event.joy, _event.instance_id) == (300, 0, _pad.instance_id)
+
+
+def test_process_events_are_recorded_and_replayed_after_reconnect(backend):
+    _pads = _connect(backend, 2)
+    _recorder = steuer.recording.Recorder("session.steuer")
+    _recorder.start()
+
+    _pads[0].press(0)
+    _pads[1].press(300)
+    steuer.process_events(steuer.get_events(), use_callbacks=False)
+    _pads[0].release(0)
+    steuer.process_events(steuer.get_events(), use_callbacks=False)
+    _recorder.stop()
+
+    assert _recorder.records == 3
+    assert steuer.process_events.__name__ == "process_events"
+    _recorded_bits = [_controller.bits for _controller in steuer.controllers]
+
+    _pads = _reconnect(backend, _pads)
+    assert [_controller.bits for _controller in steuer.controllers] == [0, 0]
+
+    _batches = []
+    _process_events = steuer.process_events
+
+    def _counting_process_events(events, *options):
+        _batches.append(len(events))
+        return _process_events(events, *options)
+
+    steuer.process_events = _counting_process_events
+    try:
+        assert steuer.recording.Replayer("session.steuer").replay(realtime=False) == 3
+    finally:
+        steuer.process_events = _process_events
+
+    assert _batches == [2, 1]
+    assert [_controller.bits for _controller in steuer.controllers] == _recorded_bits == [0, steuer.BUTTON_DOWN]
+
+
+def test_recording_of_an_old_version_is_rejected(backend):
+    with open("old.steuer", "wb") as _file:
+        _file.write(b"STEUERR\x01")
+
+    with pytest.raises(ValueError):
+        list(steuer.recording.Replayer("old.steuer").events())
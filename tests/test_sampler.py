@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+
+import pygame
+import pytest
+
+import steuer
+import steuer.sampler
+import steuer.virtual
+
+
+@pytest.fixture
+def pad():
+    """
+    A mapped virtual controller whose button 0 is mapped to BUTTON_TOP
+    """
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_TOP"}}, "axis": {}, "hat": {}}}, _file)
+
+    _backend = steuer.virtual.VirtualBackend()
+    _pad = _backend.plug("Pad")
+    steuer.init(use_events=False, input_backend=_backend)
+    steuer.detect_connected_controllers()
+    steuer.get_events()
+
+    return _pad
+
+
+def test_handed_over_events_are_mapped_on_the_sampler_thread(pad):
+    _threads = []
+    steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top", on_pressed=lambda controller: _threads.append(threading.current_thread()))
+    _sampler = steuer.sampler.Sampler(use_callbacks=True)
+    _sampler.start()
+
+    pad.press(0)
+    pad.release(0)
+    assert _sampler.feed(steuer.get_events(), timestamp=2.5)
+
+    _deadline = time.time() + 5
+    while len(_sampler.ring) < 2 and time.time() < _deadline:
+        time.sleep(0.001)
+    _sampler.stop()
+
+    assert [(_record.player, _record.action, _record.pressed, _record.timestamp) for _record in _sampler.drain()] == [
+        (0, "BUTTON_TOP", True, 2.5), (0, "BUTTON_TOP", False, 2.5)]
+    assert _threads and _threads[0] is not threading.current_thread()
+
+
+def test_records_are_stamped_with_the_sdl_timestamp(pad, monkeypatch):
+    steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top")
+    monkeypatch.setattr(pygame.time, "get_ticks", lambda: 5000)
+    _sampler = steuer.sampler.Sampler()
+    _sampler.start()
+
+    _early = pygame.event.Event(pygame.JOYBUTTONDOWN, joy=0, instance_id=pad.instance_id, button=0, timestamp=4900)
+    _late = pygame.event.Event(pygame.JOYBUTTONUP, joy=0, instance_id=pad.instance_id, button=0, timestamp=4990)
+    _sampler.feed([_early, _late])
+    _sampler.stop()
+
+    _pressed, _released = _sampler.drain()
+    assert _released.timestamp - _pressed.timestamp == pytest.approx(0.09)
+
+
+def test_deferred_callbacks_of_the_sampler_thread(pad):
+    _calls = []
+    steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top", on_pressed=_calls.append, on_released=_calls.append)
+    steuer.defer_callbacks(True, capacity=4)
+    _sampler = steuer.sampler.Sampler(use_callbacks=True)
+    _sampler.start()
+
+    for _ in range(500):
+        pad.press(0)
+        pad.release(0)
+        _sampler.feed(steuer.get_events())
+        steuer.run_callbacks()
+
+    _sampler.stop()
+    steuer.run_callbacks()
+
+    assert len(_calls) == 1000
+    assert steuer.callback_queue.size == 0
@@ -0,0 +1,32 @@
+import pytest
+
+import steuer
+
+
+@pytest.mark.parametrize("create", [
+    lambda: steuer.Controller(0, name="Pad"),
+    lambda: steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top"),
+    lambda: steuer.Direction("top", steuer.DPAD_TOP, "Top", "top"),
+    lambda: steuer.ConfigurationSession()
+], ids=["Controller", "Action", "Direction", "ConfigurationSession"])
+def test_no_instance_dict(create):
+    _instance = create()
+
+    assert not hasattr(_instance, "__dict__")
+    with pytest.raises(AttributeError):
+        _instance.misspelled_attribute = True
+
+
+def test_configuration_session_of_an_action():
+    _action = steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top")
+    assert _action.status is None
+
+    _action.status = steuer.Action.status_waiting
+
+    assert _action.configuration.status == steuer.Action.status_waiting
+    assert _action.configuration.delay_counter == 5
+
+    steuer.Action.end_configuration()
+
+    assert _action.configuration is None
+    assert _action.status is None
@@ -0,0 +1,74 @@
+import json
+import sys
+
+import pytest
+
+import steuer
+import steuer.virtual
+
+
+@pytest.fixture(params=["numpy", "array"])
+def pad(request, monkeypatch):
+    """
+    A mapped virtual controller whose bits are kept in the NumPy array or in the array('Q') of the state store
+    """
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_TOP"}, "1": {"Function": "BUTTON_DOWN"}}, "axis": {}, "hat": {}}}, _file)
+
+    steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top")
+    steuer.Action("BUTTON_DOWN", steuer.BUTTON_DOWN, "Button down", "down")
+
+    _backend = steuer.virtual.VirtualBackend()
+    _pad = _backend.plug("Pad")
+    steuer.init(use_events=False, use_state_store=True, input_backend=_backend)
+    steuer.detect_connected_controllers()
+    steuer.process_events(steuer.get_events())
+
+    assert (steuer.state_store._numpy is not None) == (request.param == "numpy")
+
+    return _pad
+
+
+def test_process_events_returns_ints(pad):
+    pad.press(0)
+    _pressed, _released = steuer.process_events(steuer.get_events())[0]
+
+    assert type(_pressed) is int and type(_released) is int
+    assert _pressed & steuer.BUTTON_TOP
+
+
+def test_action_records_of_the_store(pad):
+    pad.press(0)
+    pad.press(1)
+    pad.release(0)
+    _records = steuer.get_action_records(steuer.get_events(), timestamp=1.0)
+
+    assert [(_record.action, _record.pressed) for _record in _records] == [("BUTTON_TOP", True), ("BUTTON_DOWN", True), ("BUTTON_TOP", False)]
+
+
+def test_store_and_controller_share_the_bits(pad):
+    pad.press(1)
+    steuer.process_events(steuer.get_events())
+
+    _controller = steuer.controllers[0]
+    assert type(_controller.bits) is int
+    assert _controller.bits == steuer.BUTTON_DOWN
+    assert int(steuer.state_store.bits[0]) == steuer.BUTTON_DOWN
+    assert list(steuer.state_store.is_set(steuer.BUTTON_DOWN)) == [True]
+    assert steuer.state_store.get_controllers(steuer.BUTTON_TOP) == []
+
+
+def test_detached_controller_keeps_its_bits(pad):
+    pad.press(0)
+    steuer.process_events(steuer.get_events())
+    _controller = steuer.controllers[0]
+
+    steuer.state_store.detach(_controller)
+
+    assert _controller.bits == steuer.BUTTON_TOP
+    assert steuer.state_store.controllers == [None]
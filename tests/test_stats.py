@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import steuer
+import steuer.virtual
+
+
+@pytest.fixture
+def pad():
+    """
+    A mapped virtual controller with a callback on BUTTON_TOP and the statistics enabled
+    """
+    with open("steuer.json", "w") as _file:
+        json.dump({"Pad": {"button": {"0": {"Function": "BUTTON_TOP"}}, "axis": {"0:>": {"Function": "LEFT_STICK_RIGHT"}}, "hat": {}}}, _file)
+
+    steuer.Action("BUTTON_TOP", steuer.BUTTON_TOP, "Button top", "top", on_pressed=lambda controller: None)
+    steuer.Action("LEFT_STICK_RIGHT", steuer.LEFT_STICK_RIGHT, "Left stick right", "right")
+
+    _backend = steuer.virtual.VirtualBackend()
+    _pad = _backend.plug("Pad")
+    steuer.init(use_events=False, input_backend=_backend)
+    steuer.detect_connected_controllers()
+    steuer.process_events(steuer.get_events())
+    steuer.enable_stats()
+
+    return _pad
+
+
+def test_counters(pad):
+    pad.press(0)
+    pad.release(0)
+    pad.press(3)
+    pad.move_axis(0, 1.0)
+    steuer.process_events(steuer.get_events())
+
+    _stats = steuer.stats()
+
+    assert _stats["enabled"]
+    assert _stats["controllers"] == {0: {"events": {"button_down": 2, "button_up": 1, "axis_motion": 1}, "unmapped": 1}}
+    assert _stats["actions"] == {"BUTTON_TOP": {"pressed": 1, "released": 1}, "LEFT_STICK_RIGHT": {"pressed": 1, "released": 0}}
+    assert _stats["dispatch"]["call_event"]["count"] == 4
+    assert _stats["callbacks"]["BUTTON_TOP.on_pressed"]["count"] == 1
+
+
+def test_disabled_stats_keep_the_counters(pad):
+    pad.press(0)
+    steuer.process_events(steuer.get_events())
+    steuer.enable_stats(False)
+
+    pad.release(0)
+    steuer.process_events(steuer.get_events())
+    _stats = steuer.stats()
+
+    assert not _stats["enabled"]
+    assert _stats["actions"] == {"BUTTON_TOP": {"pressed": 1, "released": 0}}
+    assert steuer.Action.actions["BUTTON_TOP"].dispatcher is None
+
+    steuer.reset_stats()
+    assert steuer.stats()["actions"] == {}
+
+
+def test_latency_histogram():
+    _histogram = steuer.LatencyHistogram()
+    for _latency in (0.0000005, 0.000003, 0.000003, 1.0):
+        _histogram.add(_latency)
+
+    _snapshot = _histogram.snapshot()
+
+    assert _snapshot["counts"][0] == 1
+    assert _snapshot["counts"][_snapshot["bounds_us"].index(5)] == 2
+    assert _snapshot["counts"][-1] == 1
+    assert _snapshot["count"] == 4
+    assert _snapshot["max_ms"] == 1000.0
@@ -0,0 +1,62 @@
+import pygame
+
+import steuer
+import steuer.virtual
+
+
+def test_closed_devices_send_nothing():
+    _backend = steuer.virtual.VirtualBackend()
+    _pad = _backend.plug("Pad")
+    _backend.clear_events()
+
+    assert _pad.press(0) is None
+    assert _backend.get_events() == []
+
+    # the state of the device changes anyway
+    _backend.open(_pad)
+    assert _pad.press(0) is None
+    assert _pad.release(0).type == pygame.JOYBUTTONUP
+
+
+def test_play_script():
+    _backend = steuer.virtual.VirtualBackend()
+    _first, _second = _backend.plug("Pad"), _backend.plug("Pad")
+    _backend.open(_first)
+    _backend.open(_second)
+    _backend.clear_events()
+
+    _sent = _backend.play([(0, "press", 3), (_second, "move_axis", 1, -2.0), (0, "press", 3), (1, "move_hat", 0, (1, 0))])
+    _events = _backend.get_events()
+
+    assert _sent == 3
+    assert [(_event.type, _event.instance_id) for _event in _events] == \
+        [(pygame.JOYBUTTONDOWN, 0), (pygame.JOYAXISMOTION, 1), (pygame.JOYHATMOTION, 1)]
+    assert _events[1].value == -1.0
+
+
+def test_get_events_by_type():
+    _backend = steuer.virtual.VirtualBackend()
+    _pad = _backend.plug("Pad")
+    _backend.open(_pad)
+    _pad.press(0)
+    _pad.move_axis(0, 1.0)
+
+    assert [_event.type for _event in _backend.get_events([pygame.JOYAXISMOTION])] == [pygame.JOYAXISMOTION]
+    assert [_event.type for _event in _backend.get_events()] == [pygame.JOYDEVICEADDED, pygame.JOYBUTTONDOWN]
+
+
+def test_random_traffic_is_reproducible():
+    _traffic = []
+
+    for _run in range(2):
+        _backend = steuer.virtual.VirtualBackend()
+        _open, _closed = _backend.plug("Pad"), _backend.plug("Pad")
+        _backend.open(_open)
+        _backend.clear_events()
+
+        assert _backend.random_traffic(50, seed=7) == 50
+        _traffic.append([(_event.type, _event.instance_id, sorted(_event.dict.items())) for _event in _backend.get_events()])
+
+    assert _traffic[0] == _traffic[1]
+    assert set(_instance_id for _type, _instance_id, _attributes in _traffic[0]) == {0}
+    assert steuer.virtual.VirtualBackend().random_traffic(10) == 0